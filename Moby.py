@@ -1,691 +1,623 @@
-
-import streamlit as st
-import plotly.graph_objects as go
-import struct
-import io
-import json
-import ezdxf 
-import pandas as pd
-import os
-import base64
-from datetime import datetime, timedelta
-from fpdf import FPDF
-
-# --- 1. SETUP & LOGIN ---
-st.set_page_config(layout="wide", page_title="Moby Configurator")
-
-def check_login():
-    if "logged_in" not in st.session_state:
-        st.session_state.logged_in = False
-        st.session_state.username = ""
-    if not st.session_state.logged_in:
-        c_logo, c_title = st.columns([1, 4])
-        try: c_logo.image("logo.png", width=150)
-        except: pass
-        c_title.markdown("## 🔒 Area Riservata")
-        c1, c2 = st.columns(2)
-        u = c1.text_input("User")
-        p = c2.text_input("Password", type="password")
-        if st.button("Entra"):
-            try: db = st.secrets["passwords"]
-            except: db = {"admin": "admin"} 
-            if u in db and db[u] == p:
-                st.session_state.logged_in = True
-                st.session_state.username = u
-                st.rerun()
-            else: st.error("Accesso Negato")
-        st.stop()
-
-check_login()
-
-# --- 2. COSTANTI ---
-SPESSORE_LEGNO = 4.0 
-SPESSORE_FERRO = 0.3 
-DIAMETRO_FORO = 0.6 
-OFFSET_LATERALI = 3.0
-PESO_SPECIFICO_FERRO = 7.85 
-PESO_SPECIFICO_LEGNO = 0.70 
-
-VONTREE_DATA = {
-    "nome": "VONTREE",
-    "payoff": "Design & Produzione",
-    "via": "Via Palazzolo, 123", 
-    "citta": "25036 Palazzolo sull'Oglio (BS)",
-    "piva": "P.IVA: 01234567890", 
-    "email": "info@vontree.it"
-}
-
-VERSION = "v26.0 Documentation Ready"
-COPYRIGHT = "© Andrea Bossola 2025"
-stl_triangles = [] 
-
-# --- UTILITY ---
-def get_timestamp_string(): return datetime.now().strftime("%Y%m%d_%H%M")
-def clean_filename(name): return "".join([c if c.isalnum() else "_" for c in name])
-
-# --- 3. DATI (COSTI & PAGAMENTI) ---
-DEFAULT_COSTS = {
-    "costo_ferro_kg": 0.0, "costo_legno_mq": 0.0, "costo_ora_operaio": 0.0, 
-    "markup_percent": 30.0,
-    "gg_ordine_ferro": 1, "gg_arrivo_lastra": 5, "gg_verniciatura_ferro": 5,
-    "gg_ordine_legno": 1, "gg_arrivo_legno": 5, "gg_verniciatura_legno": 3,
-    "gg_attesa_corriere": 2,
-    "min_taglio_legno_pezzo": 0.0, "min_colore_legno_metro": 0.0, 
-    "min_preassemblaggio_modulo": 0.0, "min_preassemblaggio_mensola": 0.0,
-    "min_assemblaggio_finale_modulo": 30.0,
-    "ore_pulizia": 2.0, "ore_imballo_base": 1.0, "ore_imballo_extra": 2.0, 
-    "costo_imballo_materiale": 20.0, "ore_prep_spedizione": 2.0
-}
-DEFAULT_PAYMENTS = ["Rimessa diretta", "30% anticipo / 30% consegna / 40% saldo 30gg", "50% anticipo / 50% alla consegna", "50% anticipo / 50% 30gg dalla consegna", "100% alla consegna", "30% anticipo / 70% alla consegna", "Altro (Specificare)"]
-
-def load_costs_config():
-    if 'costs_config' not in st.session_state:
-        if os.path.exists("tempicosti_default.json"):
-            try:
-                with open("tempicosti_default.json", "r") as f:
-                    loaded = json.load(f)
-                    st.session_state.costs_config = DEFAULT_COSTS.copy()
-                    st.session_state.costs_config.update(loaded)
-            except: st.session_state.costs_config = DEFAULT_COSTS.copy()
-        else: st.session_state.costs_config = DEFAULT_COSTS.copy()
-
-def load_payments_list():
-    if not os.path.exists("pagamenti.json"):
-        try:
-            with open("pagamenti.json", "w") as f: json.dump(DEFAULT_PAYMENTS, f, indent=4)
-        except: pass
-        return DEFAULT_PAYMENTS
-    try:
-        with open("pagamenti.json", "r") as f: return json.load(f)
-    except: return DEFAULT_PAYMENTS
-
-load_costs_config()
-
-# --- 4. PDF ENGINE ---
-class PDFReport(FPDF):
-    def __init__(self, project_name, colors, is_commercial=False):
-        super().__init__()
-        self.project_name = project_name
-        self.colors = colors 
-        self.is_commercial = is_commercial
-        
-    def header(self):
-        if os.path.exists("logo.png"):
-            try: self.image("logo.png", 10, 8, 35)
-            except: pass
-        if self.is_commercial:
-            self.set_xy(120, 8); self.set_font('Arial', 'B', 10); self.cell(80, 5, VONTREE_DATA["nome"], 0, 1, 'R')
-            self.set_font('Arial', '', 8); self.set_x(120); self.cell(80, 4, VONTREE_DATA["via"], 0, 1, 'R')
-            self.set_x(120); self.cell(80, 4, VONTREE_DATA["citta"], 0, 1, 'R')
-            self.set_x(120); self.cell(80, 4, VONTREE_DATA["piva"], 0, 1, 'R')
-            self.set_y(35); self.set_font('Arial', 'B', 16); self.cell(0, 10, 'PREVENTIVO', 0, 1, 'R')
-            self.set_font('Arial', '', 10); self.cell(0, 5, f"Data: {datetime.now().strftime('%d/%m/%Y')}", 0, 1, 'R')
-        else:
-            self.set_font('Arial', 'B', 12); self.cell(0, 6, 'SCHEDA TECNICA DI PRODUZIONE', 0, 1, 'R')
-            self.set_font('Arial', '', 9); date_str = datetime.now().strftime('%d/%m/%Y')
-            self.cell(0, 6, f"Progetto: {self.project_name} | Data: {date_str}", 0, 1, 'R')
-            self.set_font('Arial', 'I', 8); self.cell(0, 6, f"Finiture: Legno {self.colors.get('legno','')} - Ferro {self.colors.get('ferro','')}", 0, 1, 'R')
-            self.line(10, 30, 200, 30); self.ln(25) 
-
-    def footer(self):
-        self.set_y(-15); self.set_font('Arial', 'I', 8); self.cell(0, 10, f'{COPYRIGHT} - Pagina ' + str(self.page_no()), 0, 0, 'C')
-
-    def draw_dimension_line_vert(self, x, y_start, y_end, text, align='L'):
-        self.line(x, y_start, x, y_end); self.line(x-1, y_start, x+1, y_start); self.line(x-1, y_end, x+1, y_end)
-        mid_y = (y_start + y_end) / 2; self.set_font("Arial", '', 7)
-        if align == 'L': self.set_xy(x + 2, mid_y - 2); self.cell(10, 4, text, 0, 0, 'L')
-        else: self.set_xy(x - 12, mid_y - 2); self.cell(10, 4, text, 0, 0, 'R')
-    
-    def draw_dimension_line_horz(self, x_start, x_end, y, text):
-        self.set_draw_color(0,0,0); self.line(x_start, y, x_end, y); self.line(x_start, y-1, x_start, y+1); self.line(x_end, y-1, x_end, y+1)
-        self.set_xy(x_start, y - 4); self.set_font("Arial", '', 8); self.cell(x_end - x_start, 4, text, 0, 0, 'C')
-
-# --- DISEGNO PROSPETTO ---
-def draw_frontal_schema(pdf, start_x, start_y, cols_data, scale, draw_quotes=True):
-    current_x = start_x; tot_width = 0; w_ferro_pdf = 0.3
-    max_h = max([c['h'] for c in cols_data]); floor_y = start_y + (max_h * scale) + 10
-    pdf.line(start_x - 10, floor_y, start_x + (len(cols_data)*70)*scale, floor_y)
-    for col in cols_data:
-        h = col['h'] * scale; w = col['w'] * scale
-        pdf.set_fill_color(0, 0, 0); pdf.rect(current_x, floor_y - h, w_ferro_pdf, h, 'F')
-        
-        hole_centers = [SPESSORE_LEGNO/2.0] + sorted(col['mh']) + [col['h'] - SPESSORE_LEGNO/2.0]
-        pdf.set_fill_color(220, 220, 220)
-        for z in col['mh']: mz = z * scale; pdf.rect(current_x + w_ferro_pdf, floor_y - mz - (SPESSORE_LEGNO*scale), w, (SPESSORE_LEGNO*scale), 'F')
-        
-        if draw_quotes:
-            pdf.set_text_color(0,0,0); pdf.set_font("Arial", '', 7)
-            for i in range(len(hole_centers) - 1):
-                h1 = hole_centers[i]; h2 = hole_centers[i+1]
-                dist = h2 - h1
-                if dist > 3.0:
-                    y1 = floor_y - (h1 * scale); y2 = floor_y - (h2 * scale)
-                    mid_y = (y1 + y2) / 2
-                    pdf.set_xy(current_x + w_ferro_pdf, mid_y - 2); pdf.cell(w, 4, f"{dist:.1f}", 0, 0, 'C')
-                    
-        current_x += w + w_ferro_pdf
-        pdf.set_fill_color(0, 0, 0); pdf.rect(current_x, floor_y - h, w_ferro_pdf, h, 'F')
-        pdf.set_xy(current_x - w/2 - w_ferro_pdf, floor_y + 2); pdf.set_font("Arial", 'B', 8); pdf.cell(10, 5, f"Mod.{col['letter']}", 0, 0, 'C')
-        current_x += w_ferro_pdf + 0.2; tot_width += col['w'] + (SPESSORE_FERRO*2)
-    if draw_quotes: pdf.draw_dimension_line_horz(start_x, current_x - 0.2, floor_y + 10, f"LARGHEZZA TOT: {tot_width:.1f} cm")
-    return floor_y + 20 
-
-def generate_pdf_report(project_name, parts_list, wood_data, iron_data, stats, cols_data, colors):
-    pdf = PDFReport(project_name, colors, is_commercial=False)
-    # PAG 1
-    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_text_color(0, 0, 0); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "PROSPETTO FRONTALE (MUTO)", 0, 1, 'L', fill=True); pdf.ln(10)
-    draw_frontal_schema(pdf, 20, pdf.get_y(), cols_data, 0.35, draw_quotes=False)
-    # PAG 2
-    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "RIEPILOGO MATERIALI", 0, 1, 'L', fill=True); pdf.ln(2); pdf.set_font("Arial", size=10)
-    pdf.cell(45, 8, f"Peso Ferro: {stats['peso_ferro']:.1f} kg", 1); pdf.cell(45, 8, f"Peso Legno: {stats['peso_legno']:.1f} kg", 1); pdf.cell(45, 8, f"Totale: {stats['peso_tot']:.1f} kg", 1); pdf.cell(55, 8, f"Viteria: {stats['viti']} pz", 1, 1); pdf.ln(10)
-    pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "DISTINTA LEGNO", 0, 1, 'L', fill=True); pdf.ln(2); pdf.set_font("Arial", 'B', 9)
-    if not wood_data.empty:
-        for index, row in wood_data.iterrows(): pdf.cell(40, 8, f"{row['Larghezza']:.0f} x {row['Profondità']:.0f}", 1); pdf.cell(40, 8, f"{row['Pezzi']}", 1); pdf.cell(40, 8, f"{row['Metri Totali']:.1f} m", 1, 1)
-    pdf.ln(10); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "DISTINTA FERRO", 0, 1, 'L', fill=True); pdf.ln(2)
-    if not iron_data.empty:
-        for index, row in iron_data.iterrows(): pdf.cell(40, 8, f"{row['Altezza']:.0f} x {row['Profondità']:.0f}", 1); pdf.cell(40, 8, f"{row['Pezzi']}", 1); pdf.ln()
-    # PAG 3
-    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "PROSPETTO QUOTATO (INTERASSE FORI)", 0, 1, 'L', fill=True)
-    pdf.set_font("Arial", 'I', 8); pdf.cell(0, 6, "* Le quote interne indicano l'interasse (distanza centro-centro) dei fori.", 0, 1, 'L'); pdf.ln(10)
-    draw_frontal_schema(pdf, 20, pdf.get_y(), cols_data, 0.35, draw_quotes=True)
-    # PAG 4
-    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "PIANTA (VISTA DALL'ALTO)", 0, 1, 'L', fill=True); pdf.ln(20)
-    tot_len_cm = sum([c['w'] + (SPESSORE_FERRO*2) for c in cols_data]); scale_pianta = 0.65; start_x = 70; start_y = pdf.get_y() + 20; current_y = start_y
-    pdf.draw_dimension_line_vert(start_x - 15, start_y, start_y + (tot_len_cm * scale_pianta), f"TOT: {tot_len_cm:.1f}", 'R')
-    for col in cols_data:
-        w_mod_scaled = (col['w'] + (SPESSORE_FERRO*2)) * scale_pianta; d_mod_scaled = col['d'] * scale_pianta
-        pdf.set_fill_color(255, 255, 255); pdf.set_draw_color(0, 0, 0); pdf.rect(start_x, current_y, d_mod_scaled, w_mod_scaled)
-        pdf.set_xy(start_x, current_y - 5); pdf.set_font("Arial", '', 8); pdf.cell(d_mod_scaled, 5, f"P: {col['d']:.0f}", 0, 0, 'C')
-        pdf.draw_dimension_line_vert(start_x + d_mod_scaled + 5, current_y, current_y + w_mod_scaled, f"{col['w']:.0f}", 'L'); current_y += w_mod_scaled 
-    # PAG 5+
-    scale_det = 0.45; page_width = 210.0; center_x = page_width / 2; gap_between_views = 40.0 
-    for col in cols_data:
-        pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, f"DETTAGLIO MODULO {col['letter']}", 0, 1, 'L', fill=True)
-        pdf.set_font("Arial", '', 10); pdf.cell(0, 8, f"Dimensioni: {col['w']} (L) x {col['h']} (H) x {col['d']} (P) cm | {col['r']} Mensole", 0, 1, 'L'); pdf.ln(5)
-        h_front = col['h'] * scale_det; w_front = col['w'] * scale_det; w_side = col['d'] * scale_det
-        total_drawing_width = w_front + gap_between_views + w_side
-        start_x_drawing = (page_width - total_drawing_width) / 2
-        x_front = start_x_drawing; line_x = x_front + w_front + (gap_between_views / 2); x_side = x_front + w_front + gap_between_views
-        base_y = (297 / 2) + (h_front / 2); w_ferro_det = 0.5 
-        # 1. FRONTALE
-        pdf.set_xy(x_front, base_y - h_front - 8); pdf.set_font("Arial", 'B', 9); pdf.cell(w_front, 5, "VISTA FRONTALE", 0, 0, 'C')
-        pdf.set_fill_color(0,0,0); pdf.rect(x_front, base_y - h_front, w_ferro_det, h_front, 'F'); pdf.rect(x_front + w_front - w_ferro_det, base_y - h_front, w_ferro_det, h_front, 'F')
-        if col['mh']:
-            for z in col['mh']: mz = z * scale_det; pdf.set_fill_color(180,180,180); pdf.rect(x_front + w_ferro_det, base_y - mz - (SPESSORE_LEGNO*scale_det), w_front - (2*w_ferro_det), (SPESSORE_LEGNO*scale_det), 'F')
-        pdf.draw_dimension_line_horz(x_front, x_front + w_front, base_y + 5, f"L: {col['w']:.0f}")
-        # 2. QUOTE
-        hole_centers = [SPESSORE_LEGNO/2.0] + [z + SPESSORE_LEGNO/2.0 for z in sorted(col['mh'])] + [col['h'] - SPESSORE_LEGNO/2.0]
-        y_first = base_y - (hole_centers[0]*scale_det); y_last = base_y - (hole_centers[-1]*scale_det)
-        pdf.line(line_x, y_first, line_x, y_last)
-        for i in range(len(hole_centers)):
-            hc = hole_centers[i]; yc = base_y - (hc * scale_det); pdf.line(line_x - 1, yc, line_x + 1, yc)
-            if i < len(hole_centers) - 1:
-                h_next = hole_centers[i+1]; dist = h_next - hc; y_next = base_y - (h_next * scale_det); mid = (yc + y_next) / 2
-                pdf.set_xy(line_x + 2, mid - 2); pdf.set_font("Arial", '', 8); pdf.cell(10, 4, f"{dist:.1f}", 0, 0, 'L')
-        mid_tot = (y_first + y_last) / 2; pdf.set_xy(line_x - 25, mid_tot - 2); pdf.cell(23, 4, f"H Tot: {col['h']:.1f}", 0, 0, 'R')
-        # 3. LATERALE
-        pdf.set_xy(x_side, base_y - (col['h']*scale_det) - 8); pdf.set_font("Arial", 'B', 9); pdf.cell(w_side, 5, "VISTA LATERALE", 0, 0, 'C')
-        pdf.set_fill_color(255,255,255); pdf.set_draw_color(0,0,0); pdf.rect(x_side, base_y - (col['h']*scale_det), w_side, (col['h']*scale_det))
-        pdf.set_fill_color(0,0,0)
-        holes_x = [OFFSET_LATERALI, col['d']/2, col['d']-OFFSET_LATERALI]
-        for hc in hole_centers:
-            y_hole = base_y - (hc * scale_det)
-            for hx in holes_x: x_hole = x_side + (hx * scale_det); pdf.ellipse(x_hole-0.8, y_hole-0.8, 1.6, 1.6, 'F')
-        pdf.draw_dimension_line_horz(x_side, x_side + w_side, base_y + 5, f"P: {col['d']:.0f}")
-
-    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "ESECUTIVI TAGLIO (FERRO)", 0, 1, 'L', fill=True); pdf.ln(10); scale_cut = 0.5; cursor_y = pdf.get_y() + 10
-    for part in parts_list:
-        req_h = (part['w'] * scale_cut) + 25
-        if cursor_y + req_h > 270: pdf.add_page(); cursor_y = 40 
-        start_x = 20; pdf.set_fill_color(255, 255, 255); pdf.rect(start_x, cursor_y, part['h']*scale_cut, part['w']*scale_cut)
-        pdf.set_fill_color(0, 0, 0); 
-        for hx, hy in part['holes']: cx = start_x + (hy * scale_cut); cy = cursor_y + (hx * scale_cut); pdf.ellipse(cx-0.5, cy-0.5, 1.0, 1.0, 'F')
-        pdf.set_xy(start_x, cursor_y - 6); pdf.set_font("Arial", 'B', 9); pdf.cell(0, 5, f"{part['lbl']} ({part['h']}x{part['w']} cm)", 0, 0); cursor_y += req_h 
-    return pdf.output(dest='S').encode('latin-1')
-
-def generate_commercial_pdf(project_data, totals, client_data, payment_info, notes, cols_data):
-    pdf = PDFReport(project_data['project_name'], {}, is_commercial=True)
-    pdf.add_page()
-    pdf.set_xy(10, 50); pdf.set_font("Arial", '', 10); pdf.cell(100, 5, "Spett.le:", 0, 1); pdf.set_font("Arial", 'B', 11); pdf.cell(100, 5, client_data['name'], 0, 1)
-    pdf.set_font("Arial", '', 10); pdf.cell(100, 5, client_data['address'], 0, 1)
-    if client_data.get('piva'): pdf.cell(100, 5, f"P.IVA: {client_data['piva']}", 0, 1)
-    pdf.ln(10); pdf.set_font("Arial", 'B', 12); pdf.cell(0, 10, f"Oggetto: Fornitura Libreria {project_data['project_name']}", 0, 1); pdf.ln(2)
-    pdf.set_font("Arial", '', 10); desc = f"Libreria composta da {project_data['num_colonne']} moduli.\nFiniture: {project_data['finish_wood']} / {project_data['finish_iron']}."; pdf.multi_cell(0, 6, desc); pdf.ln(10)
-    pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, "Prospetto:", 0, 1)
-    draw_frontal_schema(pdf, 15, pdf.get_y(), cols_data, 0.35, draw_quotes=True)
-    pdf.add_page()
-    pdf.set_fill_color(240, 240, 240); pdf.cell(140, 8, "Descrizione", 1, 0, 'L', True); pdf.cell(40, 8, "Importo", 1, 1, 'R', True)
-    pdf.cell(140, 10, "Struttura su misura (Materiali e Lavorazione)", 1, 0); pdf.cell(40, 10, f"E {totals['price_ex_vat'] - totals['logistics_price']:.2f}", 1, 1, 'R')
-    if totals['logistics_price'] > 0:
-        desc_log = "Spedizione Corriere" if totals['logistics_type'] == "corriere" else "Trasporto e Montaggio in loco"
-        pdf.cell(140, 10, desc_log, 1, 0); pdf.cell(40, 10, f"E {totals['logistics_price']:.2f}", 1, 1, 'R')
-    pdf.ln(5); pdf.set_font("Arial", 'B', 11); pdf.cell(140, 10, "TOTALE IMPONIBILE", 0, 0, 'R'); pdf.cell(40, 10, f"E {totals['price_ex_vat']:.2f}", 1, 1, 'R')
-    pdf.cell(140, 10, "IVA (22%)", 0, 0, 'R'); pdf.cell(40, 10, f"E {totals['vat']:.2f}", 1, 1, 'R')
-    pdf.set_fill_color(50, 50, 50); pdf.set_text_color(255, 255, 255); pdf.cell(140, 12, "TOTALE IVATO", 1, 0, 'R', True); pdf.cell(40, 12, f"E {totals['price_total']:.2f}", 1, 1, 'R', True)
-    pdf.set_text_color(0, 0, 0); pdf.ln(10)
-    pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, "Condizioni Commerciali:", 0, 1); pdf.set_font("Arial", '', 10)
-    pdf.cell(50, 6, "Tempi di Consegna:", 0, 0); pdf.cell(0, 6, f"{totals['days_total']} giorni lavorativi (Data stima: {totals['delivery_date']})", 0, 1)
-    pdf.cell(50, 6, "Pagamento:", 0, 0); pdf.multi_cell(0, 6, payment_info)
-    if notes: pdf.ln(5); pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, "Note:", 0, 1); pdf.set_font("Arial", '', 10); pdf.multi_cell(0, 6, notes)
-    return pdf.output(dest='S').encode('latin-1')
-
-# --- 5. LOGICA PREVENTIVATORE ---
-def calculate_quote_logic(stats, user_inputs):
-    cfg = st.session_state.costs_config
-    cost_ferro = stats['peso_ferro'] * cfg.get('costo_ferro_kg', 0)
-    mq_legno = (stats['peso_legno'] / PESO_SPECIFICO_LEGNO / SPESSORE_LEGNO / 10.0) 
-    cost_legno = mq_legno * cfg.get('costo_legno_mq', 0)
-    cost_mat_tot = cost_ferro + cost_legno
-    days_iron = 0
-    if not user_inputs['stock_iron']: days_iron += cfg.get('gg_ordine_ferro', 1) + cfg.get('gg_arrivo_lastra', 5)
-    days_iron += cfg.get('gg_verniciatura_ferro', 5)
-    days_wood_supply = 0
-    if not user_inputs['stock_wood']: days_wood_supply = cfg.get('gg_ordine_legno', 2) + cfg.get('gg_arrivo_legno', 5)
-    mins_legno = (stats['viti']/6 * cfg.get('min_taglio_legno_pezzo', 0)) + (mq_legno * cfg.get('min_colore_legno_metro', 0))
-    hrs_legno = mins_legno / 60.0
-    days_wood_work = hrs_legno / 8.0
-    days_wood = days_wood_supply + days_wood_work + cfg.get('gg_verniciatura_legno', 3)
-    days_production = max(days_iron, days_wood)
-    mins_pre = (user_inputs['num_cols'] * cfg.get('min_preassemblaggio_modulo', 0)) + (stats['viti']/6 * cfg.get('min_preassemblaggio_mensola', 0))
-    mins_fin = user_inputs['num_cols'] * cfg.get('min_assemblaggio_finale_modulo', 0)
-    hrs_prod_tot = hrs_legno + ((mins_pre + mins_fin) / 60.0)
-    cost_labor_prod = hrs_prod_tot * cfg.get('costo_ora_operaio', 0)
-    log_cost_vivo = 0.0; log_days = 0; hrs_packing = cfg.get('ore_imballo_base', 1.0)
-    if user_inputs['logistics_type'] == "corriere":
-        hrs_packing += cfg.get('ore_imballo_extra', 2.0)
-        log_cost_vivo += user_inputs['costo_corriere'] 
-        log_days += cfg.get('gg_attesa_corriere', 2) + user_inputs['gg_viaggio_corriere']
-    else:
-        tot_man_hrs = (user_inputs['ore_viaggio'] + user_inputs['ore_montaggio']) * user_inputs['num_operai']
-        log_cost_vivo += tot_man_hrs * cfg.get('costo_ora_operaio', 0)
-        log_days += 1
-    cost_packing = (hrs_packing * cfg.get('costo_ora_operaio', 0)) + cfg.get('costo_imballo_materiale', 0)
-    costo_vivo_totale = cost_mat_tot + cost_labor_prod + cost_packing + log_cost_vivo
-    markup_pct = cfg.get('markup_percent', 30.0)
-    prezzo_vendita = costo_vivo_totale * (1 + (markup_pct / 100.0))
-    vat = prezzo_vendita * 0.22
-    del_date = user_inputs['start_date'] + timedelta(days=int(days_production + log_days + 1))
-    ratio_log = 0
-    if costo_vivo_totale > 0: ratio_log = log_cost_vivo / costo_vivo_totale
-    price_log_sale = prezzo_vendita * ratio_log
-    return {
-        "costo_vivo": costo_vivo_totale, "price_ex_vat": prezzo_vendita, "vat": vat, "price_total": prezzo_vendita + vat,
-        "logistics_price": price_log_sale, "logistics_type": user_inputs['logistics_type'], "delivery_date": del_date.strftime("%d/%m/%Y"), "days_total": int(days_production + log_days + 1)
-    }
-
-# --- 6. DXF & STL ENGINE ---
-def create_dxf_doc():
-    doc = ezdxf.new(); 
-    for name, col in [('TAGLIO',1), ('FORI',5), ('INFO',3)]: doc.layers.new(name=name, dxfattribs={'color': col})
-    return doc
-def draw_part_on_dxf(msp, part, offset_x, offset_y, project_name):
-    dim_x, dim_y = part['h'], part['w']; msp.add_lwpolyline([(offset_x, offset_y), (offset_x+dim_x, offset_y), (offset_x+dim_x, offset_y+dim_y), (offset_x, offset_y+dim_y), (offset_x, offset_y)], dxfattribs={'layer': 'TAGLIO'})
-    for hx, hy in part['holes']: msp.add_circle((offset_x + hy, offset_y + hx), radius=DIAMETRO_FORO/2, dxfattribs={'layer': 'FORI'})
-    t = msp.add_text(f"{part['lbl']} | {project_name}", dxfattribs={'layer': 'INFO', 'height': 2.5}); t.dxf.insert = (offset_x, offset_y + dim_y + 2); return dim_x 
-def generate_single_dxf(part, project_name):
-    doc = create_dxf_doc(); msp = doc.modelspace(); draw_part_on_dxf(msp, part, 0, 0, project_name); out = io.StringIO(); doc.write(out); return out.getvalue()
-def generate_full_dxf(parts, project_name):
-    doc = create_dxf_doc(); msp = doc.modelspace(); cursor_y = 0
-    for part in parts: draw_part_on_dxf(msp, part, 0, cursor_y, project_name); cursor_y += part['w'] + 15
-    out = io.StringIO(); doc.write(out); return out.getvalue()
-def add_stl(x,y,z,dx,dy,dz):
-    v = [[x,y,z],[x+dx,y,z],[x+dx,y+dy,z],[x,y+dy,z],[x,y,z+dz],[x+dx,y,z+dz],[x+dx,y+dy,z+dz],[x,y+dy,z+dz]]
-    idx = [[0,2,1],[0,3,2],[4,5,6],[4,6,7],[0,1,5],[0,5,4],[2,3,7],[2,7,6],[0,4,7],[0,7,3],[1,2,6],[1,6,5]]
-    for t in idx: stl_triangles.append((v[t[0]],v[t[1]],v[t[2]]))
-def draw(x,y,z,dx,dy,dz,col,name):
-    add_stl(x,y,z,dx,dy,dz); xv, yv, zv = [x, x+dx, x+dx, x]*2, [y, y, y+dy, y+dy]*2, [z]*4 + [z+dz]*4
-    I,J,K = [0,0,4,4,0,0,2,2,3,3,1,1], [1,2,5,6,1,5,3,7,0,4,2,6], [2,3,6,7,5,4,7,6,4,7,6,5]
-    return go.Mesh3d(x=xv, y=yv, z=zv, i=I, j=J, k=K, color=col, opacity=1, flatshading=True, name=name)
-def get_bin_stl(tris):
-    out = io.BytesIO(); out.write(b'\0'*80 + struct.pack('<I', len(tris))); 
-    for p in tris: out.write(struct.pack('<ffffffffffffH', 0,0,0, *p[0], *p[1], *p[2], 0))
-    return out.getvalue()
-def load_default_if_exists():
-    if 'data_loaded' in st.session_state: return
-    if os.path.exists("default.json"): 
-        try: apply_json_data(json.load(open("default.json")))
-        except: pass
-    st.session_state.data_loaded = True
-def apply_json_data(data):
-    st.session_state['project_name'] = data.get('project_name', 'Progetto')
-    st.session_state['num_colonne'] = data.get('num_colonne', 2)
-    st.session_state['client_name'] = data.get('client_name', '')
-    st.session_state['client_address'] = data.get('client_address', '')
-    st.session_state['finish_wood'] = data.get('finish_wood', 'Rovere Naturale')
-    st.session_state['finish_iron'] = data.get('finish_iron', 'Nero Opaco')
-    for i, col in enumerate(data.get('cols', [])):
-        st.session_state[f"w_{i}"] = col.get('w', 60); st.session_state[f"h_{i}"] = col.get('h', 200)
-        st.session_state[f"d_{i}"] = col.get('d', 30); st.session_state[f"r_{i}"] = col.get('r', 4)
-        st.session_state[f"man_{i}"] = col.get('manual', False)
-        if 'man_heights' in col: 
-            for j, val in enumerate(col['man_heights']): st.session_state[f"h_shelf_{i}_{j}"] = val
-def load_user_file(f):
-    if f is None or ('last_loaded_file' in st.session_state and st.session_state.last_loaded_file == f.name): return
-    try: apply_json_data(json.load(f)); st.session_state.last_loaded_file = f.name; st.success("Caricato!")
-    except Exception as e: st.error(f"Errore: {e}")
-
-# --- 7. README GENERATOR (MANUALE D'USO) ---
-def generate_readme_html():
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="it">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Manuale Utente - Moby Configurator</title>
-        <style>
-            body {{ font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px; }}
-            header {{ text-align: center; border-bottom: 2px solid #eee; padding-bottom: 20px; margin-bottom: 30px; }}
-            h1 {{ color: #2c3e50; margin-bottom: 5px; }}
-            h2 {{ color: #e74c3c; border-left: 5px solid #e74c3c; padding-left: 10px; margin-top: 30px; }}
-            h3 {{ color: #3498db; }}
-            .feature-box {{ background: #f9f9f9; padding: 15px; border-radius: 5px; border: 1px solid #ddd; margin-bottom: 15px; }}
-            code {{ background: #eee; padding: 2px 5px; border-radius: 3px; font-family: monospace; }}
-            .footer {{ text-align: center; margin-top: 50px; font-size: 0.8em; color: #777; }}
-        </style>
-    </head>
-    <body>
-        <header>
-            <h1>MOBY CONFIGURATOR {VERSION}</h1>
-            <p>Manuale d'Uso Completo</p>
-        </header>
-
-        <section>
-            <h2>1. Introduzione</h2>
-            <p><strong>Moby Configurator</strong> è lo strumento aziendale per la progettazione, preventivazione e produzione delle librerie modulari. 
-            Permette di disegnare strutture su misura, calcolare i costi in tempo reale, generare schede tecniche per l'officina e preventivi commerciali per il cliente.</p>
-        </section>
-
-        <section>
-            <h2>2. Sidebar (Barra Laterale)</h2>
-            <p>Qui si definiscono i parametri geometrici e di progetto.</p>
-            <div class="feature-box">
-                <h3>Gestione File</h3>
-                <ul>
-                    <li><strong>Carica JSON:</strong> Ripristina un progetto salvato in precedenza.</li>
-                    <li><strong>Download JSON:</strong> (In fondo alla sidebar) Salva il lavoro corrente per modificarlo dopo.</li>
-                    <li><strong>Download STL:</strong> Scarica il file 3D grezzo.</li>
-                </ul>
-            </div>
-            <div class="feature-box">
-                <h3>Configurazione Moduli</h3>
-                <p>Si possono inserire da 1 a 10 moduli. Per ogni modulo puoi definire:</p>
-                <ul>
-                    <li><strong>L (Larghezza):</strong> Larghezza della mensola (es. 60, 90 cm).</li>
-                    <li><strong>P (Profondità):</strong> Profondità della struttura.</li>
-                    <li><strong>H (Altezza):</strong> Altezza totale del montante in ferro.</li>
-                    <li><strong>Alt. Mensole:</strong> Numero di ripiani.</li>
-                    <li><strong>Check "Alt. Mensole" (Manuale):</strong> Se attivato, puoi inserire l'altezza esatta da terra per ogni singola mensola.</li>
-                </ul>
-            </div>
-        </section>
-
-        <section>
-            <h2>3. Tab 1: Visualizzazione 3D</h2>
-            <p>Anteprima in tempo reale della struttura. Usa il mouse per ruotare, zoomare e spostare la vista.</p>
-        </section>
-
-        <section>
-            <h2>4. Tab 2: Esecutivi Produzione</h2>
-            <p>Area tecnica dedicata all'officina.</p>
-            <div class="feature-box">
-                <h3>Funzionalità Chiave</h3>
-                <ul>
-                    <li><strong>Distinta Materiali:</strong> Calcolo automatico kg ferro, kg legno e numero viti.</li>
-                    <li><strong>PDF Scheda Tecnica:</strong> Documento completo con:
-                        <ul>
-                            <li>Prospetto Frontale (Muto e Quotato).</li>
-                            <li>Pianta dall'alto.</li>
-                            <li>Dettaglio singolo modulo (Viste Frontale/Laterale con quote fori).</li>
-                            <li>Esecutivi di taglio per il laser.</li>
-                        </ul>
-                    </li>
-                    <li><strong>DXF Export:</strong> Scarica i file vettoriali per il taglio laser (tutti insieme o pezzo per pezzo).</li>
-                </ul>
-            </div>
-        </section>
-
-        <section>
-            <h2>5. Tab 3: Preventivatore & Commerciale</h2>
-            <p>Area gestionale per calcolare prezzi e stampare offerte.</p>
-            <div class="feature-box">
-                <h3>Gestione Costi & Magazzino</h3>
-                <ul>
-                    <li><strong>Loader Costi:</strong> Carica un file <code>.json</code> con il listino prezzi aggiornato.</li>
-                    <li><strong>Magazzino:</strong> Spunta "Ferro/Legno Disponibile" per abbattere i tempi di consegna.</li>
-                    <li><strong>Logistica:</strong> Scegli tra Corriere (costo spedizione) o Montaggio interno (calcolo ore/operai).</li>
-                </ul>
-            </div>
-            <div class="feature-box">
-                <h3>Economia</h3>
-                <ul>
-                    <li><strong>Costo Vivo:</strong> Quanto costa all'azienda produrre il pezzo (Materiali + Lavoro + Imballo).</li>
-                    <li><strong>Prezzo Vendita:</strong> Calcolato aggiungendo il <strong>Markup %</strong> al costo vivo.</li>
-                </ul>
-            </div>
-            <div class="feature-box">
-                <h3>PDF Preventivo</h3>
-                <p>Genera un documento elegante per il cliente con:</p>
-                <ul>
-                    <li>Intestazione Vontree.</li>
-                    <li>Disegno quotato della libreria.</li>
-                    <li>Tabella prezzi chiara (Imponibile + IVA).</li>
-                    <li>Condizioni di pagamento e note personalizzate.</li>
-                </ul>
-            </div>
-        </section>
-
-        <div class="footer">
-            <p>{COPYRIGHT} | Generato automaticamente da Moby Configurator</p>
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
-
-# --- 8. SIDEBAR ---
-load_default_if_exists()
-with st.sidebar:
-    try: st.image("logo.png", width=200) 
-    except: st.markdown("## MOBY")
-    st.markdown("### MOBY CONFIGURATOR")
-    st.caption(COPYRIGHT)
-    st.divider()
-    if 'project_name' not in st.session_state: st.session_state['project_name'] = "Progetto"
-    st.text_input("Nome Progetto", key='project_name_input', value=st.session_state['project_name'])
-    st.session_state['project_name'] = clean_filename(st.session_state['project_name_input'])
-    f = st.file_uploader("Carica JSON", type=["json"]); 
-    if f: load_user_file(f)
-    st.divider()
-    st.markdown("#### Dati Cliente")
-    if 'client_name' not in st.session_state: st.session_state['client_name'] = ""
-    st.text_input("Ragione Sociale / Nome", key='client_name')
-    if 'client_address' not in st.session_state: st.session_state['client_address'] = ""
-    st.text_input("Indirizzo / Città", key='client_address')
-    st.markdown("#### Finiture")
-    if 'finish_wood' not in st.session_state: st.session_state['finish_wood'] = "Rovere Naturale"
-    st.text_input("Finitura Legno", key='finish_wood')
-    if 'finish_iron' not in st.session_state: st.session_state['finish_iron'] = "Nero Opaco"
-    st.text_input("Finitura Ferro", key='finish_iron')
-    st.divider()
-    st.header("📐 Moduli")
-    if 'num_colonne' not in st.session_state: st.session_state['num_colonne'] = 2
-    num_colonne = st.number_input("Quantità Moduli", min_value=1, max_value=10, key="num_colonne")
-    dati_colonne = []; parts_list = []; wood_list = []; iron_stats_list = []
-    for i in range(num_colonne):
-        module_letter = chr(65 + i)
-        with st.expander(f"Modulo {module_letter}", expanded=False):
-            c1, c2 = st.columns(2)
-            def_w = st.session_state.get(f"w_{i}", 60); def_h = st.session_state.get(f"h_{i}", 200)
-            def_d = st.session_state.get(f"d_{i}", 30); def_r = st.session_state.get(f"r_{i}", 4)
-            def_man = st.session_state.get(f"man_{i}", False)
-            w = c1.number_input("L", 30, 200, value=def_w, key=f"w_{i}"); d = c2.number_input("P", 20, 100, value=def_d, key=f"d_{i}")
-            c3, c4 = st.columns(2)
-            h = c3.number_input("H", 50, 400, value=def_h, key=f"h_{i}"); r = c4.number_input("Alt. Mensole", 1, 20, value=def_r, key=f"r_{i}")
-            is_manual = st.checkbox("Alt. Mensole", value=def_man, key=f"man_{i}")
-            mh = []; z_shelves = []
-            if is_manual:
-                step = (h - SPESSORE_LEGNO)/(r-1) if r>1 else 0
-                for k in range(r):
-                    def_shelf = int(k*step); 
-                    if k == r-1 and r > 1: def_shelf = int(h - SPESSORE_LEGNO)
-                    saved = st.session_state.get(f"h_shelf_{i}_{k}", def_shelf)
-                    val = st.number_input(f"M {k+1}", value=saved, key=f"h_shelf_{i}_{k}"); mh.append(val)
-                z_shelves = [float(x) for x in mh]
-            else:
-                if r == 1: z_shelves = [0.0]
-                else: step = (h - SPESSORE_LEGNO)/(r-1); z_shelves = [n*step for n in range(r)]
-            dati_colonne.append({"w":w, "h":h, "d":d, "r":r, "man":is_manual, "mh":z_shelves, "letter": module_letter})
-            holes_coords = []
-            for z in z_shelves:
-                cy = z + (SPESSORE_LEGNO / 2.0); holes_coords.append((OFFSET_LATERALI, cy)); holes_coords.append((d / 2.0, cy)); holes_coords.append((d - OFFSET_LATERALI, cy)) 
-            parts_list.append({"w": d, "h": h, "lbl": f"Mod_{module_letter}_SX", "holes": holes_coords})
-            parts_list.append({"w": d, "h": h, "lbl": f"Mod_{module_letter}_DX", "holes": holes_coords})
-            iron_stats_list.append({"Altezza": h, "Profondità": d}); iron_stats_list.append({"Altezza": h, "Profondità": d})
-            for _ in range(r): wood_list.append({"w": w, "d": d})
-    
-    # 3D
-    fig = go.Figure(); camera = dict(eye=dict(x=0.0, y=-2.5, z=0.1)); cx = 0 
-    for dc in dati_colonne:
-        lbl = f"Mod {dc['letter']}"; fig.add_trace(draw(cx, 0, 0, SPESSORE_FERRO, dc["d"], dc["h"], '#101010', f"Ferro SX {lbl}")); cx += SPESSORE_FERRO
-        for idx, z in enumerate(dc["mh"]): fig.add_trace(draw(cx, 0, z, dc["w"], dc["d"], SPESSORE_LEGNO, '#D2B48C', f"Piano {idx+1} {lbl}"))
-        cx += dc["w"]; fig.add_trace(draw(cx, 0, 0, SPESSORE_FERRO, dc["d"], dc["h"], '#101010', f"Ferro DX {lbl}")); cx += SPESSORE_FERRO
-    
-    st.divider(); st.header("SALVA / ESPORTA"); ts = get_timestamp_string(); prj = st.session_state['project_name']; fname_json = f"{prj}_{ts}.json"; fname_stl = f"{prj}_{ts}.stl"
-    cols_to_save = []
-    for dc in dati_colonne: cols_to_save.append({"w": dc['w'], "h": dc['h'], "d": dc['d'], "r": dc['r'], "manual": dc['man'], "man_heights": dc['mh']})
-    proj_data = {"project_name": prj, "num_colonne":st.session_state.num_colonne, "cols":cols_to_save, "client_name": st.session_state['client_name'], "client_address": st.session_state['client_address'], "finish_wood": st.session_state['finish_wood'], "finish_iron": st.session_state['finish_iron']}
-    c1, c2 = st.columns(2)
-    c1.download_button("💾 JSON", json.dumps(proj_data), fname_json, "application/json")
-    c2.download_button("🧊 STL", get_bin_stl(stl_triangles), fname_stl, "application/octet-stream")
-    st.divider(); st.caption(VERSION)
-
-# --- 9. TABS MAIN & MANUAL BUTTON ---
-# PULSANTE MANUALE (TOP PAGE)
-st.download_button("📘 SCARICA MANUALE D'USO", generate_readme_html(), "Manuale_Moby.html", "text/html", help="Clicca per scaricare la guida completa alle funzionalità")
-
-tab1, tab2, tab3 = st.tabs(["🎥 3D Config", "🏭 ESECUTIVI PRODUZIONE", "💰 PREVENTIVATORE"])
-
-with tab1:
-    fig.update_layout(scene=dict(xaxis=dict(visible=False), yaxis=dict(visible=False), zaxis=dict(title="H"), aspectmode='data', bgcolor="white"), scene_camera=camera, uirevision='constant', margin=dict(t=0,b=0,l=0,r=0), height=600)
-    st.plotly_chart(fig, width="stretch")
-
-with tab2:
-    st.markdown(f"### Distinta Materiali - {prj}")
-    vol_ferro = sum([p['w'] * p['h'] * SPESSORE_FERRO for p in parts_list]); peso_ferro = (vol_ferro * PESO_SPECIFICO_FERRO) / 1000.0
-    vol_legno = sum([w['w'] * w['d'] * SPESSORE_LEGNO for w in wood_list]); peso_legno = (vol_legno * PESO_SPECIFICO_LEGNO) / 1000.0
-    num_viti = len(wood_list) * 6; stats = {"peso_ferro": peso_ferro, "peso_legno": peso_legno, "peso_tot": peso_ferro + peso_legno, "viti": num_viti}
-    df_legno = pd.DataFrame(wood_list); distinta_legno_pdf = pd.DataFrame()
-    if not df_legno.empty:
-        df_legno['Quantità'] = 1; distinta_legno_pdf = df_legno.groupby(['w', 'd']).count().reset_index()
-        distinta_legno_pdf['Metri Totali'] = (distinta_legno_pdf['w'] * distinta_legno_pdf['Quantità']) / 100.0; distinta_legno_pdf.columns = ['Larghezza', 'Profondità', 'Pezzi', 'Metri Totali']
-    df_ferro = pd.DataFrame(iron_stats_list); distinta_ferro_pdf = pd.DataFrame()
-    if not df_ferro.empty: df_ferro['Quantità'] = 1; distinta_ferro_pdf = df_ferro.groupby(['Altezza', 'Profondità']).count().reset_index(); distinta_ferro_pdf.columns = ['Altezza', 'Profondità', 'Pezzi']
-    
-    c_info1, c_info2, c_info3, c_info4 = st.columns(4)
-    c_info1.metric("Peso Totale", f"{stats['peso_tot']:.1f} kg"); c_info2.metric("Peso Ferro", f"{stats['peso_ferro']:.1f} kg")
-    c_info3.metric("Peso Legno", f"{stats['peso_legno']:.1f} kg"); c_info4.metric("Viteria", f"{num_viti} pz")
-    colors_data = {"legno": st.session_state['finish_wood'], "ferro": st.session_state['finish_iron']}
-    fname_pdf = f"{prj}_{ts}_SchedaTecnica.pdf"
-    if st.button("📄 GENERA SCHEDA TECNICA PDF", type="primary", use_container_width=True):
-        pdf_bytes = generate_pdf_report(prj, parts_list, distinta_legno_pdf, distinta_ferro_pdf, stats, dati_colonne, colors_data)
-        st.download_button("📥 SCARICA PDF", pdf_bytes, fname_pdf, "application/pdf")
-    
-    st.divider(); c_sx, c_dx = st.columns(2)
-    with c_sx: st.subheader("🌲 Distinta Legno"); st.dataframe(distinta_legno_pdf, hide_index=True, use_container_width=True)
-    with c_dx: st.subheader("⛓️ Distinta Ferro"); st.dataframe(distinta_ferro_pdf, hide_index=True, use_container_width=True)
-    st.divider(); st.subheader("📦 Esecutivi Taglio (Anteprima Completa)")
-    fname_dxf_full = f"{prj}_{ts}_Tutto.dxf"; dxf_full = generate_full_dxf(parts_list, prj)
-    st.download_button("📦 SCARICA DXF UNICO", dxf_full, fname_dxf_full, "application/dxf", type="primary", use_container_width=True)
-    st.write("##")
-    
-    fig_all = go.Figure(); cursor_y_plot = 0; gap_plot = 30 
-    for idx, part in enumerate(parts_list):
-        dim_x, dim_y = part['h'], part['w']; fig_all.add_shape(type="rect", x0=0, y0=cursor_y_plot, x1=dim_x, y1=cursor_y_plot+dim_y, line=dict(color="#E0E0E0", width=2))
-        x_holes = [hy for hx, hy in part['holes']]; y_holes = [cursor_y_plot + hx for hx, hy in part['holes']] 
-        fig_all.add_trace(go.Scatter(x=x_holes, y=y_holes, mode='markers', marker=dict(color='#00FFFF', size=6), hoverinfo='skip'))
-        fig_all.add_annotation(x=dim_x/2, y=cursor_y_plot + dim_y/2, text=part['lbl'], showarrow=False, font=dict(size=14, color="white"))
-        cursor_y_plot += dim_y + gap_plot
-    fig_all.update_layout(xaxis=dict(title="Lunghezza (cm)", showgrid=True), yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, scaleanchor="x", scaleratio=1), height=600, margin=dict(l=10, r=10, t=10, b=10), showlegend=False)
-    st.plotly_chart(fig_all, width="stretch")
-    with st.expander("📂 Scarica DXF Pezzi Singoli"):
-        for idx, part in enumerate(parts_list):
-            c_name, c_down = st.columns([4, 1]); c_name.write(f"**{part['lbl']}** ({part['h']}x{part['w']} cm)")
-            c_down.download_button("⬇️ DXF", generate_single_dxf(part, prj), f"{part['lbl']}.dxf", "application/dxf", key=f"dxf_{idx}")
-
-with tab3:
-    st.header("💰 Preventivatore & Commerciale")
-    uploaded_costs = st.file_uploader("Carica Configurazione Prezzi (.json)", type=["json"])
-    if uploaded_costs is not None:
-        try: st.session_state.costs_config.update(json.load(uploaded_costs)); st.success("Listino prezzi aggiornato!")
-        except: st.error("File non valido")
-    st.divider()
-    c_set1, c_set2, c_set3 = st.columns(3)
-    with c_set1:
-        st.subheader("1. Magazzino")
-        date_start = st.date_input("Data Conferma", datetime.now())
-        stock_iron = st.checkbox("Ferro Disponibile?", value=False)
-        stock_wood = st.checkbox("Legno Disponibile?", value=False)
-    with c_set2:
-        st.subheader("2. Logistica")
-        log_type = st.radio("Metodo Consegna", ["Corriere", "Nostro Montaggio"])
-        costo_corriere = 0.0; gg_viaggio_corr = 0; ore_viaggio = 0.0; ore_montaggio = 0.0; num_op = 2
-        if log_type == "Corriere":
-            costo_corriere = st.number_input("Costo Spedizione €", 0.0, 2000.0, 150.0)
-            gg_viaggio_corr = st.number_input("GG Viaggio", 1, 15, 2)
-        else:
-            ore_viaggio = st.number_input("Ore Viaggio (A/R)", 0.0, 20.0, 2.0)
-            ore_montaggio = st.number_input("Ore Montaggio", 0.0, 50.0, 4.0)
-            num_op = st.number_input("Operai", 1, 5, 2)
-    with c_set3:
-        st.subheader("3. Dati Preventivo")
-        client_piva = st.text_input("P.IVA Cliente")
-        pay_list = load_payments_list()
-        pay_choice = st.selectbox("Modalità Pagamento", pay_list)
-        pay_text = pay_choice
-        if "Altro" in pay_choice: pay_text = st.text_input("Specificare Pagamento", "")
-        notes = st.text_area("Note Preventivo (Opzionale)")
-    st.write("---")
-    with st.expander("🛠️ Costi Materiali e Ricarico", expanded=True):
-        c1, c2, c3, c4 = st.columns(4)
-        st.session_state.costs_config['costo_ferro_kg'] = c1.number_input("Ferro (€/kg)", value=st.session_state.costs_config.get('costo_ferro_kg', 0.0))
-        st.session_state.costs_config['costo_legno_mq'] = c2.number_input("Legno (€/mq)", value=st.session_state.costs_config.get('costo_legno_mq', 0.0))
-        st.session_state.costs_config['costo_ora_operaio'] = c3.number_input("Operaio (€/h)", value=st.session_state.costs_config.get('costo_ora_operaio', 0.0))
-        st.session_state.costs_config['markup_percent'] = c4.number_input("Ricarico %", value=st.session_state.costs_config.get('markup_percent', 30.0), step=5.0)
-    with st.expander("⏱️ Tempi (Giorni)", expanded=False):
-        c1, c2, c3, c4 = st.columns(4)
-        st.session_state.costs_config['gg_ordine_ferro'] = c1.number_input("Ordine Ferro", value=st.session_state.costs_config.get('gg_ordine_ferro', 1))
-        st.session_state.costs_config['gg_arrivo_lastra'] = c2.number_input("Arrivo Ferro", value=st.session_state.costs_config.get('gg_arrivo_lastra', 5))
-        st.session_state.costs_config['gg_ordine_legno'] = c3.number_input("Ordine Legno", value=st.session_state.costs_config.get('gg_ordine_legno', 1)) 
-        st.session_state.costs_config['gg_arrivo_legno'] = c4.number_input("Arrivo Legno", value=st.session_state.costs_config.get('gg_arrivo_legno', 5)) 
-    with st.expander("🔨 Lavorazioni (Minuti)", expanded=False):
-        c1, c2 = st.columns(2)
-        st.session_state.costs_config['min_taglio_legno_pezzo'] = c1.number_input("Taglio (min/pz)", value=st.session_state.costs_config.get('min_taglio_legno_pezzo', 5.0))
-        st.session_state.costs_config['min_colore_legno_metro'] = c2.number_input("Colore (min/m)", value=st.session_state.costs_config.get('min_colore_legno_metro', 15.0))
-        c3, c4, c5 = st.columns(3)
-        st.session_state.costs_config['min_preassemblaggio_modulo'] = c3.number_input("Pre-ass Modulo (min/mod)", value=st.session_state.costs_config.get('min_preassemblaggio_modulo', 30.0))
-        st.session_state.costs_config['min_preassemblaggio_mensola'] = c4.number_input("Pre-ass Mensola (min/pz)", value=st.session_state.costs_config.get('min_preassemblaggio_mensola', 5.0))
-        st.session_state.costs_config['min_assemblaggio_finale_modulo'] = c5.number_input("Ass. Finale (min/mod)", value=st.session_state.costs_config.get('min_assemblaggio_finale_modulo', 30.0))
-    
-    vol_ferro_c = sum([p['w']*p['h']*SPESSORE_FERRO for p in parts_list]); peso_ferro_c = (vol_ferro_c * PESO_SPECIFICO_FERRO) / 1000.0
-    vol_legno_c = sum([w['w']*w['d']*SPESSORE_LEGNO for w in wood_list]); peso_legno_c = (vol_legno_c * PESO_SPECIFICO_LEGNO) / 1000.0
-    num_viti_c = len(wood_list) * 6
-    stats_calc = {"peso_ferro": peso_ferro_c, "peso_legno": peso_legno_c, "viti": num_viti_c}
-    user_inputs = {
-        "start_date": date_start, "stock_iron": stock_iron, "stock_wood": stock_wood, "logistics_type": log_type.lower().replace(" ", "_"),
-        "costo_corriere": costo_corriere, "gg_viaggio_corriere": gg_viaggio_corr, "ore_viaggio": ore_viaggio, "ore_montaggio": ore_montaggio, "num_operai": num_op, "num_cols": num_colonne
-    }
-    totals = calculate_quote_logic(stats_calc, user_inputs)
-    
-    st.divider()
-    col_res1, col_res2, col_res3 = st.columns(3)
-    col_res1.metric("🔴 COSTO VIVO (Interno)", f"€ {totals['costo_vivo']:.2f}")
-    col_res2.metric("🟢 PREZZO VENDITA (Ivato)", f"€ {totals['price_total']:.2f}", f"+{st.session_state.costs_config['markup_percent']}% Ricarico")
-    col_res3.info(f"📅 Consegna: {totals['delivery_date']} ({totals['days_total']} gg lav.)")
-    st.caption(f"Imponibile: € {totals['price_ex_vat']:.2f} | IVA: € {totals['vat']:.2f}")
-    if st.button("📄 GENERA PREVENTIVO CLIENTE (PDF)", type="primary"):
-        client_full_data = {"name": st.session_state['client_name'], "address": st.session_state['client_address'], "piva": client_piva}
-        pdf_comm = generate_commercial_pdf(proj_data, totals, client_full_data, pay_text, notes, dati_colonne)
-        st.download_button("SCARICA PREVENTIVO", pdf_comm, f"Preventivo_{st.session_state['client_name']}.pdf", "application/pdf")
-    st.markdown("---")
-    st.download_button("💾 Salva Configurazione Prezzi", json.dumps(st.session_state.costs_config), "tempicosti_default.json", "application/json")
+import streamlit as st
+import json
+import os
+from datetime import datetime
+
+
+# --- 1. SETUP & LOGIN ---
+st.set_page_config(layout="wide", page_title="Moby Configurator")
+
+def check_login():
+    if "logged_in" not in st.session_state:
+        st.session_state.logged_in = False
+        st.session_state.username = ""
+    if not st.session_state.logged_in:
+        c_logo, c_title = st.columns([1, 4])
+        try: c_logo.image("logo.png", width=150)
+        except: pass
+        c_title.markdown("## 🔒 Area Riservata")
+        c1, c2 = st.columns(2)
+        u = c1.text_input("User")
+        p = c2.text_input("Password", type="password")
+        if st.button("Entra"):
+            try: db = st.secrets["passwords"]
+            except: db = {"admin": "admin"} 
+            if u in db and db[u] == p:
+                st.session_state.logged_in = True
+                st.session_state.username = u
+                st.rerun()
+            else: st.error("Accesso Negato")
+        st.stop()
+
+check_login()
+# Il motore (numpy, e al primo uso plotly/ezdxf/fpdf) si carica solo dopo il login: la pagina di login resta leggera
+from engine import (
+    VERSION, COPYRIGHT, DEFAULT_COSTS, DEFAULT_PAYMENTS,
+    DEFAULT_COL, MAX_MODULES, MODULE_LIMITS, module_letter, normalize_project, calculate_quote, cols_to_table, table_to_cols, copy_modules, set_range,
+    get_geometry, get_stats, get_bom, get_figure, get_cut_preview, get_stl, get_3mf_model, get_glb_model, get_full_dxf, get_single_dxf, export_key, submit_pdf_report, job_manager, get_commercial_pdf,
+    ByteCache, ArtifactStore, DEFAULT_SHEET, nesting_report, get_nesting, get_sheet_dxf, get_dxf_bundle,
+    plan_table, get_wood_plan, project_to_json, get_production_package, get_toolpaths,
+    stage_cache, module_cache, profiler, span, records_table, span_summary, build_flame_figure, PROFILE_ENV, TIMINGS_ENV,
+    get_quote_stats, RESOURCES, RESOURCE_LABELS, order_from_quote, plan_delivery, schedule_table, load_table, load_orders, update_orders, SWEEP_PARAMS, SWEEP_METRICS, sweep_values, quote_sweep, build_sweep_figure,
+    DESIGN_METRICS, wall_width, design_search, get_validation, validation_table,
+)
+from engine.archive import ProjectArchive
+# Tempi per stadio di questo rerun: pannello PROFILAZIONE degli admin (engine/profiling.py)
+rerun_prof = profiler.start("rerun", utente=st.session_state.username)
+
+# --- 2. COSTANTI ---
+# Costanti geometriche, dati aziendali e costi di default vivono in engine/model.py
+
+# --- UTILITY ---
+def get_timestamp_string(): return datetime.now().strftime("%Y%m%d_%H%M")
+def clean_filename(name): return "".join([c if c.isalnum() else "_" for c in name])
+
+# --- 3. DATI (COSTI & PAGAMENTI) ---
+def load_costs_config():
+    if 'costs_config' not in st.session_state:
+        if os.path.exists("tempicosti_default.json"):
+            try:
+                with open("tempicosti_default.json", "r") as f:
+                    loaded = json.load(f)
+                    st.session_state.costs_config = DEFAULT_COSTS.copy()
+                    st.session_state.costs_config.update(loaded)
+            except: st.session_state.costs_config = DEFAULT_COSTS.copy()
+        else: st.session_state.costs_config = DEFAULT_COSTS.copy()
+
+def load_payments_list():
+    if not os.path.exists("pagamenti.json"):
+        try:
+            with open("pagamenti.json", "w") as f: json.dump(DEFAULT_PAYMENTS, f, indent=4)
+        except: pass
+        return DEFAULT_PAYMENTS
+    try:
+        with open("pagamenti.json", "r") as f: return json.load(f)
+    except: return DEFAULT_PAYMENTS
+
+def is_admin():
+    try: admins = st.secrets["admin_users"]
+    except Exception: admins = ["admin"]
+    return st.session_state.username in admins
+
+@st.cache_resource
+def get_archive():
+    # Un solo oggetto per processo; le connessioni SQLite sono per thread (una per sessione)
+    return ProjectArchive()
+
+load_costs_config()
+
+@st.cache_resource
+def get_artifact_store():
+    # Archivio su disco condiviso da sessioni, processi e riavvii (stessa cartella dell'API engine/server.py)
+    return ArtifactStore()
+
+# Cache dei file scaricabili della sessione: i byte si producono solo al click del download,
+# e solo se nessuna sessione (anche di un altro processo) li ha gia' prodotti
+if 'artifact_cache' not in st.session_state: st.session_state.artifact_cache = ByteCache(store=get_artifact_store())
+artifact_cache = st.session_state.artifact_cache
+
+# --- 4. PDF ENGINE ---
+# PDFReport, draw_frontal_schema e i generatori PDF vivono in engine/pdf.py.
+# La scheda tecnica si genera in background: mentre il job lavora si aggiorna solo il frammento con la
+# barra di avanzamento; un progetto gia' generato (anche da un'altra sessione) e' subito scaricabile.
+@st.fragment(run_every=0.3)
+def pdf_job_progress(key):
+    job = job_manager.get(key)
+    if job is None or job['stato'] in ("pronto", "errore"): st.rerun()
+    st.progress(job['progress'], text=f"Generazione scheda tecnica... {job['messaggio']}")
+
+def pdf_report_panel(project, fname):
+    key = export_key("pdf_report", project); job = job_manager.get(key)
+    if job is None or job['stato'] == "errore":
+        if job is not None: st.error(f"Errore PDF: {job['errore']}")
+        if not st.button("⚙️ PREPARA SCHEDA TECNICA PDF", use_container_width=True): return
+        job = submit_pdf_report(project, artifact_cache)
+    if job['stato'] == "pronto": st.download_button("📄 SCARICA SCHEDA TECNICA PDF", job['result'], fname, "application/pdf", type="primary", use_container_width=True)
+    else: pdf_job_progress(key)
+
+# --- 5. LOGICA PREVENTIVATORE ---
+@profiler.timed("preventivo")
+def calculate_quote_logic(stats, user_inputs):
+    return calculate_quote(stats, user_inputs, st.session_state.costs_config)
+
+# --- 6. DXF & STL ENGINE ---
+# Generatori DXF/STL in engine/dxf.py e engine/mesh.py, richiamati tramite le cache di engine/pipeline.py
+
+def load_default_if_exists():
+    if 'data_loaded' in st.session_state: return
+    if os.path.exists("default.json"): 
+        try: apply_json_data(json.load(open("default.json")))
+        except: pass
+    st.session_state.data_loaded = True
+def apply_json_data(data):
+    st.session_state['project_name'] = data.get('project_name', 'Progetto')
+    st.session_state['client_name'] = data.get('client_name', '')
+    st.session_state['client_address'] = data.get('client_address', '')
+    st.session_state['finish_wood'] = data.get('finish_wood', 'Rovere Naturale')
+    st.session_state['finish_iron'] = data.get('finish_iron', 'Nero Opaco')
+    set_modules(cols_to_table(data.get('cols', [])[:MAX_MODULES] or [DEFAULT_COL]))
+def set_modules(table):
+    # Nuova tabella di base per l'editor dei moduli: la chiave versionata scarta le modifiche pendenti
+    st.session_state['modules'] = table; st.session_state['mod_ver'] = st.session_state.get('mod_ver', 0) + 1
+def load_user_file(f):
+    if f is None or ('last_loaded_file' in st.session_state and st.session_state.last_loaded_file == f.name): return
+    try: apply_json_data(json.load(f)); st.session_state.last_loaded_file = f.name; st.success("Caricato!")
+    except Exception as e: st.error(f"Errore: {e}")
+
+# --- 7. README GENERATOR (MANUALE D'USO) ---
+@st.cache_data
+def generate_readme_html():
+    html_content = f"""
+    <!DOCTYPE html>
+    <html lang="it">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Manuale Utente - Moby Configurator</title>
+        <style>
+            body {{ font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px; }}
+            header {{ text-align: center; border-bottom: 2px solid #eee; padding-bottom: 20px; margin-bottom: 30px; }}
+            h1 {{ color: #2c3e50; margin-bottom: 5px; }}
+            h2 {{ color: #e74c3c; border-left: 5px solid #e74c3c; padding-left: 10px; margin-top: 30px; }}
+            h3 {{ color: #3498db; }}
+            .feature-box {{ background: #f9f9f9; padding: 15px; border-radius: 5px; border: 1px solid #ddd; margin-bottom: 15px; }}
+            code {{ background: #eee; padding: 2px 5px; border-radius: 3px; font-family: monospace; }}
+            .footer {{ text-align: center; margin-top: 50px; font-size: 0.8em; color: #777; }}
+        </style>
+    </head>
+    <body>
+        <header>
+            <h1>MOBY CONFIGURATOR {VERSION}</h1>
+            <p>Manuale d'Uso Completo</p>
+        </header>
+
+        <section>
+            <h2>1. Introduzione</h2>
+            <p><strong>Moby Configurator</strong> è lo strumento aziendale per la progettazione, preventivazione e produzione delle librerie modulari. 
+            Permette di disegnare strutture su misura, calcolare i costi in tempo reale, generare schede tecniche per l'officina e preventivi commerciali per il cliente.</p>
+        </section>
+
+        <section>
+            <h2>2. Sidebar (Barra Laterale)</h2>
+            <p>Qui si definiscono i parametri geometrici e di progetto.</p>
+            <div class="feature-box">
+                <h3>Gestione File</h3>
+                <ul>
+                    <li><strong>Carica JSON:</strong> Ripristina un progetto salvato in precedenza.</li>
+                    <li><strong>Download JSON:</strong> (In fondo alla sidebar) Salva il lavoro corrente per modificarlo dopo.</li>
+                    <li><strong>Download STL:</strong> Scarica il file 3D grezzo.</li>
+                </ul>
+            </div>
+            <div class="feature-box">
+                <h3>Configurazione Moduli</h3>
+                <p>I moduli (da 1 a {MAX_MODULES}) si modificano in un'unica tabella, una riga per modulo (A, B, ... Z, AA, AB, ...). Per ogni modulo puoi definire:</p>
+                <ul>
+                    <li><strong>L (Larghezza):</strong> Larghezza della mensola (es. 60, 90 cm).</li>
+                    <li><strong>P (Profondità):</strong> Profondità della struttura.</li>
+                    <li><strong>H (Altezza):</strong> Altezza totale del montante in ferro.</li>
+                    <li><strong>N. Mensole:</strong> Numero di ripiani.</li>
+                    <li><strong>Man. + Quote Mensole:</strong> Se attivato, le altezze da terra delle mensole si scrivono nella colonna Quote, separate da virgola (es. 0, 40, 80).</li>
+                    <li><strong>Copia / Modifica Intervallo:</strong> Duplica un modulo più volte oppure applica la stessa misura a un intervallo di moduli (es. da C a M).</li>
+                    <li><strong>Verifiche:</strong> Sotto l'editor compaiono mensole sovrapposte o fuori dal montante, fori troppo vicini tra loro o al bordo e mensole con freccia oltre il limite (carico e legno si impostano nel Preventivatore, "Verifica Mensole").</li>
+                </ul>
+            </div>
+        </section>
+
+        <section>
+            <h2>3. Tab 1: Visualizzazione 3D</h2>
+            <p>Anteprima in tempo reale della struttura. Usa il mouse per ruotare, zoomare e spostare la vista.</p>
+        </section>
+
+        <section>
+            <h2>4. Tab 2: Esecutivi Produzione</h2>
+            <p>Area tecnica dedicata all'officina.</p>
+            <div class="feature-box">
+                <h3>Funzionalità Chiave</h3>
+                <ul>
+                    <li><strong>Distinta Materiali:</strong> Calcolo automatico kg ferro, kg legno e numero viti.</li>
+                    <li><strong>PDF Scheda Tecnica:</strong> Documento completo con:
+                        <ul>
+                            <li>Prospetto Frontale (Muto e Quotato).</li>
+                            <li>Pianta dall'alto.</li>
+                            <li>Dettaglio singolo modulo (Viste Frontale/Laterale con quote fori).</li>
+                            <li>Esecutivi di taglio per il laser.</li>
+                        </ul>
+                    </li>
+                    <li><strong>DXF Export:</strong> Scarica i file vettoriali per il taglio laser (tutti insieme o pezzo per pezzo).</li>
+                </ul>
+            </div>
+        </section>
+
+        <section>
+            <h2>5. Tab 3: Preventivatore & Commerciale</h2>
+            <p>Area gestionale per calcolare prezzi e stampare offerte.</p>
+            <div class="feature-box">
+                <h3>Gestione Costi & Magazzino</h3>
+                <ul>
+                    <li><strong>Loader Costi:</strong> Carica un file <code>.json</code> con il listino prezzi aggiornato.</li>
+                    <li><strong>Magazzino:</strong> Spunta "Ferro/Legno Disponibile" per abbattere i tempi di consegna.</li>
+                    <li><strong>Logistica:</strong> Scegli tra Corriere (costo spedizione) o Montaggio interno (calcolo ore/operai).</li>
+                </ul>
+            </div>
+            <div class="feature-box">
+                <h3>Economia</h3>
+                <ul>
+                    <li><strong>Costo Vivo:</strong> Quanto costa all'azienda produrre il pezzo (Materiali + Lavoro + Imballo).</li>
+                    <li><strong>Prezzo Vendita:</strong> Calcolato aggiungendo il <strong>Markup %</strong> al costo vivo.</li>
+                    <li><strong>Ricerca Progetto:</strong> Indica la larghezza della parete, le larghezze standard, i limiti di altezza e di interasse delle mensole: il configuratore valuta tutte le combinazioni di moduli e propone le migliori per prezzo, costo, scarto tavole o consegna. Un clic carica il layout scelto nel configuratore.</li>
+                </ul>
+            </div>
+            <div class="feature-box">
+                <h3>PDF Preventivo</h3>
+                <p>Genera un documento elegante per il cliente con:</p>
+                <ul>
+                    <li>Intestazione Vontree.</li>
+                    <li>Disegno quotato della libreria.</li>
+                    <li>Tabella prezzi chiara (Imponibile + IVA).</li>
+                    <li>Condizioni di pagamento e note personalizzate.</li>
+                </ul>
+            </div>
+        </section>
+
+        <div class="footer">
+            <p>{COPYRIGHT} | Generato automaticamente da Moby Configurator</p>
+        </div>
+    </body>
+    </html>
+    """
+    return html_content
+# --- 8. SIDEBAR ---
+MODULE_LABELS = {"w": "L", "h": "H", "d": "P", "r": "N. Mensole"}
+MODULE_COLUMNS = {
+    "mod": st.column_config.TextColumn("Mod.", disabled=True, width="small"),
+    **{k: st.column_config.NumberColumn(MODULE_LABELS[k], min_value=lo, max_value=hi, step=1, default=DEFAULT_COL[k], required=True, width="small") for k, (lo, hi) in MODULE_LIMITS.items()},
+    "manual": st.column_config.CheckboxColumn("Man.", default=False, help="Altezze mensole manuali", width="small"),
+    "quote": st.column_config.TextColumn("Quote Mensole (cm)", help="Altezze da terra separate da virgola, es. 0, 40, 80 (solo con Man.)"),
+}
+load_default_if_exists()
+# Progetto scelto nell'archivio: applicato prima che i widget della sidebar vengano creati
+if 'archive_load' in st.session_state:
+    apply_json_data(st.session_state.pop('archive_load')); st.session_state.pop('project_name_input', None)
+with st.sidebar, span("sidebar"):
+    try: st.image("logo.png", width=200) 
+    except: st.markdown("## MOBY")
+    st.markdown("### MOBY CONFIGURATOR")
+    st.caption(COPYRIGHT)
+    st.divider()
+    if 'project_name' not in st.session_state: st.session_state['project_name'] = "Progetto"
+    st.text_input("Nome Progetto", key='project_name_input', value=st.session_state['project_name'])
+    st.session_state['project_name'] = clean_filename(st.session_state['project_name_input'])
+    f = st.file_uploader("Carica JSON", type=["json"]); 
+    if f: load_user_file(f)
+    st.divider()
+    st.markdown("#### Dati Cliente")
+    if 'client_name' not in st.session_state: st.session_state['client_name'] = ""
+    st.text_input("Ragione Sociale / Nome", key='client_name')
+    if 'client_address' not in st.session_state: st.session_state['client_address'] = ""
+    st.text_input("Indirizzo / Città", key='client_address')
+    st.markdown("#### Finiture")
+    if 'finish_wood' not in st.session_state: st.session_state['finish_wood'] = "Rovere Naturale"
+    st.text_input("Finitura Legno", key='finish_wood')
+    if 'finish_iron' not in st.session_state: st.session_state['finish_iron'] = "Nero Opaco"
+    st.text_input("Finitura Ferro", key='finish_iron')
+    st.divider()
+    st.header("📐 Moduli")
+    # Un solo editor tabellare per tutti i moduli (una riga per modulo): widget e tempi non crescono col numero di moduli
+    with span("moduli"):
+        if 'modules' not in st.session_state: set_modules(cols_to_table([DEFAULT_COL] * 2))
+        base = st.session_state['modules']
+        edited = st.data_editor(
+            dict(mod=[module_letter(i) for i in range(len(base['w']))], **base), key=f"mod_editor_{st.session_state['mod_ver']}",
+            num_rows="dynamic", hide_index=True, width="stretch", column_config=MODULE_COLUMNS)
+        cols_input, errors = table_to_cols(edited)
+        for e in errors: st.warning(e)
+        if len(edited['w']) > MAX_MODULES: st.warning(f"Massimo {MAX_MODULES} moduli: i successivi sono ignorati")
+        if not cols_input: st.warning("Serve almeno un modulo"); cols_input = [dict(DEFAULT_COL)]
+        table = cols_to_table(cols_input); letters = [module_letter(i) for i in range(len(cols_input))]
+    with st.expander("🧰 Copia / Modifica Intervallo"):
+        c1, c2 = st.columns(2)
+        src = c1.selectbox("Modulo", range(len(letters)), format_func=letters.__getitem__, key="copy_src")
+        n_copy = c2.number_input("Copie", 1, MAX_MODULES, 1, key="copy_count")
+        if st.button("📋 Copia Modulo", width="stretch", disabled=len(letters) >= MAX_MODULES):
+            set_modules(copy_modules(table, src, min(n_copy, MAX_MODULES - len(letters)))); st.rerun()
+        c3, c4 = st.columns(2)
+        r_from = c3.selectbox("Da", range(len(letters)), format_func=letters.__getitem__, key="range_from")
+        r_to = c4.selectbox("A", range(len(letters)), index=len(letters) - 1, format_func=letters.__getitem__, key=f"range_to_{len(letters)}")
+        c5, c6 = st.columns(2)
+        field = c5.selectbox("Campo", list(MODULE_LIMITS), format_func=MODULE_LABELS.get, key="range_field")
+        lo, hi = MODULE_LIMITS[field]
+        value = c6.number_input("Valore", lo, hi, min(max(DEFAULT_COL[field], lo), hi), key=f"range_value_{field}")
+        if st.button("✏️ Applica all'Intervallo", width="stretch"):
+            set_modules(set_range(table, min(r_from, r_to), max(r_from, r_to), field, value)); st.rerun()
+    
+    # Da qui in poi tutto passa dal motore: ogni stadio viene ricalcolato solo se i suoi input cambiano
+    prj = st.session_state['project_name']
+    project = normalize_project({"project_name": prj, "cols": cols_input, "client_name": st.session_state['client_name'], "client_address": st.session_state['client_address'], "finish_wood": st.session_state['finish_wood'], "finish_iron": st.session_state['finish_iron']})
+    geo = get_geometry(project)
+    # Mensole sovrapposte o fuori dal montante, fori troppo vicini, freccia oltre il limite: a ogni rerun
+    checks = get_validation(project, st.session_state.costs_config)
+    if checks['violazioni']:
+        with st.expander(f"⚠️ Verifiche: {checks['errori']} errori, {checks['avvisi']} avvisi", expanded=checks['errori'] > 0):
+            st.dataframe(validation_table(checks), hide_index=True, width="stretch")
+    
+    st.divider(); st.header("SALVA / ESPORTA"); ts = get_timestamp_string(); fname_json = f"{prj}_{ts}.json"; fname_stl = f"{prj}_{ts}.stl"
+    c1, c2 = st.columns(2)
+    c1.download_button("💾 JSON", project_to_json(project), fname_json, "application/json")
+    c2.download_button("🧊 STL", lambda: get_stl(project, artifact_cache), fname_stl, "application/octet-stream")
+    c3, c4 = st.columns(2)
+    c3.download_button("🧩 3MF", lambda: get_3mf_model(project, artifact_cache), f"{prj}_{ts}.3mf", "model/3mf")
+    c4.download_button("🌐 GLB", lambda: get_glb_model(project, artifact_cache), f"{prj}_{ts}.glb", "model/gltf-binary")
+    st.divider(); st.caption(VERSION)
+
+# --- 9. TABS MAIN & MANUAL BUTTON ---
+# PULSANTE MANUALE (TOP PAGE)
+st.download_button("📘 SCARICA MANUALE D'USO", generate_readme_html, "Manuale_Moby.html", "text/html", help="Clicca per scaricare la guida completa alle funzionalità")
+
+tab_names = ["🎥 3D Config", "🏭 ESECUTIVI PRODUZIONE", "💰 PREVENTIVATORE", "🗄️ ARCHIVIO"] + (["⏱️ PROFILAZIONE"] if is_admin() else [])
+tab1, tab2, tab3, tab4, *tab_admin = st.tabs(tab_names)
+
+with tab1, span("tab 3D"):
+    st.plotly_chart(get_figure(project), width="stretch")
+
+with tab2, span("tab produzione"):
+    st.markdown(f"### Distinta Materiali - {prj}")
+    stats = get_stats(project); num_viti = stats['viti']
+    distinta_legno_pdf, distinta_ferro_pdf = get_bom(project)
+    
+    c_info1, c_info2, c_info3, c_info4 = st.columns(4)
+    c_info1.metric("Peso Totale", f"{stats['peso_tot']:.1f} kg"); c_info2.metric("Peso Ferro", f"{stats['peso_ferro']:.1f} kg")
+    c_info3.metric("Peso Legno", f"{stats['peso_legno']:.1f} kg"); c_info4.metric("Viteria", f"{num_viti} pz")
+    fname_pdf = f"{prj}_{ts}_SchedaTecnica.pdf"
+    pdf_report_panel(project, fname_pdf)
+    
+    st.divider(); c_sx, c_dx = st.columns(2)
+    with c_sx: st.subheader("🌲 Distinta Legno"); st.dataframe(distinta_legno_pdf, hide_index=True, use_container_width=True)
+    with c_dx: st.subheader("⛓️ Distinta Ferro"); st.dataframe(distinta_ferro_pdf, hide_index=True, use_container_width=True)
+    wood_plan = get_wood_plan([project], st.session_state.costs_config)
+    with st.expander(f"🪵 Piano di Taglio Legno — {wood_plan['n_tavole']} tavole, {wood_plan['tagli']} tagli, {wood_plan['mq_tavole']:.2f} mq"):
+        if wood_plan['fuori_misura']: st.warning(f"Mensole fuori misura rispetto alle tavole disponibili: {len(wood_plan['fuori_misura'])}")
+        st.dataframe(plan_table(wood_plan), hide_index=True, use_container_width=True)
+    st.divider(); st.subheader("📦 Esecutivi Taglio (Anteprima Completa)")
+    fname_dxf_full = f"{prj}_{ts}_Tutto.dxf"; dxf_full = lambda: get_full_dxf(project, artifact_cache)
+    st.download_button("📦 SCARICA DXF UNICO", dxf_full, fname_dxf_full, "application/dxf", type="primary", use_container_width=True)
+    st.write("##")
+    
+    st.plotly_chart(get_cut_preview(project), width="stretch")
+    with st.expander("📂 Scarica DXF Pezzi Singoli"):
+        for idx, pt in enumerate(geo['part_types']):
+            c_name, c_down = st.columns([4, 1]); c_name.write(f"**{pt['code']}** ×{pt['qty']} ({pt['h']}x{pt['w']} cm) — {', '.join(pt['labels'])}")
+            c_down.download_button("⬇️ DXF", lambda idx=idx: get_single_dxf(project, idx, artifact_cache), f"{prj}_{pt['code']}.dxf", "application/dxf", key=f"dxf_{idx}")
+    toolpaths = get_toolpaths(project)
+    with st.expander(f"⏱️ Percorsi Utensile — {sum(tp['tempo_s'] * pt['qty'] for pt, tp in zip(geo['part_types'], toolpaths)) / 60.0:.1f} min macchina"):
+        st.dataframe([{"Pezzo": pt['code'], "Quantità": pt['qty'], "Fori": len(pt['holes']), "Corsa Vuoto Orig. (cm)": tp['corsa_vuoto_iniziale'], "Corsa Vuoto Ott. (cm)": tp['corsa_vuoto'],
+                       "Risparmio %": (1 - tp['corsa_vuoto'] / tp['corsa_vuoto_iniziale']) * 100.0 if tp['corsa_vuoto_iniziale'] else 0.0, "Tempo/Pezzo (min)": tp['tempo_s'] / 60.0, "Tempo Tot. (min)": tp['tempo_s'] * pt['qty'] / 60.0}
+                      for pt, tp in zip(geo['part_types'], toolpaths)], hide_index=True, use_container_width=True)
+    with st.expander("🔩 Nesting Lamiere (Laser)"):
+        c_n1, c_n2, c_n3, c_n4, c_n5 = st.columns(5)
+        sheet_cfg = {"lamiera_l": c_n1.number_input("Lamiera L (cm)", 50.0, 600.0, DEFAULT_SHEET['lamiera_l']), "lamiera_h": c_n2.number_input("Lamiera H (cm)", 50.0, 300.0, DEFAULT_SHEET['lamiera_h']),
+                     "kerf": c_n3.number_input("Kerf (cm)", 0.0, 2.0, DEFAULT_SHEET['kerf']), "margine": c_n4.number_input("Margine (cm)", 0.0, 10.0, DEFAULT_SHEET['margine'])}
+        nest_budget = c_n5.number_input("Ottimizzazione (s)", 0.0, 10.0, 0.2, step=0.1)
+        extra_files = st.file_uploader("Aggiungi progetti salvati (JSON)", type=["json"], accept_multiple_files=True, key="nest_extra")
+        nest_projects_list = [project]
+        for ef in extra_files or []:
+            try: nest_projects_list.append(normalize_project(json.load(ef)))
+            except Exception as e: st.error(f"{ef.name}: {e}")
+        nest = get_nesting(nest_projects_list, sheet_cfg, nest_budget)
+        c_m1, c_m2, c_m3 = st.columns(3)
+        c_m1.metric("Fogli", nest['fogli']); c_m2.metric("Utilizzo Medio", f"{nest['utilizzo']*100:.1f} %"); c_m3.metric("Tempo Nesting", f"{nest['tempo_s']*1000:.0f} ms")
+        if nest['oversize']: st.warning(f"Pezzi più grandi del foglio: {', '.join(nest['oversize'])}")
+        st.dataframe(nesting_report(nest), hide_index=True, use_container_width=True)
+        for idx in range(nest['fogli']):
+            c_name, c_down = st.columns([4, 1]); c_name.write(f"**Foglio {idx+1}** — {len(nest['sheets'][idx]['parts'])} pezzi, utilizzo {nest['sheets'][idx]['utilizzo']*100:.1f} %")
+            c_down.download_button("⬇️ DXF", lambda idx=idx: get_sheet_dxf(nest, idx, prj, artifact_cache), f"{prj}_{ts}_Foglio{idx+1}.dxf", "application/dxf", key=f"dxf_sheet_{idx}")
+        st.download_button("🗜️ ZIP DXF PRODUZIONE (tutti i progetti + fogli)", lambda: get_dxf_bundle(nest_projects_list, nest, artifact_cache), f"{prj}_{ts}_DXF.zip", "application/zip", use_container_width=True)
+    st.download_button("🗜️ PACCHETTO PRODUZIONE (PDF + DXF + Fogli + STL + JSON)", lambda: get_production_package(project, sheet_cfg, nest_budget, artifact_cache), f"{prj}_{ts}_Produzione.zip", "application/zip", type="primary", use_container_width=True)
+
+with tab3, span("tab preventivo"):
+    st.header("💰 Preventivatore & Commerciale")
+    uploaded_costs = st.file_uploader("Carica Configurazione Prezzi (.json)", type=["json"])
+    if uploaded_costs is not None:
+        try: st.session_state.costs_config.update(json.load(uploaded_costs)); st.success("Listino prezzi aggiornato!")
+        except: st.error("File non valido")
+    st.divider()
+    c_set1, c_set2, c_set3 = st.columns(3)
+    with c_set1:
+        st.subheader("1. Magazzino")
+        date_start = st.date_input("Data Conferma", datetime.now())
+        stock_iron = st.checkbox("Ferro Disponibile?", value=False)
+        stock_wood = st.checkbox("Legno Disponibile?", value=False)
+    with c_set2:
+        st.subheader("2. Logistica")
+        log_type = st.radio("Metodo Consegna", ["Corriere", "Nostro Montaggio"])
+        costo_corriere = 0.0; gg_viaggio_corr = 0; ore_viaggio = 0.0; ore_montaggio = 0.0; num_op = 2
+        if log_type == "Corriere":
+            costo_corriere = st.number_input("Costo Spedizione €", 0.0, 2000.0, 150.0)
+            gg_viaggio_corr = st.number_input("GG Viaggio", 1, 15, 2)
+        else:
+            ore_viaggio = st.number_input("Ore Viaggio (A/R)", 0.0, 20.0, 2.0)
+            ore_montaggio = st.number_input("Ore Montaggio", 0.0, 50.0, 4.0)
+            num_op = st.number_input("Operai", 1, 5, 2)
+    with c_set3:
+        st.subheader("3. Dati Preventivo")
+        client_piva = st.text_input("P.IVA Cliente")
+        pay_list = load_payments_list()
+        pay_choice = st.selectbox("Modalità Pagamento", pay_list)
+        pay_text = pay_choice
+        if "Altro" in pay_choice: pay_text = st.text_input("Specificare Pagamento", "")
+        notes = st.text_area("Note Preventivo (Opzionale)")
+        priority = st.selectbox("Priorità Produzione", [0, 1, 2], 1, format_func=lambda p: ["Urgente", "Normale", "Bassa"][p])
+    st.write("---")
+    with st.expander("🛠️ Costi Materiali e Ricarico", expanded=True):
+        c1, c2, c3, c4 = st.columns(4)
+        st.session_state.costs_config['costo_ferro_kg'] = c1.number_input("Ferro (€/kg)", value=st.session_state.costs_config.get('costo_ferro_kg', 0.0))
+        st.session_state.costs_config['costo_legno_mq'] = c2.number_input("Legno (€/mq)", value=st.session_state.costs_config.get('costo_legno_mq', 0.0))
+        st.session_state.costs_config['costo_ora_operaio'] = c3.number_input("Operaio (€/h)", value=st.session_state.costs_config.get('costo_ora_operaio', 0.0))
+        st.session_state.costs_config['markup_percent'] = c4.number_input("Ricarico %", value=st.session_state.costs_config.get('markup_percent', 30.0), step=5.0)
+    with st.expander("⏱️ Tempi (Giorni)", expanded=False):
+        c1, c2, c3, c4 = st.columns(4)
+        st.session_state.costs_config['gg_ordine_ferro'] = c1.number_input("Ordine Ferro", value=st.session_state.costs_config.get('gg_ordine_ferro', 1))
+        st.session_state.costs_config['gg_arrivo_lastra'] = c2.number_input("Arrivo Ferro", value=st.session_state.costs_config.get('gg_arrivo_lastra', 5))
+        st.session_state.costs_config['gg_ordine_legno'] = c3.number_input("Ordine Legno", value=st.session_state.costs_config.get('gg_ordine_legno', 1)) 
+        st.session_state.costs_config['gg_arrivo_legno'] = c4.number_input("Arrivo Legno", value=st.session_state.costs_config.get('gg_arrivo_legno', 5)) 
+    with st.expander("🔨 Lavorazioni (Minuti)", expanded=False):
+        c1, c2 = st.columns(2)
+        st.session_state.costs_config['min_taglio_legno_pezzo'] = c1.number_input("Taglio (min/pz)", value=st.session_state.costs_config.get('min_taglio_legno_pezzo', 5.0))
+        st.session_state.costs_config['min_colore_legno_metro'] = c2.number_input("Colore (min/m)", value=st.session_state.costs_config.get('min_colore_legno_metro', 15.0))
+        c3, c4, c5 = st.columns(3)
+        st.session_state.costs_config['min_preassemblaggio_modulo'] = c3.number_input("Pre-ass Modulo (min/mod)", value=st.session_state.costs_config.get('min_preassemblaggio_modulo', 30.0))
+        st.session_state.costs_config['min_preassemblaggio_mensola'] = c4.number_input("Pre-ass Mensola (min/pz)", value=st.session_state.costs_config.get('min_preassemblaggio_mensola', 5.0))
+        st.session_state.costs_config['min_assemblaggio_finale_modulo'] = c5.number_input("Ass. Finale (min/mod)", value=st.session_state.costs_config.get('min_assemblaggio_finale_modulo', 30.0))
+    with st.expander("🏭 Capacità Reparti (Ore/Giorno)", expanded=False):
+        cols_cap = st.columns(len(RESOURCES) + 1)
+        for c, res in zip(cols_cap, RESOURCES): st.session_state.costs_config[f'ore_giorno_{res}'] = c.number_input(RESOURCE_LABELS[res], 0.0, 200.0, float(st.session_state.costs_config.get(f'ore_giorno_{res}', DEFAULT_COSTS[f'ore_giorno_{res}'])))
+        st.session_state.costs_config['giorni_lavorativi_settimana'] = cols_cap[-1].number_input("Giorni/Settimana", 1, 7, int(st.session_state.costs_config.get('giorni_lavorativi_settimana', 5)))
+    with st.expander("🪵 Tavole Legno (Magazzino)", expanded=False):
+        c1, c2, c3 = st.columns(3)
+        fmt_list = lambda key: ", ".join(f"{x:g}" for x in st.session_state.costs_config.get(key, DEFAULT_COSTS[key]))
+        try:
+            st.session_state.costs_config['tavole_lunghezze'] = [float(x) for x in c1.text_input("Lunghezze (cm)", fmt_list('tavole_lunghezze')).split(",") if x.strip()]
+            st.session_state.costs_config['tavole_larghezze'] = [float(x) for x in c2.text_input("Larghezze (cm)", fmt_list('tavole_larghezze')).split(",") if x.strip()]
+        except ValueError: st.error("Inserire numeri separati da virgola")
+        st.session_state.costs_config['kerf_legno'] = c3.number_input("Kerf Lama (cm)", 0.0, 2.0, float(st.session_state.costs_config.get('kerf_legno', DEFAULT_COSTS['kerf_legno'])))
+    with st.expander("🏗️ Verifica Mensole (Carico)", expanded=False):
+        c1, c2, c3 = st.columns(3)
+        st.session_state.costs_config['carico_mensola_kg_m2'] = c1.number_input("Carico (kg/m²)", 0.0, 2000.0, float(st.session_state.costs_config.get('carico_mensola_kg_m2', DEFAULT_COSTS['carico_mensola_kg_m2'])))
+        st.session_state.costs_config['modulo_elastico_legno'] = c2.number_input("Modulo Elastico Legno (N/mm²)", 1000.0, 20000.0, float(st.session_state.costs_config.get('modulo_elastico_legno', DEFAULT_COSTS['modulo_elastico_legno'])))
+        st.session_state.costs_config['freccia_limite'] = c3.number_input("Freccia Max (luce / N)", 50.0, 1000.0, float(st.session_state.costs_config.get('freccia_limite', DEFAULT_COSTS['freccia_limite'])))
+        sag = get_validation(project, st.session_state.costs_config); worst = int((sag['freccia_mm'] / sag['freccia_limite_mm']).argmax())
+        st.caption(f"Freccia massima: modulo {geo['cols'][worst]['letter']}, {sag['freccia_mm'][worst]:.1f} mm su un limite di {sag['freccia_limite_mm'][worst]:.1f} mm")
+    
+    # Tavole e tagli reali dal piano di taglio: entrano nel costo legno e nei minuti di taglio
+    stats_calc = get_quote_stats(project, st.session_state.costs_config)
+    user_inputs = {
+        "start_date": date_start, "stock_iron": stock_iron, "stock_wood": stock_wood, "logistics_type": log_type.lower().replace(" ", "_"),
+        "costo_corriere": costo_corriere, "gg_viaggio_corriere": gg_viaggio_corr, "ore_viaggio": ore_viaggio, "ore_montaggio": ore_montaggio, "num_operai": num_op, "num_cols": project['num_colonne']
+    }
+    totals = calculate_quote_logic(stats_calc, user_inputs)
+    # Consegna realistica: il nuovo ordine entra nella coda di produzione con le capacita' dei reparti
+    order_new = order_from_quote(project, stats_calc, user_inputs, st.session_state.costs_config, f"{prj}_{ts}", priority)
+    orders_queue = load_orders(); plan = None; delivery_formula = totals['delivery_date']
+    try:
+        order_plan, plan = plan_delivery(orders_queue, order_new, st.session_state.costs_config, date_start)
+        totals = dict(totals, delivery_date=order_plan['consegna'].strftime("%d/%m/%Y"), days_total=order_plan['giorni'])
+    except ValueError as e: st.warning(f"Pianificazione non disponibile: {e}")
+    
+    st.divider()
+    col_res1, col_res2, col_res3 = st.columns(3)
+    col_res1.metric("🔴 COSTO VIVO (Interno)", f"€ {totals['costo_vivo']:.2f}")
+    col_res2.metric("🟢 PREZZO VENDITA (Ivato)", f"€ {totals['price_total']:.2f}", f"+{st.session_state.costs_config['markup_percent']}% Ricarico")
+    col_res3.info(f"📅 Consegna: {totals['delivery_date']} ({totals['days_total']} gg lav.)")
+    st.caption(f"Imponibile: € {totals['price_ex_vat']:.2f} | IVA: € {totals['vat']:.2f}" + (f" | Consegna senza coda: {delivery_formula} ({len(orders_queue)} ordini in produzione)" if plan else ""))
+    if plan:
+        with st.expander(f"🏭 Coda Produzione ({len(orders_queue)} ordini) — ripianificata in {plan['tempo_s']*1000:.0f} ms", expanded=False):
+            st.dataframe(load_table(plan), hide_index=True, use_container_width=True)
+            st.dataframe(schedule_table(plan), hide_index=True, use_container_width=True)
+            c_q1, c_q2 = st.columns(2)
+            if c_q1.button("✅ Conferma Ordine (aggiungi alla coda)", use_container_width=True):
+                update_orders(lambda q: [o for o in q if o['id'] != order_new['id']] + [order_new]); st.rerun()
+            to_remove = c_q2.multiselect("Ordini consegnati / annullati", [o['id'] for o in orders_queue])
+            if to_remove and c_q2.button("🗑️ Rimuovi dalla coda", use_container_width=True):
+                update_orders(lambda q: [o for o in q if o['id'] not in to_remove]); st.rerun()
+    with st.expander("📈 Analisi What-If (Prezzo / Margine / Consegna)", expanded=False):
+        # Tutta la griglia in un solo calcolo vettoriale: nessun rerun per punto
+        fmt_param = lambda k: SWEEP_PARAMS[k][0]
+        axes = []
+        for n_ax, default in ((1, "markup_percent"), (2, "costo_ora_operaio")):
+            if n_ax == 2 and not st.checkbox("Secondo parametro (superficie)", key="sweep_2d"): break
+            c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+            par = c1.selectbox(f"Parametro {n_ax}", list(SWEEP_PARAMS), list(SWEEP_PARAMS).index(default), format_func=fmt_param, key=f"sweep_p{n_ax}")
+            lo = c2.number_input("Da", value=SWEEP_PARAMS[par][2], key=f"sweep_lo{n_ax}_{par}")
+            hi = c3.number_input("A", value=SWEEP_PARAMS[par][3], key=f"sweep_hi{n_ax}_{par}")
+            steps = c4.number_input("Punti", 2, 200, 41 if n_ax == 1 else 25, key=f"sweep_n{n_ax}")
+            axes.append((par, sweep_values(par, lo, hi, steps)))
+        metric = st.radio("Grandezza", list(SWEEP_METRICS), format_func=lambda k: SWEEP_METRICS[k], horizontal=True, key="sweep_metric")
+        sweep = quote_sweep(project, st.session_state.costs_config, user_inputs, axes)
+        st.plotly_chart(build_sweep_figure(sweep, metric), use_container_width=True)
+        st.caption(f"{sweep[metric].size} scenari valutati con i parametri correnti del preventivo.")
+    with st.expander("🔎 Ricerca Progetto (Larghezza Parete)", expanded=False):
+        # Tutte le pareti di moduli standard con la larghezza richiesta, valutate in blocco con listino e logistica correnti
+        c1, c2, c3, c4 = st.columns(4)
+        ds_target = c1.number_input("Larghezza Tot (cm)", 50.0, 10000.0, float(round(wall_width(geo['cols']), 1)), key="ds_target")
+        ds_tol = c2.number_input("Tolleranza ± (cm)", 0.0, 100.0, 10.0, key="ds_tol")
+        ds_depth = c3.number_input("Profondità (cm)", *map(float, MODULE_LIMITS['d']), float(geo['cols'][0]['d']), key="ds_depth")
+        ds_max = c4.number_input("Moduli Max", 1, MAX_MODULES, 20, key="ds_max")
+        c5, c6, c7, c8 = st.columns(4)
+        ds_widths = c5.text_input("Larghezze Ammesse (cm)", "45, 60, 75, 90, 120", key="ds_widths")
+        ds_h_lo = c6.number_input("Altezza Da (cm)", *map(float, MODULE_LIMITS['h']), 180.0, key="ds_h_lo")
+        ds_h_hi = c7.number_input("Altezza A (cm)", *map(float, MODULE_LIMITS['h']), 260.0, key="ds_h_hi")
+        ds_h_step = c8.number_input("Passo Altezza (cm)", 1.0, 100.0, 10.0, key="ds_h_step")
+        c9, c10, c11, c12 = st.columns(4)
+        ds_sp_lo = c9.number_input("Interasse Mensole Min (cm)", 5.0, 200.0, 25.0, key="ds_sp_lo")
+        ds_sp_hi = c10.number_input("Interasse Mensole Max (cm)", 5.0, 200.0, 45.0, key="ds_sp_hi")
+        ds_top = c11.number_input("Risultati", 1, 50, 10, key="ds_top")
+        ds_metric = c12.selectbox("Ordina per", list(DESIGN_METRICS), format_func=DESIGN_METRICS.get, key="ds_metric")
+        if st.button("🔎 CERCA LAYOUT", use_container_width=True):
+            try:
+                widths_ok = [float(x) for x in ds_widths.split(",") if x.strip()]
+                st.session_state.design_result = design_search(project, st.session_state.costs_config, user_inputs, ds_target, widths_ok, [ds_h_lo + k * ds_h_step for k in range(int((ds_h_hi - ds_h_lo) // ds_h_step) + 1)],
+                                                               (ds_sp_lo, ds_sp_hi), ds_depth, ds_tol, ds_max, ds_top, ds_metric, sheet_cfg)
+            except ValueError as e: st.error(f"Ricerca non valida: {e}")
+        found_ds = st.session_state.get('design_result')
+        if found_ds is not None:
+            st.caption(f"{found_ds['candidati']} pareti candidate, {found_ds['piani_taglio']} piani di taglio, valutate in {found_ds['tempo_s']:.2f} s")
+            if not found_ds['righe']: st.info("Nessuna parete rispetta i vincoli: allargare tolleranza, larghezze o interasse")
+            picked_ds = st.dataframe(found_ds['righe'], hide_index=True, use_container_width=True, on_select="rerun", selection_mode="single-row", key="design_table")
+            if picked_ds.selection.rows and st.button("📂 CARICA LAYOUT NEL CONFIGURATORE", use_container_width=True):
+                st.session_state.archive_load = found_ds['progetti'][picked_ds.selection.rows[0]]; st.rerun()
+    client_full_data = {"name": st.session_state['client_name'], "address": st.session_state['client_address'], "piva": client_piva}
+    pdf_comm = lambda: get_commercial_pdf(project, totals, client_full_data, pay_text, notes, artifact_cache)
+    st.download_button("📄 SCARICA PREVENTIVO CLIENTE (PDF)", pdf_comm, f"Preventivo_{st.session_state['client_name']}.pdf", "application/pdf", type="primary")
+    st.markdown("---")
+    st.download_button("💾 Salva Configurazione Prezzi", json.dumps(st.session_state.costs_config), "tempicosti_default.json", "application/json")
+
+with tab4, span("tab archivio"):
+    st.header("🗄️ Archivio Progetti")
+    archive = get_archive()
+    if st.button("💾 ARCHIVIA PROGETTO + PREVENTIVO CORRENTE", type="primary"):
+        archive.save(project, totals, project_to_json(project)); st.success("Progetto archiviato!")
+    c_f1, c_f2, c_f3, c_f4 = st.columns([2, 1, 1, 1])
+    q_text = c_f1.text_input("Cerca (nome, cliente, indirizzo)")
+    q_fin = c_f2.text_input("Finitura")
+    q_mod = c_f3.number_input("Moduli (0 = tutti)", 0, 500, 0)
+    q_from = c_f4.date_input("Dal", None)
+    c_f5, c_f6, c_f7, c_f8 = st.columns(4)
+    q_wmin = c_f5.number_input("Larghezza min (cm)", 0.0, 10000.0, 0.0)
+    q_wmax = c_f6.number_input("Larghezza max (cm, 0 = nessun limite)", 0.0, 10000.0, 0.0)
+    q_pmin = c_f7.number_input("Prezzo min €", 0.0, 1e7, 0.0)
+    q_pmax = c_f8.number_input("Prezzo max € (0 = nessun limite)", 0.0, 1e7, 0.0)
+    found = archive.search(q_text.strip(), moduli=(q_mod or None, q_mod or None), larghezza=(q_wmin or None, q_wmax or None), prezzo=(q_pmin or None, q_pmax or None), dal=q_from, finitura=q_fin.strip())
+    arch_info = archive.info(); st.caption(f"{len(found)} risultati (max 200) su {arch_info['progetti']} progetti e {arch_info['preventivi']} preventivi archiviati")
+    picked = st.dataframe(found, hide_index=True, use_container_width=True, on_select="rerun", selection_mode="single-row", key="archive_table")
+    if picked.selection.rows:
+        sel = found[picked.selection.rows[0]]
+        st.subheader(f"{sel['nome']} — {sel['cliente'] or 'senza cliente'}")
+        quotes_hist = archive.quotes(sel['id'])
+        if quotes_hist: st.dataframe(quotes_hist, hide_index=True, use_container_width=True)
+        c_l1, c_l2 = st.columns(2)
+        if c_l1.button("📂 CARICA NEL CONFIGURATORE", use_container_width=True):
+            st.session_state.archive_load = archive.load(sel['id']); st.rerun()
+        if c_l2.button("🗑️ Elimina dall'Archivio", use_container_width=True):
+            archive.delete(sel['id']); st.rerun()
+
+# --- 10. PROFILAZIONE (ADMIN) ---
+# I rerun di tutte le sessioni del processo, dal piu' recente; il rerun in corso compare dal successivo
+if tab_admin:
+    with tab_admin[0]:
+        st.header("⏱️ Tempi per Stadio")
+        st.caption(f"cProfile per rerun: {os.environ.get(PROFILE_ENV) or f'disattivato (imposta {PROFILE_ENV}=cartella)'} — "
+                   f"Export JSON-lines: {os.environ.get(TIMINGS_ENV) or f'disattivato (imposta {TIMINGS_ENV}=file.jsonl)'}")
+        c_p1, c_p2 = st.columns([3, 1])
+        n_runs = c_p1.slider("Ultimi record", 5, 100, 20)
+        if c_p2.button("🧹 Svuota", use_container_width=True): profiler.clear()
+        records = profiler.records(n_runs)
+        if records:
+            st.dataframe(records_table(records), hide_index=True, use_container_width=True)
+            rec = st.selectbox("Dettaglio", records, format_func=lambda r: f"#{r['seq']} {r['label']} {r['inizio'][11:19]} — {r['totale_ms']:.0f} ms")
+            st.plotly_chart(build_flame_figure(rec), use_container_width=True)
+            st.subheader("Stadi (tutti i record mostrati)")
+            st.dataframe(span_summary(records), hide_index=True, use_container_width=True)
+        else: st.info("Nessun rerun registrato.")
+        st.caption(f"Cache stadi: {stage_cache.info()} — Cache moduli: {module_cache.info()}")
+        st.caption(f"Archivio artefatti ({get_artifact_store().path}): {get_artifact_store().info()} — Cache della sessione: {artifact_cache.info()}")
+
+profiler.finish(rerun_prof)
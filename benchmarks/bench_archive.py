@@ -0,0 +1,56 @@
+# --- BENCHMARK ARCHIVIO PROGETTI ---
+# Popola un archivio SQLite temporaneo con progetti sintetici, misura le ricerche tipiche e la
+# scrittura concorrente da piu' thread (come piu' sessioni Streamlit). Esce con 1 se una ricerca supera --soglia-ms.
+# Uso: python benchmarks/bench_archive.py [--progetti 30000] [--thread 4] [--soglia-ms 50]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.archive import ProjectArchive
+
+CLIENTI = ["Rossi", "Bianchi", "Verdi", "Studio Nord", "Libreria Centrale", "Hotel Lago", "Negozio Blu", "Ferri"]
+FINITURE = ["Rovere Naturale", "Noce", "Bianco", "Nero Opaco", "Corten"]
+
+def synthetic_project(rng, i):
+    cols = [{"w": rng.choice([60, 90, 120]), "h": rng.choice([60, 120, 200, 280]), "d": rng.choice([25, 30, 45]), "r": rng.randint(2, 8)} for _ in range(rng.randint(1, 8))]
+    return {"project_name": f"{rng.choice(['Opener', 'Shelf', 'Wall', 'Lib'])}{i}", "client_name": f"{rng.choice(CLIENTI)} {i % 500}", "cols": cols,
+            "finish_wood": rng.choice(FINITURE[:3]), "finish_iron": rng.choice(FINITURE[3:])}
+
+def totals_for(rng):
+    p = rng.uniform(500, 20000); return {"price_total": p * 1.22, "price_ex_vat": p, "costo_vivo": p / 1.3, "delivery_date": "01/12/2026"}
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--progetti", type=int, default=30000); ap.add_argument("--thread", type=int, default=4); ap.add_argument("--soglia-ms", type=float, default=50.0)
+    args = ap.parse_args(); rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ProjectArchive(os.path.join(tmp, "archivio.sqlite"))
+        t0 = time.perf_counter()
+        for i in range(args.progetti): archive.save(synthetic_project(rng, i), totals_for(rng))
+        dt = time.perf_counter() - t0; print(f"inserimento: {args.progetti} progetti in {dt:.1f} s ({args.progetti / dt:.0f}/s)")
+        queries = {"cliente": dict(text="Libreria"), "3 moduli": dict(moduli=(3, 3)), "larghezza 180-250": dict(larghezza=(180, 250)),
+                   "prezzo + finitura": dict(prezzo=(5000, 8000), finitura="Noce"), "combinata": dict(text="Opener", moduli=(3, 3), altezza=(None, 120)), "ultimi": dict()}
+        slow = False
+        for name, q in queries.items():
+            times = []
+            for _ in range(5): t = time.perf_counter(); rows = archive.search(**q); times.append((time.perf_counter() - t) * 1000)
+            slow |= min(times) > args.soglia_ms; print(f"ricerca {name:<20} {len(rows):>4} righe  {min(times):6.1f} ms")
+        t = time.perf_counter(); archive.load(rows[0]['id']); archive.quotes(rows[0]['id']); print(f"caricamento: {(time.perf_counter() - t) * 1000:.2f} ms")
+        errors = []
+        def writer(k):
+            local = random.Random(k)
+            try:
+                for i in range(200): archive.save(synthetic_project(local, 10**6 * (k + 1) + i), totals_for(local))
+            except Exception as e: errors.append(e)
+        t = time.perf_counter(); threads = [threading.Thread(target=writer, args=(k,)) for k in range(args.thread)]
+        for th in threads: th.start()
+        for th in threads: th.join()
+        print(f"scrittura concorrente: {args.thread} thread x 200 in {time.perf_counter() - t:.2f} s, errori: {len(errors)}, totale {archive.info()}")
+    return 1 if slow or errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
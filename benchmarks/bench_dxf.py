@@ -0,0 +1,45 @@
+# --- BENCHMARK DXF: EZDXF vs STREAMING ---
+# Confronta tempi e dimensioni dei due writer. Che producano le stesse entita' (tipo, layer, coordinate, testi)
+# lo verifica tests/test_dxf_stream.py.
+# Uso: python benchmarks/bench_dxf.py [--moduli 10 50 200] [--ripetizioni 3]
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import normalize_project, build_geometry, nesting_items, nest_parts, generate_full_dxf, generate_sheet_dxf, stream_full_dxf, stream_sheet_dxf, stream_dxf_zip
+
+def synthetic_project(n_modules, seed=0):
+    rng = random.Random(seed)
+    cols = [{"w": rng.choice([60, 90, 120]), "h": rng.choice([120, 200, 280, 400]), "d": rng.choice([25, 30, 45]), "r": rng.randint(2, 20)} for _ in range(n_modules)]
+    return normalize_project({"project_name": f"Bench{n_modules}", "cols": cols})
+
+def timed(fn, reps):
+    best = None
+    for _ in range(reps):
+        t = time.perf_counter(); out = fn(); dt = time.perf_counter() - t; best = dt if best is None else min(best, dt)
+    return best, out
+
+def stream_to_text(fn, *args):
+    buf = io.StringIO(); fn(buf, *args); return buf.getvalue()
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--moduli", type=int, nargs="+", default=[10, 50, 200]); ap.add_argument("--ripetizioni", type=int, default=3)
+    args = ap.parse_args()
+    print(f"{'moduli':>7} {'export':>8} {'ezdxf ms':>9} {'stream ms':>10} {'x':>6} {'ezdxf KB':>9} {'stream KB':>10}")
+    for n in args.moduli:
+        prj = synthetic_project(n); geo = build_geometry(prj['cols']); name = prj['project_name']
+        nest = nest_parts(nesting_items(geo['part_types'])); sheet = nest['sheets'][0]
+        cases = [("full", lambda: generate_full_dxf(geo['part_types'], name), lambda: stream_to_text(stream_full_dxf, geo['part_types'], name)),
+                 ("foglio", lambda: generate_sheet_dxf(sheet, nest['config'], name), lambda: stream_to_text(stream_sheet_dxf, sheet, nest['config'], name))]
+        for label, ref_fn, fast_fn in cases:
+            t_ref, ref = timed(ref_fn, args.ripetizioni); t_fast, fast = timed(fast_fn, args.ripetizioni)
+            print(f"{n:>7} {label:>8} {t_ref*1000:>9.1f} {t_fast*1000:>10.1f} {t_ref/t_fast:>6.1f} {len(ref)/1024:>9.1f} {len(fast)/1024:>10.1f}")
+        t_zip, _ = timed(lambda: stream_dxf_zip(io.BytesIO(), [(f"{i}.dxf", stream_sheet_dxf, (sh, nest['config'], name)) for i, sh in enumerate(nest['sheets'])]), args.ripetizioni)
+        print(f"{n:>7} {'zip fogli':>8} {'':>9} {t_zip*1000:>10.1f}   ({nest['fogli']} fogli in streaming su ZIP)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# --- BENCHMARK NESTING LAMIERE ---
+# Utilizzo del foglio vs tempo di calcolo, su pareti sintetiche con piastre di altezze/profondita' miste.
+# Uso: python benchmarks/bench_nesting.py [--seed N]
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import normalize_project, build_geometry, nesting_items, nest_parts
+
+def synthetic_items(n_modules, seed):
+    rng = random.Random(seed)
+    cols = [{"w": rng.choice([60, 90, 120]), "h": rng.choice([80, 120, 150, 200, 240, 280]), "d": rng.choice([25, 30, 35, 45]), "r": 4} for _ in range(n_modules)]
+    return nesting_items(build_geometry(normalize_project({"cols": cols})['cols'])['part_types'])
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--seed", type=int, default=0); args = ap.parse_args()
+    print(f"{'piastre':>8} {'budget s':>9} {'fogli':>6} {'min':>4} {'utilizzo %':>11} {'iter':>6} {'tempo ms':>9}")
+    for n_modules in (10, 25, 50, 100):
+        items = synthetic_items(n_modules, args.seed)
+        for budget in (0.0, 0.1, 0.5, 2.0):
+            r = nest_parts(items, time_budget=budget)
+            print(f"{len(items):>8} {budget:>9.1f} {r['fogli']:>6} {r['limite_inferiore']:>4} {r['utilizzo']*100:>11.1f} {r['iterazioni']:>6} {r['tempo_s']*1000:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# --- BENCHMARK PIPELINE ---
+# Tempi e picchi di memoria degli stadi principali su progetti sintetici (da 1 a 200 moduli, mensole
+# automatiche e manuali), senza Streamlit. Gli stadi sono chiamati senza le cache di engine/pipeline.py.
+# Con una baseline salvata esce con codice 1 se uno stadio peggiora oltre la soglia; i tempi sono riportati
+# alla macchina della baseline con un carico di calibrazione fisso misurato accanto a ogni stadio.
+# Uso: python benchmarks/bench_pipeline.py [--moduli 1 10 50 100 200] [--ripetizioni 5] [--soglia 1.5] [--salva-baseline]
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import (DEFAULT_COSTS, normalize_project, build_geometry, compute_stats, bom_tables, wall_arrays, build_mesh, get_bin_stl,
+                    generate_full_dxf, generate_pdf_report, generate_commercial_pdf, calculate_quote)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_pipeline.json")
+QUOTE_INPUTS = {"stock_iron": False, "stock_wood": False, "logistics_type": "corriere", "costo_corriere": 150.0, "gg_viaggio_corriere": 2,
+                "ore_viaggio": 2.0, "ore_montaggio": 4.0, "num_operai": 2, "start_date": date(2025, 1, 7)}
+QUOTE_CALLS = 1000
+
+def synthetic_project(n_modules, manual, seed=0):
+    rng = random.Random(seed); cols = []
+    for _ in range(n_modules):
+        h = rng.choice([120, 200, 280, 400]); r = rng.randint(2, 12)
+        col = {"w": rng.choice([60, 90, 120]), "h": h, "d": rng.choice([25, 30, 45]), "r": r}
+        if manual: col.update(manual=True, man_heights=sorted(round(rng.uniform(0, h - 4), 1) for _ in range(r)))
+        cols.append(col)
+    return normalize_project({"project_name": f"Bench{n_modules}", "cols": cols})
+
+def stages(prj):
+    # (nome, funzione): ogni funzione rifa' il suo stadio da capo a partire dai dati gia' pronti
+    name = prj['project_name']; geo = build_geometry(prj['cols']); stats = compute_stats(geo); wood, iron = bom_tables(geo)
+    inputs = dict(QUOTE_INPUTS, num_cols=prj['num_colonne']); totals = calculate_quote(stats, inputs, DEFAULT_COSTS)
+    colors = {"legno": prj['finish_wood'], "ferro": prj['finish_iron']}; client = {"name": "Cliente Bench", "address": "Via Prova 1"}
+    # calculate_quote_logic di Moby.py e' calculate_quote con il listino della sessione: qui il listino di default
+    return [
+        ("geometria", lambda: build_geometry(prj['cols'])),
+        ("stl", lambda: get_bin_stl(build_mesh(wall_arrays(geo)))),
+        ("dxf completo", lambda: generate_full_dxf(geo['part_types'], name)),
+        ("pdf scheda", lambda: generate_pdf_report(name, geo['part_types'], wood, iron, stats, geo['cols'], colors)),
+        ("pdf preventivo", lambda: generate_commercial_pdf(prj, totals, client, "Rimessa diretta", "", geo['cols'])),
+        (f"preventivo x{QUOTE_CALLS}", lambda: [calculate_quote(stats, inputs, DEFAULT_COSTS) for _ in range(QUOTE_CALLS)]),
+    ]
+
+def timed(fn, reps):
+    # Migliore di reps esecuzioni, senza garbage collector (come timeit): meno rumore tra un giro e l'altro
+    best = None; gc_was_enabled = gc.isenabled(); gc.disable()
+    try:
+        for _ in range(reps):
+            t = time.perf_counter(); fn(); dt = time.perf_counter() - t; best = dt if best is None else min(best, dt)
+    finally:
+        if gc_was_enabled: gc.enable()
+    return best
+
+def peak_memory(fn):
+    # Picco delle allocazioni Python/NumPy durante lo stadio (misurato a parte: tracemalloc rallenta i tempi)
+    tracemalloc.start()
+    try: fn(); return tracemalloc.get_traced_memory()[1]
+    finally: tracemalloc.stop()
+
+CALIB_DATA = np.random.default_rng(0).random(50_000)
+
+def calibrate(reps=5):
+    # Carico fisso misto (ciclo Python + NumPy) misurato accanto a ogni stadio: i tempi si confrontano in
+    # unita' di calibrazione, cosi' rumore della macchina condivisa e CPU diverse pesano poco
+    def work():
+        acc = 0.0
+        for i in range(50_000): acc += i * 0.5
+        return acc + float(np.sort(CALIB_DATA).sum())
+    return timed(work, reps)
+
+def measure(fn, reps):
+    calib = calibrate(); ms = timed(fn, reps) * 1000.0; calib = min(calib, calibrate())
+    return {"ms": ms, "calib_ms": calib * 1000.0, "picco_kb": peak_memory(fn) / 1024.0}
+
+def run(sizes, reps, only=None):
+    # only: chiavi da misurare (per rimisurare le regressioni); None = tutte
+    results = {}
+    for manual in (False, True):
+        for n in sizes:
+            mode = "manuali" if manual else "auto"
+            if only is not None and not any(k.startswith(f"{mode}/{n}/") for k in only): continue
+            for stage, fn in stages(synthetic_project(n, manual)):
+                key = f"{mode}/{n}/{stage}"
+                if only is None or key in only: results[key] = measure(fn, reps)
+    return results
+
+def compare(results, baseline, ratio_max, min_ms, mem_ratio_max):
+    # Regressione: tempo (riportato alla baseline) oltre ratio_max e piu' lento di almeno min_ms, o memoria oltre mem_ratio_max
+    rows = []
+    for key, cur in results.items():
+        base = baseline.get(key); row = dict(cur, key=key, base_ms=None, rapporto=None, esito="")
+        if base:
+            norm = cur['ms'] * base['calib_ms'] / cur['calib_ms']; row['base_ms'] = base['ms']; row['rapporto'] = norm / base['ms'] if base['ms'] else 1.0
+            slow = row['rapporto'] > ratio_max and norm - base['ms'] > min_ms
+            fat = cur['picco_kb'] > base['picco_kb'] * mem_ratio_max and cur['picco_kb'] - base['picco_kb'] > 256
+            row['esito'] = " ".join(x for x, bad in (("LENTO", slow), ("MEMORIA", fat)) if bad) or "ok"
+        rows.append(row)
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark degli stadi della pipeline (headless)")
+    ap.add_argument("--moduli", type=int, nargs="+", default=[1, 10, 50, 100, 200]); ap.add_argument("--ripetizioni", type=int, default=5)
+    ap.add_argument("--baseline", default=BASELINE); ap.add_argument("--salva-baseline", action="store_true", help="scrive i risultati come nuova baseline")
+    ap.add_argument("--soglia", type=float, default=1.5, help="rapporto massimo di tempo rispetto alla baseline")
+    ap.add_argument("--minimo-ms", type=float, default=2.0, help="differenze di tempo sotto questa soglia non sono regressioni")
+    ap.add_argument("--soglia-memoria", type=float, default=1.25, help="rapporto massimo del picco di memoria")
+    ap.add_argument("--json", help="scrive anche i risultati in questo file")
+    args = ap.parse_args()
+    results = run(args.moduli, args.ripetizioni)
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.salva_baseline:
+        with open(args.baseline, "r") as f: baseline = json.load(f)
+    rows = compare(results, baseline.get('risultati', {}), args.soglia, args.minimo_ms, args.soglia_memoria)
+    # Una regressione e' confermata solo se si ripete: gli stadi segnalati vengono rimisurati una volta
+    flagged = [r['key'] for r in rows if r['esito'] not in ("", "ok")]
+    if flagged:
+        again = run(args.moduli, args.ripetizioni, only=set(flagged))
+        for k, cur in again.items():
+            if cur['ms'] / cur['calib_ms'] < results[k]['ms'] / results[k]['calib_ms']: results[k] = cur
+        rows = compare(results, baseline.get('risultati', {}), args.soglia, args.minimo_ms, args.soglia_memoria)
+    print(f"baseline: {args.baseline if baseline else 'nessuna'} — tempi riportati alla baseline con la calibrazione misurata accanto a ogni stadio")
+    print(f"{'mensole':>8} {'moduli':>6} {'stadio':>18} {'ms':>9} {'calib ms':>9} {'picco KB':>9} {'base ms':>9} {'x':>6}  esito")
+    for r in rows:
+        mode, n, stage = r['key'].split("/", 2)
+        base = f"{r['base_ms']:>9.2f} {r['rapporto']:>6.2f}" if r['base_ms'] is not None else f"{'-':>9} {'-':>6}"
+        print(f"{mode:>8} {n:>6} {stage:>18} {r['ms']:>9.2f} {r['calib_ms']:>9.2f} {r['picco_kb']:>9.0f} {base}  {r['esito']}")
+    doc = {"python": platform.python_version(), "macchina": platform.machine(), "ripetizioni": args.ripetizioni, "risultati": results}
+    if args.json:
+        with open(args.json, "w") as f: json.dump(dict(doc, confronto=rows), f, indent=1)
+    if args.salva_baseline:
+        with open(args.baseline, "w") as f: json.dump(doc, f, indent=1, sort_keys=True)
+        print(f"baseline salvata in {args.baseline}")
+    bad = [r for r in rows if r['esito'] not in ("", "ok")]
+    if bad: print(f"{len(bad)} regressioni rispetto alla baseline")
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# --- CONTROLLO AVVIO A FREDDO ---
+# La pagina di login (check_login in Moby.py) non deve caricare le librerie pesanti: una sessione nuova
+# vede il login senza pagare plotly, ezdxf, pandas e fpdf. Ogni misura gira in un processo Python pulito:
+# import di Streamlit (escluso dal tempo), poi Moby.py eseguito da AppTest senza login. Contano solo i moduli
+# che l'app aggiunge a quelli gia' caricati da Streamlit (che da solo importa plotly.graph_objects).
+# Esce con codice 1 se il login non si vede o supera il target; che non importi librerie pesanti lo verifica
+# tests/test_startup.py, qui e' solo riportato.
+# Uso: python benchmarks/check_startup.py [--target-ms 500] [--ripetizioni 3]
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("plotly.graph_objects", "ezdxf", "pandas", "fpdf")
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+heavy = {heavy!r}; logged = {logged!r}
+def loaded(names): return [h for h in heavy if any(m == h or m.startswith(h + ".") for m in names)]
+base = set(sys.modules)
+at = AppTest.from_file("Moby.py", default_timeout=120)
+if logged: at.session_state["logged_in"] = True; at.session_state["username"] = "admin"
+t = time.perf_counter(); at.run(); ms = (time.perf_counter() - t) * 1000.0
+print(json.dumps({{"ms": ms, "importati": loaded(set(sys.modules) - base), "streamlit": loaded(base), "login": any(b.label == "Entra" for b in at.button),
+                  "errori": [str(e.value) for e in at.exception]}}))
+"""
+
+def render(logged):
+    out = subprocess.run([sys.executable, "-c", CHILD.format(heavy=HEAVY, logged=logged)], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser(description="Avvio a freddo della pagina di login")
+    ap.add_argument("--target-ms", type=float, default=500.0, help="tempo massimo del primo rerun della pagina di login")
+    ap.add_argument("--ripetizioni", type=int, default=3)
+    args = ap.parse_args(); ok = True
+    runs = [render(False) for _ in range(args.ripetizioni)]; best = min(r['ms'] for r in runs)
+    loaded = sorted({m for r in runs for m in r['importati']}); errors = [e for r in runs for e in r['errori']]
+    print(f"login: {best:.0f} ms (migliore di {len(runs)}, target {args.target_ms:.0f} ms) — librerie pesanti importate dall'app: {', '.join(loaded) or 'nessuna'}"
+          f" (gia' caricate da Streamlit: {', '.join(runs[0]['streamlit']) or 'nessuna'})")
+    if not all(r['login'] for r in runs) or errors: print(f"pagina di login non mostrata correttamente: {errors}"); ok = False
+    if best > args.target_ms: print("ERRORE: login oltre il target"); ok = False
+    full = render(True)
+    print(f"primo rerun dopo il login: {full['ms']:.0f} ms — importate: {', '.join(full['importati']) or 'nessuna'}" + (f" — errori: {full['errori']}" if full['errori'] else ""))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# --- CARICO API HTTP ---
+# Throughput e latenze (p50/p95) di engine/server.py con client concorrenti. Senza --url avvia un server locale
+# (python -m engine.server) su una porta libera e lo chiude alla fine. Le richieste ruotano su pochi progetti
+# sintetici (benchmarks/bench_pipeline.py): con --progetti basso molte richieste sono identiche e il server le
+# serve da coalescenza e cache, con --progetti alto (e --cache-mb 0 --store-mb 0) si misura il calcolo vero.
+# Per i PDF la latenza e' quella completa: POST del job, polling di /lavori/{id} e download del file.
+# Uso: python benchmarks/load_api.py [--richieste 200] [--concorrenza 16] [--progetti 4] [--endpoint preventivo stl dxf pdf]
+#                                    [--moduli 10] [--workers 4] [--cache-mb 256] [--store-mb 1024] [--url http://127.0.0.1:8502] [--json out.json]
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench_pipeline import synthetic_project
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = {"preventivo": "/preventivo", "stl": "/stl", "dxf": "/dxf", "pdf": "/pdf/scheda", "pdf_preventivo": "/pdf/preventivo"}
+
+def call(url, body=None, timeout=300):
+    req = urllib.request.Request(url, data=None if body is None else json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r: return r.status, r.read()
+    except urllib.error.HTTPError as e: return e.code, e.read()
+
+def one_request(base, endpoint, project, poll=0.05):
+    t = time.perf_counter(); status, data = call(base + ENDPOINTS[endpoint], {"progetto": project})
+    if endpoint.startswith("pdf") and status in (200, 202):
+        job = json.loads(data)
+        while job['stato'] in ("in coda", "in corso"):
+            time.sleep(poll); status, data = call(base + job['url']); job = json.loads(data)
+        status, data = call(base + job['url'] + "/file") if job['stato'] == "pronto" else (500, data)
+    return {"endpoint": endpoint, "ms": (time.perf_counter() - t) * 1000.0, "status": status, "bytes": len(data)}
+
+def free_port():
+    with socket.socket() as s: s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+def start_server(workers, cache_mb, store_mb):
+    port = free_port(); cmd = [sys.executable, "-m", "engine.server", "--port", str(port), "--cache-mb", str(cache_mb), "--store-mb", str(store_mb)]
+    if workers: cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT); base = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            if call(base + "/stato", timeout=1)[0] == 200: return proc, base
+        except OSError: time.sleep(0.1)
+    proc.terminate(); raise RuntimeError("il server non risponde")
+
+def main():
+    ap = argparse.ArgumentParser(description="Test di carico dell'API HTTP locale")
+    ap.add_argument("--url", help="server gia' avviato; senza, ne avvia uno locale")
+    ap.add_argument("--richieste", type=int, default=200); ap.add_argument("--concorrenza", type=int, default=16)
+    ap.add_argument("--progetti", type=int, default=4, help="progetti distinti su cui ruotano le richieste")
+    ap.add_argument("--moduli", type=int, default=10); ap.add_argument("--endpoint", nargs="+", default=["preventivo", "stl", "dxf", "pdf"], choices=list(ENDPOINTS))
+    ap.add_argument("--workers", type=int, default=None); ap.add_argument("--cache-mb", type=float, default=256.0)
+    ap.add_argument("--store-mb", type=float, default=1024.0, help="archivio su disco del server avviato (0 = spento)")
+    ap.add_argument("--json", help="scrive anche i risultati in questo file")
+    args = ap.parse_args()
+    proc = None; base = args.url
+    if base is None: proc, base = start_server(args.workers, args.cache_mb, args.store_mb)
+    try:
+        projects = [dict(synthetic_project(args.moduli, False, seed=i), project_name=f"Carico{i}") for i in range(args.progetti)]
+        # Riscaldamento: processi del pool avviati e moduli importati, fuori dalle misure
+        for ep in args.endpoint: one_request(base, ep, dict(synthetic_project(args.moduli, False, seed=-1), project_name="Riscaldamento"))
+        plan = [(args.endpoint[i % len(args.endpoint)], projects[(i // len(args.endpoint)) % len(projects)]) for i in range(args.richieste)]
+        t = time.perf_counter()
+        with ThreadPoolExecutor(args.concorrenza) as ex: results = list(ex.map(lambda job: one_request(base, *job), plan))
+        elapsed = time.perf_counter() - t
+        server = json.loads(call(base + "/stato")[1])
+    finally:
+        if proc is not None: proc.terminate(); proc.wait()
+    errors = [r for r in results if r['status'] != 200]
+    print(f"{len(results)} richieste in {elapsed:.2f} s con {args.concorrenza} client: {len(results) / elapsed:.1f} richieste/s, {len(errors)} errori")
+    print(f"{'endpoint':>15} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'KB medi':>9}")
+    rows = []
+    for ep in args.endpoint + ["totale"]:
+        sel = [r for r in results if ep == "totale" or r['endpoint'] == ep]
+        if not sel: continue
+        ms = np.array([r['ms'] for r in sel])
+        row = {"endpoint": ep, "n": len(sel), "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)), "max_ms": float(ms.max()),
+               "kb": float(np.mean([r['bytes'] for r in sel])) / 1024.0}
+        rows.append(row); print(f"{ep:>15} {row['n']:>5} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['max_ms']:>9.1f} {row['kb']:>9.1f}")
+    print(f"server: {server['worker']} worker, coalescenza {server['coalescenza']}, artefatti {server['artefatti']}, disco {server['disco']}, lavori {server['lavori']}")
+    if args.json:
+        with open(args.json, "w") as f: json.dump({"richieste_s": len(results) / elapsed, "secondi": elapsed, "errori": len(errors), "endpoint": rows, "server": server}, f, indent=1)
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# --- MOBY ENGINE ---
+# Motore headless del configuratore (nessuna dipendenza da Streamlit):
+# modello progetto -> geometria -> distinte -> statistiche -> preventivo -> export.
+# I nomi pubblici si importano dal pacchetto, ma ogni sottomodulo si carica al primo accesso (PEP 562):
+# la pagina di login non paga fpdf, ezdxf, plotly e pandas, che servono solo piu' avanti.
+import importlib
+
+_EXPORTS = {
+    "model": ("SPESSORE_LEGNO", "SPESSORE_FERRO", "DIAMETRO_FORO", "OFFSET_LATERALI", "PESO_SPECIFICO_FERRO", "PESO_SPECIFICO_LEGNO", "VONTREE_DATA",
+        "VERSION", "COPYRIGHT", "DEFAULT_COSTS", "DEFAULT_PAYMENTS", "DEFAULT_COL", "MAX_MODULES", "MAX_SHELVES", "canonical_json", "project_hash",
+        "module_letter", "default_shelf_heights", "shelf_heights", "normalize_col", "normalize_project", "MODULE_FIELDS", "MODULE_LIMITS",
+        "format_heights", "parse_heights", "cols_to_table", "table_to_cols", "copy_modules", "set_range"),
+    "geometry": ("build_module", "build_geometry", "part_signature", "compute_stats", "bom_tables", "build_figure", "cut_preview_arrays", "build_cut_preview",
+        "build_mesh", "iter_boxes", "wall_arrays", "MATERIAL_COLORS"),
+    "mesh": ("BOX_CORNERS", "BOX_FACES", "Mesh", "box_arrays", "boxes_to_mesh", "mesh_from_boxes", "mesh_from_arrays", "face_normals", "get_bin_stl",
+        "get_3mf", "get_glb"),
+    "quote": ("calculate_quote", "calculate_quote_vec"),
+    "dxf": ("DXF_LAYERS", "create_dxf_doc", "draw_part_on_dxf", "layout_single", "layout_full", "layout_sheet", "generate_single_dxf",
+        "generate_full_dxf", "generate_sheet_dxf"),
+    "dxf_stream": ("StreamDXF", "stream_single_dxf", "stream_full_dxf", "stream_sheet_dxf", "stream_dxf_zip"),
+    "cutting": ("DEFAULT_BOARDS", "wood_pieces", "optimize_boards", "plan_stats", "plan_table"),
+    "toolpath": ("DEFAULT_MACHINE", "path_length", "nearest_neighbour", "two_opt", "optimize_order", "part_toolpath", "ordered_part", "sheet_toolpath"),
+    "nesting": ("DEFAULT_SHEET", "nesting_items", "nest_parts", "nest_projects", "nesting_report"),
+    "pdf": ("PDFReport", "image_info", "draw_frontal_schema", "draw_module_detail", "generate_pdf_report", "generate_commercial_pdf"),
+    "pipeline": ("StageCache", "stage_cache", "module_cache", "get_module", "get_part_toolpath", "get_geometry", "get_stats", "get_bom",
+        "get_figure", "parts_key", "get_cut_preview", "get_mesh", "get_stl", "get_3mf_model", "get_glb_model", "get_quote", "get_quote_stats", "get_validation", "get_toolpaths",
+        "ordered_part_types", "get_nesting", "get_wood_plan", "get_sheet_dxf", "get_dxf_bundle", "export_key", "get_full_dxf", "get_single_dxf",
+        "build_pdf_report", "get_pdf_report", "submit_pdf_report", "commercial_key", "get_commercial_pdf"),
+    "artifacts": ("ByteCache", "ARTIFACT_DIR", "ARTIFACT_ENV", "ArtifactStore"),
+    "package": ("PACKAGE_JOBS", "get_process_pool", "pool_workers", "shutdown_process_pool", "project_to_json", "render_job", "write_production_package",
+        "get_production_package"),
+    "sweep": ("SWEEP_PARAMS", "SWEEP_METRICS", "sweep_values", "with_dimension", "quote_sweep", "build_sweep_figure"),
+    "validation": ("VALIDATION_KEYS", "DEFAULT_VALIDATION", "VALIDATION_TYPES", "shelf_deflection", "validate_geometry", "validation_table"),
+    "design": ("DESIGN_METRICS", "wall_width", "width_combos", "shelf_options", "board_plans", "layout_cols", "design_search"),
+    "schedule": ("RESOURCES", "RESOURCE_LABELS", "ORDERS_FILE", "order_from_quote", "capacity_calendar", "schedule_orders", "plan_delivery",
+        "schedule_table", "load_table", "load_orders", "save_orders", "update_orders"),
+    "jobs": ("JobManager", "job_manager"),
+    "profiling": ("PROFILE_ENV", "TIMINGS_ENV", "Profiler", "profiler", "span", "records_table", "span_summary", "build_flame_figure"),
+}
+_ORIGIN = {name: mod for mod, names in _EXPORTS.items() for name in names}
+__all__ = list(_ORIGIN)
+
+def __getattr__(name):
+    mod = _ORIGIN.get(name)
+    if mod is None: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{mod}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__(): return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,137 @@
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .model import SPESSORE_FERRO, canonical_json, normalize_project, project_hash
+
+# --- ARCHIVIO PROGETTI (SQLITE) ---
+# Ogni progetto salvato e' una riga con le colonne di ricerca indicizzate e il JSON completo in 'dati';
+# l'hash del progetto normalizzato evita i doppioni. WAL: le sessioni leggono mentre un'altra scrive.
+ARCHIVE_FILE = "archivio.sqlite"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progetti (
+    id INTEGER PRIMARY KEY, hash TEXT NOT NULL UNIQUE, nome TEXT NOT NULL, cliente TEXT NOT NULL, indirizzo TEXT NOT NULL,
+    moduli INTEGER NOT NULL, larghezza REAL NOT NULL, altezza REAL NOT NULL, profondita REAL NOT NULL, ripiani INTEGER NOT NULL,
+    finitura_legno TEXT NOT NULL, finitura_ferro TEXT NOT NULL, prezzo REAL, costo REAL, consegna TEXT,
+    creato TEXT NOT NULL, aggiornato TEXT NOT NULL, dati TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_progetti_cliente ON progetti (cliente COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS ix_progetti_nome ON progetti (nome COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS ix_progetti_moduli ON progetti (moduli, larghezza);
+CREATE INDEX IF NOT EXISTS ix_progetti_larghezza ON progetti (larghezza);
+CREATE INDEX IF NOT EXISTS ix_progetti_altezza ON progetti (altezza);
+CREATE INDEX IF NOT EXISTS ix_progetti_prezzo ON progetti (prezzo);
+CREATE INDEX IF NOT EXISTS ix_progetti_aggiornato ON progetti (aggiornato);
+CREATE INDEX IF NOT EXISTS ix_progetti_finiture ON progetti (finitura_legno, finitura_ferro);
+CREATE TABLE IF NOT EXISTS preventivi (
+    id INTEGER PRIMARY KEY, progetto_id INTEGER NOT NULL REFERENCES progetti (id) ON DELETE CASCADE, hash TEXT NOT NULL UNIQUE,
+    creato TEXT NOT NULL, prezzo REAL NOT NULL, imponibile REAL NOT NULL, costo REAL NOT NULL, consegna TEXT NOT NULL, dati TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_preventivi_progetto ON preventivi (progetto_id, creato);
+"""
+LIST_COLUMNS = ("id", "nome", "cliente", "moduli", "larghezza", "altezza", "profondita", "ripiani", "finitura_legno", "finitura_ferro", "prezzo", "consegna", "aggiornato")
+
+def project_columns(project):
+    # Colonne indicizzate; la larghezza e' misurata come tot_width in draw_frontal_schema
+    cols = project['cols']
+    return {"nome": project['project_name'], "cliente": project['client_name'], "indirizzo": project['client_address'], "moduli": len(cols),
+            "larghezza": sum(c['w'] + 2 * SPESSORE_FERRO for c in cols), "altezza": max((c['h'] for c in cols), default=0),
+            "profondita": max((c['d'] for c in cols), default=0), "ripiani": sum(c['r'] for c in cols),
+            "finitura_legno": project['finish_wood'], "finitura_ferro": project['finish_iron']}
+
+class ProjectArchive:
+    def __init__(self, path=ARCHIVE_FILE):
+        self.path = str(path); self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # Una connessione per thread (ogni sessione Streamlit gira nel suo thread); letture in autocommit
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL"); con.execute("PRAGMA synchronous=NORMAL"); con.execute("PRAGMA foreign_keys=ON")
+            self._local.con = con
+        return con
+
+    def _write(self): return _Transaction(self._conn())
+
+    def save(self, project, totals=None, data=None):
+        # Salva (o ritrova) il progetto e, se presente, il preventivo; restituisce l'id del progetto.
+        # data: JSON da archiviare (default: il progetto normalizzato), ad es. project_to_json con le quote effettive
+        project = normalize_project(project); now = datetime.now().isoformat(timespec="seconds")
+        row = dict(project_columns(project), hash=project_hash(project), creato=now, aggiornato=now, dati=data or canonical_json(project))
+        with self._write() as con:
+            con.execute(f"INSERT INTO progetti ({', '.join(row)}) VALUES ({', '.join('?' * len(row))}) ON CONFLICT (hash) DO UPDATE SET aggiornato = excluded.aggiornato", list(row.values()))
+            pid = con.execute("SELECT id FROM progetti WHERE hash = ?", (row['hash'],)).fetchone()[0]
+            if totals is not None:
+                con.execute("INSERT OR IGNORE INTO preventivi (progetto_id, hash, creato, prezzo, imponibile, costo, consegna, dati) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (pid, project_hash([row['hash'], totals]), now, totals['price_total'], totals['price_ex_vat'], totals['costo_vivo'], totals['delivery_date'], canonical_json(totals)))
+                con.execute("UPDATE progetti SET prezzo = ?, costo = ?, consegna = ?, aggiornato = ? WHERE id = ?", (totals['price_total'], totals['costo_vivo'], totals['delivery_date'], now, pid))
+        return pid
+
+    def search(self, text="", moduli=None, larghezza=None, altezza=None, prezzo=None, dal=None, al=None, finitura="", limit=200):
+        # Intervalli come (min, max) con None per "nessun limite"; date come stringhe ISO o date
+        where = []; params = []
+        if text:
+            where.append("(nome LIKE ? OR cliente LIKE ? OR indirizzo LIKE ?)"); params += [f"%{text}%"] * 3
+        for col, rng in (("moduli", moduli), ("larghezza", larghezza), ("altezza", altezza), ("prezzo", prezzo)):
+            lo, hi = rng or (None, None)
+            if lo is not None: where.append(f"{col} >= ?"); params.append(lo)
+            if hi is not None: where.append(f"{col} <= ?"); params.append(hi)
+        if dal: where.append("aggiornato >= ?"); params.append(str(dal))
+        if al: where.append("aggiornato < ?"); params.append(f"{al}T99")  # giorno finale incluso
+        if finitura:
+            where.append("(finitura_legno LIKE ? OR finitura_ferro LIKE ?)"); params += [f"%{finitura}%"] * 2
+        sql = f"SELECT {', '.join(LIST_COLUMNS)} FROM progetti {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY aggiornato DESC, id DESC LIMIT ?"
+        return [dict(r) for r in self._conn().execute(sql, params + [int(limit)])]
+
+    def load(self, project_id):
+        row = self._conn().execute("SELECT dati FROM progetti WHERE id = ?", (project_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def quotes(self, project_id):
+        return [dict(r) for r in self._conn().execute("SELECT id, creato, prezzo, imponibile, costo, consegna FROM preventivi WHERE progetto_id = ? ORDER BY creato DESC, id DESC", (project_id,))]
+
+    def delete(self, project_id):
+        with self._write() as con: con.execute("DELETE FROM progetti WHERE id = ?", (project_id,))
+
+    def info(self):
+        n_prj, n_q = self._conn().execute("SELECT (SELECT COUNT(*) FROM progetti), (SELECT COUNT(*) FROM preventivi)").fetchone()
+        return {"progetti": n_prj, "preventivi": n_q, "bytes": Path(self.path).stat().st_size}
+
+    def import_files(self, paths):
+        # Migrazione dei {progetto}_{ts}.json scaricati: stesso progetto in piu' file -> una sola riga
+        ids = set(); errors = []
+        for path in paths:
+            try:
+                with open(path, "r") as f: data = json.load(f)
+                ids.add(self.save(data, data=json.dumps(data)))
+            except (OSError, ValueError, TypeError, AttributeError) as e: errors.append((str(path), str(e)))
+        return ids, errors
+
+class _Transaction:
+    # BEGIN IMMEDIATE prende subito il lock di scrittura: niente deadlock tra sessioni che scrivono insieme
+    def __init__(self, con): self.con = con
+    def __enter__(self): self.con.execute("BEGIN IMMEDIATE"); return self.con
+    def __exit__(self, exc_type, exc, tb): self.con.execute("ROLLBACK" if exc_type else "COMMIT")
+
+# --- CLI ---
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m engine.archive", description="Importa progetti JSON nell'archivio")
+    ap.add_argument("progetti", nargs="+", help="file JSON o cartelle che li contengono")
+    ap.add_argument("--db", default=ARCHIVE_FILE)
+    args = ap.parse_args(argv)
+    files = []
+    for p in map(Path, args.progetti): files += sorted(p.rglob("*.json")) if p.is_dir() else [p]
+    archive = ProjectArchive(args.db); ids, errors = archive.import_files(files)
+    print(f"{len(files)} file -> {len(ids)} progetti distinti ({archive.info()['progetti']} in archivio)")
+    for path, err in errors: print(f"ERRORE {path}: {err}", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
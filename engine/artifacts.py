@@ -0,0 +1,154 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from .model import VERSION, project_hash
+
+# --- CACHE ARTEFATTI (BYTE) ---
+# LRU limitata in byte per i file scaricabili (STL, DXF, PDF): una per sessione, cosi' i download
+# ripetuti sono gratuiti e una sessione non puo' riempire la memoria delle altre.
+# Con uno 'store' (ArtifactStore) i mancati in memoria si cercano su disco e ogni file prodotto vi viene scritto.
+class ByteCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, store=None):
+        self.max_bytes = max_bytes; self.store = store; self.size = 0; self._data = OrderedDict(); self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data: self.hits += 1; self._data.move_to_end(key); return self._data[key]
+            self.misses += 1
+        data = self.store.get(key) if self.store is not None else None
+        if data is not None: self._remember(key, data)
+        return data
+
+    def _remember(self, key, data):
+        n = len(data)
+        with self._lock:
+            if key in self._data: self.size -= len(self._data.pop(key))
+            if n > self.max_bytes: return
+            self._data[key] = data; self.size += n
+            while self.size > self.max_bytes: _, old = self._data.popitem(last=False); self.size -= len(old)
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if self.store is not None: self.store.put(key, data)
+        return data
+
+    def get_or_build(self, key, builder):
+        data = self.get(key)
+        if data is None: data = self.put(key, builder())
+        return data
+
+    def info(self):
+        with self._lock: return {"entries": len(self._data), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+# --- ARCHIVIO ARTEFATTI SU DISCO ---
+# Gli stessi byte tra sessioni, processi e riavvii: il file si chiama come l'hash di (VERSION, chiave), dove la
+# chiave e' gia' l'hash degli input dell'export (export_key & co.: progetto normalizzato, listino o totali che
+# servono). Cambiare versione del motore invalida tutto senza cancellare nulla: i vecchi file escono per LRU.
+# Scrittura atomica (file temporaneo nella stessa cartella + os.replace): un lettore vede il file intero o niente,
+# anche con piu' processi Streamlit o worker dell'API sulla stessa cartella. Nessun lock tra processi: ogni scrittura
+# aggiunge i suoi byte a una stima della dimensione, e la cartella si rilegge solo quando la stima supera il limite
+# o ogni RESCAN_WRITES scritture (per contare anche i file degli altri processi). Allora il file meno usato di recente
+# (mtime, aggiornato a ogni lettura) viene cancellato finche' si rientra; un file gia' cancellato da un altro processo
+# e' un mancato. info() riusa il conteggio dei file per INFO_TTL_S secondi: Moby.py lo chiama a ogni rerun.
+# Il primo byte del file dice se il valore era bytes o testo (il DXF completo e' una stringa): get restituisce lo stesso tipo.
+ARTIFACT_DIR = "artefatti"
+ARTIFACT_ENV = "MOBY_ARTIFACTS"
+STALE_TMP_S = 3600.0
+RESCAN_WRITES = 64
+INFO_TTL_S = 5.0
+
+class ArtifactStore:
+    def __init__(self, path=None, max_bytes=1024 * 1024 * 1024):
+        self.path = path or os.environ.get(ARTIFACT_ENV) or ARTIFACT_DIR; self.max_bytes = max_bytes; self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0; self.bytes_read = 0; self.bytes_written = 0; self.evicted = 0
+        self._size = None; self._writes = 0; self._usage = None  # stima in byte (None = da rileggere), scritture dall'ultima lettura, (istante, file, byte)
+
+    def file_of(self, key):
+        h = project_hash([VERSION, key]); return os.path.join(self.path, h[:2], h)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items(): setattr(self, k, getattr(self, k) + v)
+
+    def get(self, key):
+        path = self.file_of(key)
+        try:
+            with open(path, "rb") as f: data = f.read()
+        except OSError: self._count(misses=1); return None
+        try: os.utime(path)  # ultimo accesso per l'LRU
+        except OSError: pass
+        self._count(hits=1, bytes_read=len(data))
+        return data[1:].decode("utf-8") if data[:1] == b"s" else data[1:]
+
+    def put(self, key, data):
+        raw = b"s" + data.encode("utf-8") if isinstance(data, str) else b"b" + bytes(data)
+        if len(raw) > self.max_bytes: return data
+        path = self.file_of(key); folder = os.path.dirname(path)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f: f.write(raw)
+                os.replace(tmp, path)
+            except OSError:
+                os.unlink(tmp); raise
+        except OSError: return data  # disco pieno o file bloccato (Windows): resta solo la cache in memoria
+        with self._lock:
+            self.bytes_written += len(raw); self._writes += 1
+            if self._size is not None: self._size += len(raw)  # una sovrascrittura sovrastima: si rilegge solo prima
+            rescan = self._size is None or self._size > self.max_bytes or self._writes >= RESCAN_WRITES
+        if rescan: self.evict()
+        return data
+
+    def get_or_build(self, key, builder):
+        data = self.get(key)
+        if data is None: data = self.put(key, builder())
+        return data
+
+    def _scan(self):
+        # (mtime, byte, percorso) dei file della cartella; i temporanei orfani (processo morto a meta' scrittura) si cancellano
+        files = []; now = time.time()
+        try: subs = [sub.path for sub in os.scandir(self.path) if sub.is_dir()]
+        except OSError: return files
+        for sub in subs:
+            try: entries = list(os.scandir(sub))
+            except OSError: continue
+            for e in entries:
+                try: st = e.stat()
+                except OSError: continue
+                if e.name.startswith(".tmp-"):
+                    if now - st.st_mtime > STALE_TMP_S:
+                        try: os.unlink(e.path)
+                        except OSError: pass
+                    continue
+                files.append((st.st_mtime, st.st_size, e.path))
+        return files
+
+    def evict(self):
+        files = self._scan(); total = sum(f[1] for f in files); n = len(files)
+        if total > self.max_bytes:
+            for _, size, path in sorted(files):
+                try: os.unlink(path); self._count(evicted=1)
+                except OSError: pass  # gia' cancellato da un altro processo o aperto in lettura (Windows)
+                total -= size; n -= 1
+                if total <= self.max_bytes: break
+        with self._lock: self._size = total; self._writes = 0; self._usage = (time.monotonic(), n, total)
+
+    def clear(self):
+        for _, _, path in self._scan():
+            try: os.unlink(path)
+            except OSError: pass
+        with self._lock: self._size = None; self._usage = None
+
+    def info(self):
+        with self._lock: usage = self._usage
+        if usage is None or time.monotonic() - usage[0] > INFO_TTL_S:
+            files = self._scan(); usage = (time.monotonic(), len(files), sum(f[1] for f in files))
+            with self._lock: self._usage = usage
+        with self._lock:
+            return {"entries": usage[1], "bytes": usage[2], "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses,
+                    "bytes_read": self.bytes_read, "bytes_written": self.bytes_written, "evicted": self.evicted}
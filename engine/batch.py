@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .model import DEFAULT_COSTS, normalize_project, project_hash
+from .cutting import BOARD_KEYS, plan_stats
+from .quote import calculate_quote_vec
+from .validation import VALIDATION_KEYS
+from .pipeline import get_stats, get_wood_plan, get_validation
+
+# --- PREVENTIVI IN BLOCCO ---
+# Ri-preventivazione di molti progetti salvati con uno o piu' listini (formato tempicosti_default.json).
+# Fase 1: statistiche di ogni progetto (geometria + piano di taglio legno + verifiche), in parallelo sui processi.
+# Fase 2: una tabella (progetto x listino) su cui la formula del preventivo gira in un colpo solo.
+# Uso: python -m engine.batch progetti/ --listini tempicosti_default.json nuovi.json --out report.csv [--verifiche verifiche.csv]
+DEFAULT_BATCH_INPUTS = {"stock_iron": False, "stock_wood": False, "logistics_type": "corriere", "costo_corriere": 150.0,
+                        "gg_viaggio_corriere": 2, "ore_viaggio": 2.0, "ore_montaggio": 4.0, "num_operai": 2}
+STAT_COLUMNS = ("peso_ferro", "peso_legno", "peso_tot", "viti", "tavole_legno", "tagli_legno", "mq_tavole")
+QUOTE_COLUMNS = ("costo_vivo", "price_ex_vat", "vat", "price_total", "logistics_price", "days_total")
+
+def load_price_list(path):
+    # Come load_costs_config in Moby.py: il file sovrascrive solo le chiavi che contiene
+    cfg = DEFAULT_COSTS.copy()
+    with open(path, "r") as f: cfg.update(json.load(f))
+    return cfg
+
+def project_files(paths):
+    files = []
+    for p in map(Path, paths): files += sorted(p.glob("*.json")) if p.is_dir() else [p]
+    return [str(f) for f in files]
+
+def project_rows(files, board_cfgs):
+    # Eseguito nei worker: una riga per (file, configurazione tavole e carichi); i file illeggibili diventano righe con 'errore'
+    rows = []
+    for path in files:
+        try:
+            with open(path, "r") as f: project = normalize_project(json.load(f))
+            base = {"file": path, "progetto": project['project_name'], "cliente": project['client_name'], "moduli": project['num_colonne']}
+            base.update(get_stats(project))
+            for b, board_cfg in enumerate(board_cfgs):
+                checks = get_validation(project, board_cfg)
+                rows.append(dict(base, _b=b, **plan_stats(get_wood_plan([project], board_cfg)), errori_verifica=checks['errori'], avvisi_verifica=checks['avvisi'],
+                                 _violazioni=[dict(v, file=path) for v in checks['violazioni']]))
+        except Exception as e: rows.append({"file": path, "errore": f"{type(e).__name__}: {e}"})
+    return rows
+
+def collect_rows(files, board_cfgs, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(files) < 2 * workers: return project_rows(files, board_cfgs)
+    from .package import get_process_pool, pool_chunks
+    pool = get_process_pool(workers)
+    # Piu' blocchi che worker: i progetti grandi non lasciano processi fermi a fine lotto
+    futures = [pool.submit(project_rows, chunk, board_cfgs) for chunk in pool_chunks(files, workers * 4)]
+    return [row for fut in futures for row in fut.result()]
+
+def quote_batch(files, price_lists, user_inputs=None, start_date=None, workers=None):
+    # price_lists: {nome: configurazione costi}. Restituisce (report, errori, verifiche) come DataFrame
+    names = list(price_lists); cfgs = [price_lists[n] for n in names]
+    # Piano di taglio e verifiche dipendono solo da tavole e carichi del listino: si calcolano una volta per configurazione distinta
+    board_keys = []; board_cfgs = []; board_of = []
+    for cfg in cfgs:
+        bc = {k: cfg[k] for k in BOARD_KEYS + VALIDATION_KEYS if k in cfg}; k = project_hash(bc)
+        if k not in board_keys: board_keys.append(k); board_cfgs.append(bc)
+        board_of.append(board_keys.index(k))
+    rows = collect_rows(files, board_cfgs, workers)
+    errors = pd.DataFrame([r for r in rows if 'errore' in r], columns=["file", "errore"])
+    # Ogni listino usa le statistiche calcolate con le sue tavole e i suoi carichi: join (progetto x listino) in forma colonnare
+    pairs = pd.DataFrame({"listino": names, "_b": board_of, "_l": range(len(names))})
+    checks = pd.DataFrame([dict(v, _b=r['_b']) for r in rows for v in r.pop('_violazioni', [])],
+                          columns=["file", "modulo", "mensola", "tipo", "gravita", "valore", "limite", "messaggio", "_b"])
+    checks = checks.merge(pairs, on="_b").sort_values(["file", "_l"], kind="stable").drop(columns=["_b", "_l"]).reset_index(drop=True)
+    stats = pd.DataFrame([r for r in rows if 'errore' not in r])
+    if stats.empty: return pd.DataFrame(), errors, checks
+    df = stats.merge(pairs, on="_b").drop(columns="_b").sort_values(["file", "_l"], kind="stable").reset_index(drop=True)
+    cfg_keys = sorted({k for c in cfgs for k, v in c.items() if isinstance(v, (int, float))})
+    l_idx = df['_l'].to_numpy()
+    cfg_cols = {k: np.array([c[k] if k in c else np.nan for c in cfgs], dtype=np.float64)[l_idx] for k in cfg_keys}
+    cfg_cols = {k: v for k, v in cfg_cols.items() if not np.isnan(v).any()}  # chiavi mancanti: valore di default della formula
+    inputs = dict(DEFAULT_BATCH_INPUTS); inputs.update(user_inputs or {}); inputs['num_cols'] = df['moduli'].to_numpy()
+    res = calculate_quote_vec({k: df[k].to_numpy() for k in STAT_COLUMNS if k in df}, inputs, cfg_cols)
+    for k in QUOTE_COLUMNS: df[k] = res[k]
+    start = pd.Timestamp(start_date or date.today())
+    df['delivery_date'] = (start + pd.to_timedelta(df['days_total'], unit="D")).dt.strftime("%d/%m/%Y")
+    df['logistics_type'] = inputs['logistics_type']
+    return df.drop(columns="_l"), errors, checks
+
+def write_report(df, path):
+    if str(path).endswith(".parquet"):
+        try: df.to_parquet(path, index=False)
+        except ImportError as e: raise RuntimeError("Per il formato Parquet serve pyarrow (pip install pyarrow)") from e
+    else: df.to_csv(path, index=False)
+
+# --- CLI ---
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m engine.batch", description="Preventivi in blocco su progetti salvati")
+    ap.add_argument("progetti", nargs="+", help="file JSON di progetto o cartelle che li contengono")
+    ap.add_argument("--listini", nargs="+", default=[], help="configurazioni costi (formato tempicosti_default.json); default: DEFAULT_COSTS")
+    ap.add_argument("--out", default="preventivi.csv", help="report .csv o .parquet")
+    ap.add_argument("--errori", help="CSV dei file non elaborati")
+    ap.add_argument("--verifiche", help="CSV delle violazioni geometriche e strutturali (una riga per violazione e listino)")
+    ap.add_argument("--workers", type=int, default=None, help="processi paralleli (default: CPU disponibili)")
+    ap.add_argument("--data", help="data conferma AAAA-MM-GG (default: oggi)")
+    ap.add_argument("--montaggio", action="store_true", help="consegna con nostro montaggio invece del corriere")
+    ap.add_argument("--stock-ferro", action="store_true"); ap.add_argument("--stock-legno", action="store_true")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    price_lists = {Path(p).stem: load_price_list(p) for p in args.listini} or {"default": DEFAULT_COSTS.copy()}
+    user_inputs = {"stock_iron": args.stock_ferro, "stock_wood": args.stock_legno, "logistics_type": "nostro_montaggio" if args.montaggio else "corriere"}
+    files = project_files(args.progetti)
+    df, errors, checks = quote_batch(files, price_lists, user_inputs, date.fromisoformat(args.data) if args.data else None, args.workers)
+    write_report(df, args.out)
+    if args.errori: errors.to_csv(args.errori, index=False)
+    if args.verifiche: checks.to_csv(args.verifiche, index=False)
+    print(f"{len(files)} progetti x {len(price_lists)} listini -> {len(df)} righe in {args.out} ({time.perf_counter() - t0:.2f} s)")
+    if not checks.empty: print(f"{checks['file'].nunique()} progetti con violazioni: {(checks['gravita'] == 'errore').sum()} errori, {(checks['gravita'] == 'avviso').sum()} avvisi")
+    if not df.empty: print(df.groupby("listino", sort=False)[["costo_vivo", "price_total"]].sum().round(2).to_string())
+    for _, e in errors.iterrows(): print(f"ERRORE {e['file']}: {e['errore']}", file=sys.stderr)
+    return 1 if len(errors) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import bisect
+
+from .model import DEFAULT_COSTS
+
+# --- TAGLIO TAVOLE LEGNO (CUTTING STOCK 1D) ---
+# Le mensole (w x d) si ricavano da tavole commerciali: ogni tavola viene rifilata una volta alla
+# profondita' d e poi troncata in pezzi lungo w. Misure in cm.
+BOARD_KEYS = ("tavole_lunghezze", "tavole_larghezze", "kerf_legno")
+DEFAULT_BOARDS = {k: DEFAULT_COSTS[k] for k in BOARD_KEYS}
+EPS = 1e-6
+
+def wood_pieces(wood_list, prefix=""):
+    return [{"lbl": f"{prefix}{i+1}", "w": float(p['w']), "d": float(p['d'])} for i, p in enumerate(wood_list)]
+
+def _best_fit_decreasing(lengths, board_len, kerf):
+    # Best-fit decreasing: ogni pezzo va nella tavola aperta con meno residuo sufficiente
+    boards = []; free = []  # free: lista ordinata di (residuo, indice tavola)
+    for n in sorted(range(len(lengths)), key=lambda k: -lengths[k]):
+        p = lengths[n]; pos = bisect.bisect_left(free, (p - EPS, -1))
+        if pos < len(free): rem, b = free.pop(pos)
+        else: rem, b = board_len, len(boards); boards.append([])
+        boards[b].append(n); rem = rem - p - kerf
+        if rem > EPS: bisect.insort(free, (rem, b))
+    return boards
+
+def optimize_boards(pieces, board_cfg=None):
+    # board_cfg puo' essere direttamente la configurazione costi: si leggono solo le chiavi delle tavole
+    cfg = dict(DEFAULT_BOARDS); cfg.update({k: v for k, v in (board_cfg or {}).items() if k in BOARD_KEYS})
+    lengths = sorted(float(x) for x in cfg['tavole_lunghezze']); widths = sorted(float(x) for x in cfg['tavole_larghezze']); kerf = float(cfg['kerf_legno'])
+    groups = {}; fuori_misura = []
+    for pc in pieces:
+        if pc['w'] > lengths[-1] + EPS: fuori_misura.append(pc['lbl']); continue
+        stock_w = next((x for x in widths if x >= pc['d'] - EPS), None)
+        if stock_w is None: fuori_misura.append(pc['lbl']); continue
+        groups.setdefault((stock_w, pc['d']), []).append(pc)
+    tavole = []
+    for (stock_w, d), group in sorted(groups.items()):
+        group_len = [pc['w'] for pc in group]
+        for content in _best_fit_decreasing(group_len, lengths[-1], kerf):
+            used = sum(group_len[k] for k in content) + kerf * (len(content) - 1)
+            board_len = next(x for x in lengths if x >= used - EPS)  # tavola piu' corta che contiene tutto
+            cross = len(content) if board_len - used > EPS else len(content) - 1
+            rip = 1 if stock_w - d > EPS else 0
+            tavole.append({"lunghezza": board_len, "larghezza": stock_w, "profondita": d, "pezzi": [group[k]['w'] for k in content],
+                           "etichette": [group[k]['lbl'] for k in content], "tagli": cross + rip, "scarto": 1.0 - (sum(group_len[k] for k in content) * d) / (board_len * stock_w)})
+    mq_tavole = sum(t['lunghezza'] * t['larghezza'] for t in tavole) / 10000.0
+    return {"config": cfg, "tavole": tavole, "n_tavole": len(tavole), "tagli": sum(t['tagli'] for t in tavole), "mq_tavole": mq_tavole, "fuori_misura": fuori_misura}
+
+def plan_stats(plan):
+    # Campi extra per calculate_quote: tavole realmente acquistate e tagli realmente eseguiti
+    return {"tavole_legno": plan['n_tavole'], "tagli_legno": plan['tagli'], "mq_tavole": plan['mq_tavole']}
+
+def plan_table(plan):
+    rows = {}
+    for t in plan['tavole']:
+        k = (t['lunghezza'], t['larghezza'], t['profondita'])
+        row = rows.setdefault(k, {"Tavola": f"{t['lunghezza']:.0f} x {t['larghezza']:.0f}", "Rifilo P": t['profondita'], "Quantità": 0, "Pezzi": 0, "Tagli": 0, "Scarto %": 0.0})
+        row["Quantità"] += 1; row["Pezzi"] += len(t['pezzi']); row["Tagli"] += t['tagli']; row["Scarto %"] += t['scarto'] * 100.0
+    for row in rows.values(): row["Scarto %"] /= row["Quantità"]
+    return list(rows.values())
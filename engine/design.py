@@ -0,0 +1,113 @@
+import os
+import time
+
+import numpy as np
+
+from .model import SPESSORE_LEGNO, SPESSORE_FERRO, PESO_SPECIFICO_FERRO, PESO_SPECIFICO_LEGNO, MODULE_LIMITS, MAX_MODULES, MAX_SHELVES, normalize_project
+from .cutting import BOARD_KEYS, DEFAULT_BOARDS, optimize_boards, plan_stats
+from .quote import calculate_quote_vec
+from .nesting import DEFAULT_SHEET
+from .pipeline import get_quote_stats, get_nesting
+
+# --- RICERCA PROGETTO ---
+# Data la larghezza della parete (misurata come LARGHEZZA TOT del prospetto: somma di w + 2 montanti per modulo),
+# tutte le pareti di moduli a larghezza standard che la rispettano, con altezza e numero di mensole uguali per
+# tutti i moduli (mensole automatiche) e interasse tra le mensole nei limiti richiesti.
+# Candidato = quanti moduli per ogni larghezza ammessa x altezza x mensole. Pesi e viti hanno forma chiusa (le
+# stesse somme di compute_stats) e il preventivo gira su array (calculate_quote_vec); il piano di taglio legno
+# non dipende dall'altezza, quindi si calcola una volta per (larghezze, mensole), sui processi se sono tanti.
+# I primi N passano dalla pipeline completa: statistiche, piano di taglio e nesting delle lamiere.
+DESIGN_METRICS = {"price_total": "Prezzo Ivato €", "costo_vivo": "Costo Vivo €", "scarto_legno": "Scarto Tavole %", "days_total": "Giorni Consegna"}
+MAX_CANDIDATES = 500_000
+
+def wall_width(cols): return sum(c['w'] + 2 * SPESSORE_FERRO for c in cols)
+
+def width_combos(target, tol, widths, max_modules=MAX_MODULES):
+    # Vettori di conteggi (uno per larghezza) con larghezza totale in [target - tol, target + tol]
+    units = [w + 2 * SPESSORE_FERRO for w in widths]; lo, hi = target - tol, target + tol; out = []
+    def walk(k, counts, total, n):
+        if k == len(units):
+            if n and lo - 1e-9 <= total: out.append(counts)
+            return
+        for c in range(min(int((hi + 1e-9 - total) // units[k]), max_modules - n) + 1):
+            walk(k + 1, counts + [c], total + c * units[k], n + c)
+            if len(out) > MAX_CANDIDATES: raise ValueError("Troppe combinazioni di moduli: ridurre la tolleranza o le larghezze ammesse")
+    walk(0, [], 0.0, 0)
+    return np.array(out, dtype=np.int64).reshape(-1, len(widths))
+
+def shelf_options(heights, spacing_min, spacing_max):
+    # (altezza, mensole) con interasse delle mensole automatiche (h - spessore) / (r - 1) nei limiti
+    pairs = []
+    for h in heights:
+        for r in range(2, MAX_SHELVES + 1):
+            step = (h - SPESSORE_LEGNO) / (r - 1)
+            if spacing_min - 1e-9 <= step <= spacing_max + 1e-9: pairs.append((float(h), r))
+    return pairs
+
+def _plan_rows(keys, widths, d, board_cfg):
+    # Eseguito anche nei worker: piano di taglio per ogni (conteggi, mensole), con le mensole come nella geometria
+    rows = []
+    for counts, r in keys:
+        pieces = [{"lbl": str(i), "w": float(w), "d": float(d)} for i, w in enumerate(w for w, c in zip(widths, counts) for _ in range(c * r))]
+        plan = optimize_boards(pieces, board_cfg); rows.append(dict(plan_stats(plan), fuori_misura=len(plan['fuori_misura'])))
+    return rows
+
+def board_plans(keys, widths, d, board_cfg, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(keys) < 500: return _plan_rows(keys, widths, d, board_cfg)
+    from .package import get_process_pool, pool_chunks
+    pool = get_process_pool(workers)
+    futures = [pool.submit(_plan_rows, chunk, widths, d, board_cfg) for chunk in pool_chunks(keys, workers * 4)]
+    return [row for fut in futures for row in fut.result()]
+
+def layout_cols(widths, counts, h, d, r):
+    # Moduli della parete proposta: i piu' larghi al centro, gli altri alternati ai lati
+    order = sorted((w for w, c in zip(widths, counts) for _ in range(int(c))), reverse=True); left = []; right = []
+    for i, w in enumerate(order): (right if i % 2 else left).append(w)
+    return [{"w": float(w), "h": float(h), "d": float(d), "r": int(r)} for w in left[::-1] + right]
+
+def design_search(project, cfg, user_inputs, target, widths, heights, spacing=(25.0, 45.0), depth=30.0, tol=5.0, max_modules=20,
+                  top=10, metric="price_total", sheet_cfg=None, workers=None):
+    t0 = time.perf_counter()
+    widths = sorted({float(w) for w in widths if MODULE_LIMITS['w'][0] <= w <= MODULE_LIMITS['w'][1]})
+    heights = sorted({float(h) for h in heights if MODULE_LIMITS['h'][0] <= h <= MODULE_LIMITS['h'][1]})
+    if not widths or not heights: raise ValueError("Servono almeno una larghezza e un'altezza nei limiti dei moduli")
+    combos = width_combos(target, tol, widths, min(max_modules, MAX_MODULES)); pairs = shelf_options(heights, *spacing)
+    n_cand = len(combos) * len(pairs)
+    if not n_cand: return {"righe": [], "progetti": [], "candidati": 0, "piani_taglio": 0, "tempo_s": time.perf_counter() - t0}
+    if n_cand > MAX_CANDIDATES: raise ValueError(f"{n_cand} candidati: ridurre tolleranza, larghezze o altezze")
+    # Un candidato per (combinazione, altezza/mensole): indici in forma colonnare
+    ci = np.repeat(np.arange(len(combos)), len(pairs)); pi = np.tile(np.arange(len(pairs)), len(combos))
+    h = np.array([p[0] for p in pairs])[pi]; r = np.array([p[1] for p in pairs], dtype=np.int64)[pi]
+    w_arr = np.array(widths); n_mod = combos.sum(axis=1)[ci]; sum_w = (combos @ w_arr)[ci]; d = float(depth)
+    peso_ferro = 2 * n_mod * (d * h * SPESSORE_FERRO) * PESO_SPECIFICO_FERRO / 1000.0
+    peso_legno = r * sum_w * d * SPESSORE_LEGNO * PESO_SPECIFICO_LEGNO / 1000.0
+    # Piano di taglio per (combinazione, mensole) distinti
+    board_cfg = {k: cfg[k] for k in BOARD_KEYS if k in cfg} or dict(DEFAULT_BOARDS)
+    plan_key, plan_idx = np.unique(np.stack([ci, r], axis=1), axis=0, return_inverse=True); plan_idx = plan_idx.reshape(-1)
+    plans = board_plans([(combos[c].tolist(), int(rr)) for c, rr in plan_key], widths, d, board_cfg, workers)
+    col = lambda k: np.array([p[k] for p in plans], dtype=np.float64)[plan_idx]
+    stats = {"peso_ferro": peso_ferro, "peso_legno": peso_legno, "peso_tot": peso_ferro + peso_legno, "viti": n_mod * r * 6,
+             "tavole_legno": col('tavole_legno'), "tagli_legno": col('tagli_legno'), "mq_tavole": col('mq_tavole')}
+    inputs = dict(user_inputs); inputs['num_cols'] = n_mod
+    res = calculate_quote_vec(stats, inputs, cfg)
+    net_mq = r * sum_w * d / 10000.0
+    res['scarto_legno'] = np.divide(stats['mq_tavole'] - net_mq, stats['mq_tavole'], out=np.zeros_like(net_mq), where=stats['mq_tavole'] > 0) * 100.0
+    tot_width = sum_w + n_mod * 2 * SPESSORE_FERRO; dev = np.abs(tot_width - target)
+    # Ordine: grandezza scelta, poi scarto dalla larghezza richiesta, poi meno moduli; fuori misura in fondo
+    valid = col('fuori_misura') == 0
+    best = np.lexsort((n_mod, dev, res[metric], ~valid))[:top]; best = best[valid[best]]
+    sheet_cfg = sheet_cfg or DEFAULT_SHEET; rows = []; projects = []
+    for i in best:
+        c = combos[ci[i]]
+        p = normalize_project(dict(project, cols=layout_cols(widths, c, h[i], d, r[i])))
+        # Verifica sulla pipeline completa (statistiche, piano di taglio) e fogli di lamiera dal nesting
+        exact = calculate_quote_vec(get_quote_stats(p, cfg), dict(inputs, num_cols=p['num_colonne']), cfg)
+        nest = get_nesting([p], sheet_cfg)
+        rows.append({"Moduli": " + ".join(f"{int(n)}×{w:g}" for w, n in zip(widths, c) if n), "N.": int(n_mod[i]), "Larghezza Tot (cm)": round(float(tot_width[i]), 1),
+                     "H (cm)": float(h[i]), "Mensole": int(r[i]), "Interasse (cm)": round(float((h[i] - SPESSORE_LEGNO) / (r[i] - 1)), 1),
+                     "Prezzo Ivato €": round(float(exact['price_total']), 2), "Costo Vivo €": round(float(exact['costo_vivo']), 2), "Giorni": int(exact['days_total']),
+                     "Peso (kg)": round(float(stats['peso_tot'][i]), 1), "Tavole": int(stats['tavole_legno'][i]), "Scarto Tavole %": round(float(res['scarto_legno'][i]), 1),
+                     "Fogli Lamiera": len(nest['sheets']), "Utilizzo Lamiera %": round(100.0 * float(np.mean([sh['utilizzo'] for sh in nest['sheets']])) if nest['sheets'] else 0.0, 1)})
+        projects.append(p)
+    return {"righe": rows, "progetti": projects, "candidati": n_cand, "piani_taglio": len(plans), "tempo_s": time.perf_counter() - t0}
@@ -0,0 +1,49 @@
+import io
+
+from .model import DIAMETRO_FORO
+
+# --- DXF ENGINE ---
+# Le funzioni layout_* disegnano su qualunque documento con l'interfaccia di ezdxf usata qui
+# (blocks.new, modelspace, add_lwpolyline/add_circle/add_text/add_blockref): lo stesso codice
+# produce sia il documento ezdxf sia il DXF in streaming di engine/dxf_stream.py.
+DXF_LAYERS = [('TAGLIO',1), ('FORI',5), ('INFO',3)]
+
+def create_dxf_doc():
+    import ezdxf  # solo qui: lo streaming e il resto dell'app non lo caricano
+    doc = ezdxf.new();
+    for name, col in DXF_LAYERS: doc.layers.new(name=name, dxfattribs={'color': col})
+    return doc
+def write_doc(doc): out = io.StringIO(); doc.write(out); return out.getvalue()
+def draw_part_geometry(layout, part, offset_x, offset_y):
+    dim_x, dim_y = part['h'], part['w']; layout.add_lwpolyline([(offset_x, offset_y), (offset_x+dim_x, offset_y), (offset_x+dim_x, offset_y+dim_y), (offset_x, offset_y+dim_y), (offset_x, offset_y)], dxfattribs={'layer': 'TAGLIO'})
+    for hx, hy in part['holes']: layout.add_circle((offset_x + hy, offset_y + hx), radius=DIAMETRO_FORO/2, dxfattribs={'layer': 'FORI'})
+def draw_part_on_dxf(msp, part, offset_x, offset_y, project_name):
+    dim_x, dim_y = part['h'], part['w']; draw_part_geometry(msp, part, offset_x, offset_y)
+    msp.add_text(f"{part['lbl']} | {project_name}", dxfattribs={'layer': 'INFO', 'height': 2.5, 'insert': (offset_x, offset_y + dim_y + 2)}); return dim_x
+
+def layout_single(doc, part, project_name): draw_part_on_dxf(doc.modelspace(), part, 0, 0, project_name)
+def layout_full(doc, part_types, project_name):
+    # Un blocco per tipo di pezzo, un INSERT per ogni copia: la geometria dei pezzi ripetuti e' scritta una volta sola
+    for pt in part_types: draw_part_geometry(doc.blocks.new(name=pt['code']), pt, 0, 0)
+    msp = doc.modelspace(); cursor_y = 0
+    for pt in part_types:
+        for lbl in pt['labels']:
+            msp.add_blockref(pt['code'], (0, cursor_y))
+            msp.add_text(f"{lbl} | {project_name}", dxfattribs={'layer': 'INFO', 'height': 2.5, 'insert': (0, cursor_y + pt['w'] + 2)}); cursor_y += pt['w'] + 15
+def layout_sheet(doc, sheet, sheet_cfg, project_name):
+    # Foglio di lamiera impaginato: contorno del foglio su INFO (non si taglia), pezzi su TAGLIO/FORI
+    msp = doc.modelspace(); L, H = sheet_cfg['lamiera_l'], sheet_cfg['lamiera_h']
+    msp.add_lwpolyline([(0, 0), (L, 0), (L, H), (0, H), (0, 0)], dxfattribs={'layer': 'INFO'})
+    for pl in sheet['parts']:
+        x, y, dx, dy = pl['x'], pl['y'], pl['dx'], pl['dy']
+        msp.add_lwpolyline([(x, y), (x+dx, y), (x+dx, y+dy), (x, y+dy), (x, y)], dxfattribs={'layer': 'TAGLIO'})
+        for hx, hy in pl['holes']: msp.add_circle((x + hx, y + hy), radius=DIAMETRO_FORO/2, dxfattribs={'layer': 'FORI'})
+        insert = (x + dx / 2, y + 2) if pl['rot'] else (x + 2, y + dy / 2)
+        msp.add_text(f"{pl['lbl']} | {project_name}", dxfattribs={'layer': 'INFO', 'height': min(2.5, dy / 4.0), 'rotation': 90 if pl['rot'] else 0, 'insert': insert})
+
+def generate_single_dxf(part, project_name):
+    doc = create_dxf_doc(); layout_single(doc, part, project_name); return write_doc(doc)
+def generate_full_dxf(part_types, project_name):
+    doc = create_dxf_doc(); layout_full(doc, part_types, project_name); return write_doc(doc)
+def generate_sheet_dxf(sheet, sheet_cfg, project_name):
+    doc = create_dxf_doc(); layout_sheet(doc, sheet, sheet_cfg, project_name); return write_doc(doc)
@@ -0,0 +1,99 @@
+import codecs
+import io
+import zipfile
+
+from .dxf import DXF_LAYERS, layout_single, layout_full, layout_sheet
+
+# --- DXF IN STREAMING (R12) ---
+# Scrittore leggero per il nostro insieme ristretto di entita': niente documento in memoria, ogni
+# entita' va direttamente sul file (o sul membro ZIP). Formato R12 (AC1009), il piu' digerito dai
+# software laser: le LWPOLYLINE diventano POLYLINE/VERTEX/SEQEND con gli stessi punti.
+def _num(v): return repr(float(v))
+
+# Codifica dei file R12: cp1252 (ANSI_1252, il default senza $DWGCODEPAGE); i caratteri fuori tabella diventano
+# \U+XXXX come nei file scritti da ezdxf e AutoCAD (oltre il piano base, che \U+ non copre: '?')
+DXF_ENCODING = "cp1252"
+DXF_ERRORS = "moby_dxf_unicode"
+
+def _dxf_unicode(exc):
+    if not isinstance(exc, UnicodeEncodeError): raise exc
+    return "".join(f"\\U+{ord(c):04X}" if ord(c) <= 0xFFFF else "?" for c in exc.object[exc.start:exc.end]), exc.end
+codecs.register_error(DXF_ERRORS, _dxf_unicode)
+
+def encode_dxf(text): return text.replace("\n", "\r\n").encode(DXF_ENCODING, errors=DXF_ERRORS)
+
+class _StreamLayout:
+    def __init__(self, doc): self.doc = doc
+
+    def add_lwpolyline(self, points, dxfattribs=None):
+        layer = (dxfattribs or {}).get('layer', '0'); w = self.doc._write
+        w(f"0\nPOLYLINE\n8\n{layer}\n66\n1\n70\n0\n10\n0.0\n20\n0.0\n30\n0.0\n")
+        for p in points: w(f"0\nVERTEX\n8\n{layer}\n10\n{_num(p[0])}\n20\n{_num(p[1])}\n30\n0.0\n")
+        w(f"0\nSEQEND\n8\n{layer}\n")
+
+    def add_circle(self, center, radius, dxfattribs=None):
+        layer = (dxfattribs or {}).get('layer', '0')
+        self.doc._write(f"0\nCIRCLE\n8\n{layer}\n10\n{_num(center[0])}\n20\n{_num(center[1])}\n30\n0.0\n40\n{_num(radius)}\n")
+
+    def add_text(self, text, dxfattribs=None):
+        a = dxfattribs or {}; x, y = a.get('insert', (0, 0))[:2]
+        rot = f"50\n{_num(a['rotation'])}\n" if a.get('rotation') else ""
+        self.doc._write(f"0\nTEXT\n8\n{a.get('layer', '0')}\n10\n{_num(x)}\n20\n{_num(y)}\n30\n0.0\n40\n{_num(a.get('height', 2.5))}\n1\n{text}\n{rot}")
+
+    def add_blockref(self, name, insert, dxfattribs=None):
+        layer = (dxfattribs or {}).get('layer', '0')
+        self.doc._write(f"0\nINSERT\n8\n{layer}\n2\n{name}\n10\n{_num(insert[0])}\n20\n{_num(insert[1])}\n30\n0.0\n")
+
+class _StreamBlocks:
+    def __init__(self, doc): self.doc = doc
+    def new(self, name):
+        self.doc._section("BLOCKS"); self.doc._end_block()
+        self.doc._write(f"0\nBLOCK\n8\n0\n2\n{name}\n70\n0\n10\n0.0\n20\n0.0\n30\n0.0\n3\n{name}\n"); self.doc._open_block = True
+        return _StreamLayout(self.doc)
+
+class StreamDXF:
+    # Le sezioni vanno scritte in ordine: tutti i blocchi prima della modelspace, come fanno le funzioni layout_*
+    def __init__(self, fp, layers=DXF_LAYERS):
+        self.fp = fp; self._current = None; self._open_block = False; self.blocks = _StreamBlocks(self); self._msp = _StreamLayout(self)
+        self._write("0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n0\nENDSEC\n")
+        self._write("0\nSECTION\n2\nTABLES\n0\nTABLE\n2\nLTYPE\n70\n1\n0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n0\nENDTAB\n")
+        self._write(f"0\nTABLE\n2\nLAYER\n70\n{len(layers) + 1}\n0\nLAYER\n2\n0\n70\n0\n62\n7\n6\nCONTINUOUS\n")
+        for name, col in layers: self._write(f"0\nLAYER\n2\n{name}\n70\n0\n62\n{col}\n6\nCONTINUOUS\n")
+        self._write("0\nENDTAB\n0\nENDSEC\n")
+
+    def _write(self, s): self.fp.write(s)
+
+    def _end_block(self):
+        if self._open_block: self._write("0\nENDBLK\n8\n0\n"); self._open_block = False
+
+    def _section(self, name):
+        if self._current == name: return
+        if self._current is not None: self._end_block(); self._write("0\nENDSEC\n")
+        self._write(f"0\nSECTION\n2\n{name}\n"); self._current = name
+
+    def modelspace(self): self._section("ENTITIES"); return self._msp
+
+    def close(self):
+        self._section("ENTITIES"); self._write("0\nENDSEC\n0\nEOF\n"); self._current = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc):
+        if exc[0] is None: self.close()
+
+# --- API ---
+def stream_single_dxf(fp, part, project_name):
+    with StreamDXF(fp) as doc: layout_single(doc, part, project_name)
+def stream_full_dxf(fp, part_types, project_name):
+    with StreamDXF(fp) as doc: layout_full(doc, part_types, project_name)
+def stream_sheet_dxf(fp, sheet, sheet_cfg, project_name):
+    with StreamDXF(fp) as doc: layout_sheet(doc, sheet, sheet_cfg, project_name)
+
+def open_dxf_member(zf, arcname):
+    # Membro ZIP in scrittura come file di testo: i byte vengono compressi mentre si scrive
+    return io.TextIOWrapper(zf.open(arcname, "w", force_zip64=True), encoding=DXF_ENCODING, errors=DXF_ERRORS, newline="\r\n")
+
+def stream_dxf_zip(fp, jobs):
+    # jobs: lista di (nome_file, funzione stream_*, argomenti) -> archivio ZIP scritto su fp
+    with zipfile.ZipFile(fp, "w", zipfile.ZIP_DEFLATED) as zf:
+        for arcname, fn, args in jobs:
+            with open_dxf_member(zf, arcname) as member: fn(member, *args)
@@ -0,0 +1,133 @@
+import numpy as np
+
+from .model import SPESSORE_LEGNO, SPESSORE_FERRO, OFFSET_LATERALI, PESO_SPECIFICO_FERRO, PESO_SPECIFICO_LEGNO, module_letter, shelf_heights
+from .mesh import boxes_to_mesh, mesh_from_arrays
+
+# --- GEOMETRIA MODULI ---
+# Ogni modulo dipende solo dai propri parametri (w, h, d, r, quote manuali): mensole, fori, solidi e
+# contributi a pesi e distinte si calcolano una volta per modulo (engine/pipeline.py li tiene in cache
+# per firma del modulo). La parete compone i moduli: lettere, etichette e posizioni sono la sola parte globale.
+def build_module(col):
+    w, h, d, r = col['w'], col['h'], col['d'], col['r']
+    z_shelves = shelf_heights(h, r, col['manual'], col['man_heights'])
+    holes_coords = []
+    for z in z_shelves:
+        cy = z + (SPESSORE_LEGNO / 2.0); holes_coords.append((OFFSET_LATERALI, cy)); holes_coords.append((d / 2.0, cy)); holes_coords.append((d - OFFSET_LATERALI, cy))
+    # Centri dei fori lungo il montante (piede e testa compresi): quote di prospetto e dettaglio PDF
+    centers = [SPESSORE_LEGNO/2.0] + [z + SPESSORE_LEGNO/2.0 for z in sorted(z_shelves)] + [h - SPESSORE_LEGNO/2.0]
+    return {"w": w, "h": h, "d": d, "r": r, "man": col['manual'], "mh": z_shelves, "fori": centers, "holes": holes_coords,
+            "sig": part_signature({"w": d, "h": h, "holes": holes_coords}), "vol_ferro": d * h * SPESSORE_FERRO, "vol_legno": w * d * SPESSORE_LEGNO,
+            "z": np.array(z_shelves, dtype=np.float64).reshape(-1), "size_ferro": (SPESSORE_FERRO, d, h), "size_legno": (w, d, SPESSORE_LEGNO)}
+
+def build_geometry(cols, modules=None):
+    # modules: geometrie gia' pronte dei singoli moduli (stesso ordine di cols)
+    if modules is None: modules = [build_module(col) for col in cols]
+    dati_colonne = []; parts_list = []; wood_list = []; iron_stats_list = []; types = {}
+    for i, m in enumerate(modules):
+        letter = module_letter(i); w, h, d, r = m['w'], m['h'], m['d'], m['r']
+        dati_colonne.append({"w":w, "h":h, "d":d, "r":r, "man":m['man'], "mh":m['mh'], "fori": m['fori'], "letter": letter})
+        parts_list.append({"w": d, "h": h, "lbl": f"Mod_{letter}_SX", "holes": m['holes']})
+        parts_list.append({"w": d, "h": h, "lbl": f"Mod_{letter}_DX", "holes": m['holes']})
+        iron_stats_list.append({"Altezza": h, "Profondità": d}); iron_stats_list.append({"Altezza": h, "Profondità": d})
+        for _ in range(r): wood_list.append({"w": w, "d": d})
+        pt = types.get(m['sig'])
+        if pt is None: pt = types[m['sig']] = {"code": f"P{len(types)+1:02d}", "h": h, "w": d, "holes": m['holes'], "qty": 0, "labels": []}
+        pt['qty'] += 2; pt['labels'] += [f"Mod_{letter}_SX", f"Mod_{letter}_DX"]
+    return {"cols": dati_colonne, "parts": parts_list, "wood": wood_list, "iron": iron_stats_list, "part_types": list(types.values()), "modules": modules}
+
+# --- TIPI DI PEZZO (BOM DEDUPLICATA) ---
+# Le piastre SX/DX di un modulo, e i moduli uguali tra loro, sono lo stesso pezzo: la firma geometrica
+# (h, w, fori) li raggruppa in un tipo unico con quantita' ed etichette, usato da DXF, PDF e anteprima.
+def part_signature(part): return (part['h'], part['w'], tuple((round(hx, 3), round(hy, 3)) for hx, hy in part['holes']))
+
+# --- STATISTICHE & DISTINTE ---
+# Somme e conteggi per modulo (due piastre, r mensole uguali): nessun lavoro per mensola o per foro
+def compute_stats(geo):
+    vol_ferro = 0; vol_legno = 0; n_legno = 0
+    for m in geo['modules']:
+        vol_ferro += 2 * m['vol_ferro']; vol_legno += m['r'] * m['vol_legno']; n_legno += m['r']
+    peso_ferro = (vol_ferro * PESO_SPECIFICO_FERRO) / 1000.0; peso_legno = (vol_legno * PESO_SPECIFICO_LEGNO) / 1000.0
+    return {"peso_ferro": peso_ferro, "peso_legno": peso_legno, "peso_tot": peso_ferro + peso_legno, "viti": n_legno * 6}
+
+def bom_tables(geo):
+    wood = {}; iron = {}
+    for m in geo['modules']:
+        k = (m['w'], m['d']); wood[k] = wood.get(k, 0) + m['r']
+        k = (m['h'], m['d']); iron[k] = iron.get(k, 0) + 2
+    # Righe come dizionari (st.dataframe le mostra come tabella): pandas non serve per due conteggi
+    distinta_legno = [{"Larghezza": w, "Profondità": d, "Pezzi": n, "Metri Totali": (w * n) / 100.0} for (w, d), n in sorted(wood.items())]
+    distinta_ferro = [{"Altezza": h, "Profondità": d, "Pezzi": n} for (h, d), n in sorted(iron.items())]
+    return distinta_legno, distinta_ferro
+
+# --- VISTA 3D ---
+def iter_boxes(cols_data):
+    # (x, y, z, dx, dy, dz, materiale, nome) per ogni solido della libreria, nello stesso ordine della vista 3D
+    cx = 0
+    for dc in cols_data:
+        lbl = f"Mod {dc['letter']}"; yield (cx, 0, 0, SPESSORE_FERRO, dc["d"], dc["h"], "ferro", f"Ferro SX {lbl}"); cx += SPESSORE_FERRO
+        for idx, z in enumerate(dc["mh"]): yield (cx, 0, z, dc["w"], dc["d"], SPESSORE_LEGNO, "legno", f"Piano {idx+1} {lbl}")
+        cx += dc["w"]; yield (cx, 0, 0, SPESSORE_FERRO, dc["d"], dc["h"], "ferro", f"Ferro DX {lbl}"); cx += SPESSORE_FERRO
+
+def wall_arrays(geo):
+    # Come box_arrays(iter_boxes(geo['cols'])), ma composto dai solidi dei moduli in cache: in Python resta
+    # solo il passo lungo x, il resto e' concatenazione di array
+    modules = geo['modules']; n = len(modules); xs = np.empty((n, 3)); cx = 0
+    for i, m in enumerate(modules):
+        xs[i, 0] = cx; cx += SPESSORE_FERRO; xs[i, 1] = cx; cx += m['w']; xs[i, 2] = cx; cx += SPESSORE_FERRO
+    counts = np.array([m['r'] for m in modules], dtype=np.int64); letters = [dc['letter'] for dc in geo['cols']]
+    origins_f = np.zeros((2 * n, 3)); origins_f[:, 0] = xs[:, [0, 2]].reshape(-1)
+    origins_l = np.zeros((int(counts.sum()), 3)); origins_l[:, 0] = np.repeat(xs[:, 1], counts)
+    origins_l[:, 2] = np.concatenate([m['z'] for m in modules]) if n else []
+    return {
+        "ferro": {"origins": origins_f, "sizes": np.repeat(np.array([m['size_ferro'] for m in modules], dtype=np.float64).reshape(-1, 3), 2, axis=0),
+                  "names": [f"Ferro {side} Mod {lt}" for lt in letters for side in ("SX", "DX")]},
+        "legno": {"origins": origins_l, "sizes": np.repeat(np.array([m['size_legno'] for m in modules], dtype=np.float64).reshape(-1, 3), counts, axis=0),
+                  "names": [f"Piano {k+1} Mod {lt}" for lt, m in zip(letters, modules) for k in range(m['r'])]},
+    }
+
+def build_mesh(arrays): return mesh_from_arrays(arrays)
+
+MATERIAL_COLORS = {"ferro": '#101010', "legno": '#D2B48C'}
+
+def build_figure(arrays):
+    # Una sola Mesh3d per materiale: il numero di tracce resta 2 qualunque sia la dimensione della parete.
+    # I vertici non sono condivisi tra i box, quindi il testo per vertice fa da etichetta di hover per faccia
+    # (array NumPy: plotly lo valida in blocco invece che stringa per stringa).
+    import plotly.graph_objects as go
+    traces = []; camera = dict(eye=dict(x=0.0, y=-2.5, z=0.1))
+    for mat, arr in arrays.items():
+        verts, faces = boxes_to_mesh(arr['origins'], arr['sizes']); text = np.repeat(np.array(arr['names'], dtype=str), 8)
+        traces.append(go.Mesh3d(x=verts[:, 0], y=verts[:, 1], z=verts[:, 2], i=faces[:, 0], j=faces[:, 1], k=faces[:, 2], color=MATERIAL_COLORS[mat], opacity=1, flatshading=True,
+                                name=mat.capitalize(), text=text, hovertemplate="%{text}<extra></extra>"))
+    fig = go.Figure(traces)
+    fig.update_layout(scene=dict(xaxis=dict(visible=False), yaxis=dict(visible=False), zaxis=dict(title="H"), aspectmode='data', bgcolor="white"), scene_camera=camera, uirevision='constant', margin=dict(t=0,b=0,l=0,r=0), height=600)
+    return fig
+
+# --- ANTEPRIMA TAGLIO ---
+# Tutti i tipi di pezzo impilati lungo y in tre tracce WebGL, qualunque sia il numero di pezzi: contorni
+# come un'unica polilinea interrotta da NaN (null nel JSON di plotly), fori come un'unica nuvola di punti,
+# etichette come un'unica traccia di testo. Prima erano una shape, una traccia e un'annotazione per pezzo.
+def cut_preview_arrays(part_types, gap=30):
+    n = len(part_types)
+    dim_x = np.array([pt['h'] for pt in part_types], dtype=np.float64); dim_y = np.array([pt['w'] for pt in part_types], dtype=np.float64)
+    y0 = np.concatenate(([0.0], np.cumsum(dim_y + gap)[:-1])) if n else dim_y
+    zero = np.zeros(n); nan = np.full(n, np.nan)
+    outline_x = np.stack([zero, dim_x, dim_x, zero, zero, nan], axis=1).reshape(-1)
+    outline_y = np.stack([y0, y0, y0 + dim_y, y0 + dim_y, y0, nan], axis=1).reshape(-1)
+    counts = [len(pt['holes']) for pt in part_types]
+    holes = np.array([h for pt in part_types for h in pt['holes']], dtype=np.float64).reshape(-1, 2)
+    return {"outline_x": outline_x, "outline_y": outline_y, "holes_x": holes[:, 1], "holes_y": np.repeat(y0, counts) + holes[:, 0],
+            "label_x": dim_x / 2, "label_y": y0 + dim_y / 2, "text": [f"{pt['code']} ×{pt['qty']}" for pt in part_types],
+            "hover": [", ".join(pt['labels']) for pt in part_types]}
+
+def build_cut_preview(part_types):
+    import plotly.graph_objects as go
+    a = cut_preview_arrays(part_types)
+    fig_all = go.Figure([
+        go.Scattergl(x=a['outline_x'], y=a['outline_y'], mode='lines', line=dict(color="#E0E0E0", width=2), hoverinfo='skip'),
+        go.Scattergl(x=a['holes_x'], y=a['holes_y'], mode='markers', marker=dict(color='#00FFFF', size=6), hoverinfo='skip'),
+        go.Scattergl(x=a['label_x'], y=a['label_y'], mode='text', text=a['text'], hovertext=a['hover'], hovertemplate="%{hovertext}<extra></extra>",
+                     textfont=dict(size=14, color="white")),
+    ])
+    fig_all.update_layout(xaxis=dict(title="Lunghezza (cm)", showgrid=True), yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, scaleanchor="x", scaleratio=1), height=600, margin=dict(l=10, r=10, t=10, b=10), showlegend=False)
+    return fig_all
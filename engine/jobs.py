@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# --- JOB IN BACKGROUND ---
+# Rendering lunghi (PDF) fuori dal thread della pagina: l'interfaccia resta reattiva e mostra il
+# progresso. Richieste con la stessa chiave (hash del progetto) condividono un solo job; i job finiti
+# restano disponibili come cache di processo, con le piu' vecchie scartate oltre 'keep'.
+class JobManager:
+    def __init__(self, max_workers=2, keep=32):
+        self.keep = keep; self._jobs = OrderedDict(); self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="moby-job")
+
+    def submit(self, key, fn, cache=None):
+        # fn(progress) -> bytes, con progress(frazione, messaggio); il risultato finisce anche in 'cache' (ByteCache)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job['stato'] != "errore": self._jobs.move_to_end(key); return job
+        # La cache puo' leggere dal disco (ArtifactStore): fuori dal lock, poi si ricontrolla chi e' arrivato nel frattempo
+        data = cache.get(key) if cache is not None else None
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job['stato'] != "errore": self._jobs.move_to_end(key); return job
+            job = {"key": key, "stato": "pronto" if data is not None else "in coda", "progress": 1.0 if data is not None else 0.0,
+                   "messaggio": "", "result": data, "errore": None, "inizio": time.time(), "durata": 0.0 if data is not None else None}
+            self._jobs[key] = job; self._trim()
+        if data is None: self._executor.submit(self._run, job, fn, cache)
+        return job
+
+    def _run(self, job, fn, cache):
+        job['stato'] = "in corso"; t0 = time.perf_counter()
+        def progress(frac, msg=""): job['progress'] = frac; job['messaggio'] = msg
+        try:
+            data = fn(progress)
+            if cache is not None: cache.put(job['key'], data)
+            job['result'] = data; job['progress'] = 1.0; job['stato'] = "pronto"
+        except Exception as e: job['errore'] = f"{type(e).__name__}: {e}"; job['stato'] = "errore"
+        job['durata'] = time.perf_counter() - t0
+
+    def _trim(self):
+        done = [k for k, j in self._jobs.items() if j['stato'] in ("pronto", "errore")]
+        for k in done[:max(0, len(self._jobs) - self.keep)]: del self._jobs[k]
+
+    def get(self, key):
+        with self._lock: return self._jobs.get(key)
+
+    def info(self):
+        with self._lock:
+            states = [j['stato'] for j in self._jobs.values()]
+        return {s: states.count(s) for s in ("in coda", "in corso", "pronto", "errore")}
+
+job_manager = JobManager()
@@ -0,0 +1,106 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+
+# --- MESH (NUMPY) ---
+# Ogni solido della libreria e' un parallelepipedo: 8 vertici e 12 triangoli generati in blocco per tutti i box.
+# Triangoli in senso antiorario visti dall'esterno (normali uscenti).
+BOX_CORNERS = np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]], dtype=np.float64)
+BOX_FACES = np.array([[0,2,1],[0,3,2],[4,5,6],[4,6,7],[0,1,5],[0,5,4],[2,3,7],[2,7,6],[0,4,7],[0,7,3],[1,2,6],[1,6,5]], dtype=np.int64)
+
+def box_arrays(boxes):
+    # boxes: tuple (x, y, z, dx, dy, dz, materiale, nome) -> {materiale: {"origins": (N,3), "sizes": (N,3), "names": [N]}}
+    acc = {}
+    for x, y, z, dx, dy, dz, mat, name in boxes:
+        a = acc.setdefault(mat, ([], [], [])); a[0].append((x, y, z)); a[1].append((dx, dy, dz)); a[2].append(name)
+    return {mat: {"origins": np.array(o, dtype=np.float64).reshape(-1, 3), "sizes": np.array(s, dtype=np.float64).reshape(-1, 3), "names": n} for mat, (o, s, n) in acc.items()}
+
+def boxes_to_mesh(origins, sizes):
+    # vertici (N*8, 3) e triangoli (N*12, 3) con indici gia' spostati sul buffer condiviso
+    n = len(origins)
+    verts = (origins[:, None, :] + sizes[:, None, :] * BOX_CORNERS[None, :, :]).reshape(-1, 3)
+    faces = (BOX_FACES[None, :, :] + 8 * np.arange(n, dtype=np.int64)[:, None, None]).reshape(-1, 3)
+    return verts, faces
+
+# --- MESH INDICIZZATA ---
+# Buffer di vertici condiviso + array di triangoli; 'groups' tiene gli intervalli di triangoli per materiale.
+# Un oggetto per progetto (niente liste globali): sessioni concorrenti non si disturbano.
+class Mesh:
+    def __init__(self, vertices, faces, groups):
+        self.vertices = vertices; self.faces = faces; self.groups = groups
+
+    @property
+    def n_triangles(self): return len(self.faces)
+
+def mesh_from_boxes(boxes): return mesh_from_arrays(box_arrays(boxes))
+
+def mesh_from_arrays(arrays):
+    # arrays: {materiale: {"origins", "sizes", ...}} come da box_arrays
+    verts_all = []; faces_all = []; groups = []; v_off = 0; f_off = 0
+    for mat, arr in arrays.items():
+        verts, faces = boxes_to_mesh(arr['origins'], arr['sizes'])
+        verts_all.append(verts); faces_all.append(faces + v_off); groups.append((mat, f_off, f_off + len(faces)))
+        v_off += len(verts); f_off += len(faces)
+    if not verts_all: return Mesh(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64), [])
+    return Mesh(np.concatenate(verts_all), np.concatenate(faces_all), groups)
+
+def face_normals(mesh):
+    tri = mesh.vertices[mesh.faces]; n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    norm = np.linalg.norm(n, axis=1, keepdims=True); norm[norm == 0] = 1.0
+    return n / norm
+
+# --- EXPORT STL / 3MF / GLB ---
+STL_DTYPE = np.dtype([('normal', '<f4', (3,)), ('v', '<f4', (3, 3)), ('attr', '<u2')])
+
+def get_bin_stl(mesh):
+    rec = np.zeros(mesh.n_triangles, dtype=STL_DTYPE)
+    rec['normal'] = face_normals(mesh); rec['v'] = mesh.vertices[mesh.faces]
+    return b'\0'*80 + np.uint32(mesh.n_triangles).tobytes() + rec.tobytes()
+
+def get_3mf(mesh, colors):
+    # Un oggetto per materiale con il proprio colore; unita' in centimetri come il resto del motore
+    objects = []; base = []; items = []
+    for n, (mat, f0, f1) in enumerate(mesh.groups):
+        faces = mesh.faces[f0:f1]; used = np.unique(faces); remap = np.searchsorted(used, faces); verts = mesh.vertices[used]
+        v_xml = "".join(f'<vertex x="{x:.4f}" y="{y:.4f}" z="{z:.4f}"/>' for x, y, z in verts.tolist())
+        t_xml = "".join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in remap.tolist())
+        base.append(f'<base name="{mat}" displaycolor="{colors.get(mat, "#808080")}"/>')
+        objects.append(f'<object id="{n+2}" type="model" name="{mat}" pid="1" pindex="{n}"><mesh><vertices>{v_xml}</vertices><triangles>{t_xml}</triangles></mesh></object>')
+        items.append(f'<item objectid="{n+2}"/>')
+    model = ('<?xml version="1.0" encoding="UTF-8"?>\n<model unit="centimeter" xml:lang="it-IT" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+             f'<resources><basematerials id="1">{"".join(base)}</basematerials>{"".join(objects)}</resources><build>{"".join(items)}</build></model>')
+    content_types = ('<?xml version="1.0" encoding="UTF-8"?>\n<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                     '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/></Types>')
+    rels = ('<?xml version="1.0" encoding="UTF-8"?>\n<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/></Relationships>')
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", content_types); z.writestr("_rels/.rels", rels); z.writestr("3D/3dmodel.model", model)
+    return out.getvalue()
+
+def _hex_to_rgba(color): return [int(color[i:i+2], 16) / 255.0 for i in (1, 3, 5)] + [1.0]
+
+def get_glb(mesh, colors):
+    # glTF 2.0 binario: metri e asse Y verso l'alto (il motore lavora in cm con Z verso l'alto)
+    verts = (mesh.vertices[:, [0, 2, 1]] * np.array([0.01, 0.01, -0.01])).astype('<f4')
+    faces = mesh.faces.astype('<u4')
+    pos_bytes = verts.tobytes(); buffer_views = [{"buffer": 0, "byteOffset": 0, "byteLength": len(pos_bytes), "target": 34962}]
+    accessors = [{"bufferView": 0, "componentType": 5126, "count": len(verts), "type": "VEC3",
+                  "min": verts.min(axis=0).tolist() if len(verts) else [0, 0, 0], "max": verts.max(axis=0).tolist() if len(verts) else [0, 0, 0]}]
+    primitives = []; materials = []; offset = len(pos_bytes)
+    for mat, f0, f1 in mesh.groups:
+        idx = faces[f0:f1].tobytes()
+        buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(idx), "target": 34963}); offset += len(idx)
+        accessors.append({"bufferView": len(buffer_views) - 1, "componentType": 5125, "count": (f1 - f0) * 3, "type": "SCALAR"})
+        materials.append({"name": mat, "pbrMetallicRoughness": {"baseColorFactor": _hex_to_rgba(colors.get(mat, "#808080")), "metallicFactor": 0.5 if mat == "ferro" else 0.0, "roughnessFactor": 0.8}})
+        primitives.append({"attributes": {"POSITION": 0}, "indices": len(accessors) - 1, "material": len(materials) - 1})
+    binary = pos_bytes + b"".join(faces[f0:f1].tobytes() for _, f0, f1 in mesh.groups)
+    binary += b"\0" * (-len(binary) % 4)
+    gltf = {"asset": {"version": "2.0", "generator": "Moby Configurator"}, "scene": 0, "scenes": [{"nodes": [0]}], "nodes": [{"mesh": 0}],
+            "meshes": [{"primitives": primitives}], "materials": materials, "accessors": accessors, "bufferViews": buffer_views, "buffers": [{"byteLength": len(binary)}]}
+    js = json.dumps(gltf, separators=(",", ":")).encode("utf-8"); js += b" " * (-len(js) % 4)
+    header = np.array([0x46546C67, 2, 12 + 8 + len(js) + 8 + len(binary)], dtype='<u4').tobytes()
+    return header + np.array([len(js), 0x4E4F534A], dtype='<u4').tobytes() + js + np.array([len(binary), 0x004E4942], dtype='<u4').tobytes() + binary
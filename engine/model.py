@@ -0,0 +1,136 @@
+import hashlib
+import json
+
+# --- COSTANTI ---
+SPESSORE_LEGNO = 4.0
+SPESSORE_FERRO = 0.3
+DIAMETRO_FORO = 0.6
+OFFSET_LATERALI = 3.0
+PESO_SPECIFICO_FERRO = 7.85
+PESO_SPECIFICO_LEGNO = 0.70
+
+VONTREE_DATA = {
+    "nome": "VONTREE",
+    "payoff": "Design & Produzione",
+    "via": "Via Palazzolo, 123",
+    "citta": "25036 Palazzolo sull'Oglio (BS)",
+    "piva": "P.IVA: 01234567890",
+    "email": "info@vontree.it"
+}
+
+VERSION = "v26.0 Documentation Ready"
+COPYRIGHT = "© Andrea Bossola 2025"
+
+# --- DATI (COSTI & PAGAMENTI) ---
+DEFAULT_COSTS = {
+    "costo_ferro_kg": 0.0, "costo_legno_mq": 0.0, "costo_ora_operaio": 0.0,
+    "markup_percent": 30.0,
+    "gg_ordine_ferro": 1, "gg_arrivo_lastra": 5, "gg_verniciatura_ferro": 5,
+    "gg_ordine_legno": 1, "gg_arrivo_legno": 5, "gg_verniciatura_legno": 3,
+    "gg_attesa_corriere": 2,
+    "min_taglio_legno_pezzo": 0.0, "min_colore_legno_metro": 0.0,
+    "min_preassemblaggio_modulo": 0.0, "min_preassemblaggio_mensola": 0.0,
+    "min_assemblaggio_finale_modulo": 30.0,
+    "ore_pulizia": 2.0, "ore_imballo_base": 1.0, "ore_imballo_extra": 2.0,
+    "costo_imballo_materiale": 20.0, "ore_prep_spedizione": 2.0,
+    "tavole_lunghezze": [250.0, 300.0, 400.0], "tavole_larghezze": [30.0, 40.0, 50.0, 60.0, 80.0, 100.0], "kerf_legno": 0.4,
+    "ore_giorno_laser": 8.0, "ore_giorno_verniciatura": 8.0, "ore_giorno_legno": 8.0, "ore_giorno_assemblaggio": 16.0, "giorni_lavorativi_settimana": 5,
+    "carico_mensola_kg_m2": 150.0, "modulo_elastico_legno": 10000.0, "freccia_limite": 200.0
+}
+DEFAULT_PAYMENTS = ["Rimessa diretta", "30% anticipo / 30% consegna / 40% saldo 30gg", "50% anticipo / 50% alla consegna", "50% anticipo / 50% 30gg dalla consegna", "100% alla consegna", "30% anticipo / 70% alla consegna", "Altro (Specificare)"]
+
+DEFAULT_COL = {"w": 60, "h": 200, "d": 30, "r": 4, "manual": False, "man_heights": []}
+MAX_MODULES = 200
+MAX_SHELVES = 40
+
+# --- HASH CANONICO ---
+# Stesso dict -> stessa stringa, indipendentemente dall'ordine delle chiavi: e' la chiave di tutte le cache.
+def canonical_json(obj): return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+def project_hash(obj): return hashlib.sha1(canonical_json(obj).encode("utf-8")).hexdigest()
+
+# --- MODELLO PROGETTO ---
+def module_letter(i):
+    # A..Z, poi AA, AB, ... come le colonne di un foglio di calcolo
+    letters = ""; i += 1
+    while i: i, rem = divmod(i - 1, 26); letters = chr(65 + rem) + letters
+    return letters
+
+def default_shelf_heights(h, r):
+    # Valori proposti per l'inserimento manuale (interi, ultima mensola in testa al montante)
+    step = (h - SPESSORE_LEGNO)/(r-1) if r > 1 else 0
+    heights = []
+    for k in range(r):
+        val = int(k*step)
+        if k == r-1 and r > 1: val = int(h - SPESSORE_LEGNO)
+        heights.append(val)
+    return heights
+
+def shelf_heights(h, r, manual=False, man_heights=None):
+    if manual:
+        defaults = default_shelf_heights(h, r); mh = list(man_heights or [])
+        return [float(mh[k]) if k < len(mh) else float(defaults[k]) for k in range(r)]
+    if r == 1: return [0.0]
+    step = (h - SPESSORE_LEGNO)/(r-1); return [n*step for n in range(r)]
+
+def normalize_col(col):
+    # Accetta sia il formato salvato ("manual"/"man_heights") sia quello interno ("man"/"mh")
+    manual = bool(col.get('manual', col.get('man', DEFAULT_COL['manual'])))
+    heights = col.get('man_heights', col.get('mh', []))
+    return {
+        "w": col.get('w', DEFAULT_COL['w']), "h": col.get('h', DEFAULT_COL['h']), "d": col.get('d', DEFAULT_COL['d']),
+        "r": int(col.get('r', DEFAULT_COL['r'])), "manual": manual, "man_heights": [float(z) for z in heights]
+    }
+
+def normalize_project(data):
+    cols = [normalize_col(c) for c in data.get('cols', [])]
+    return {
+        "project_name": data.get('project_name', 'Progetto'), "num_colonne": len(cols), "cols": cols,
+        "client_name": data.get('client_name', ''), "client_address": data.get('client_address', ''),
+        "finish_wood": data.get('finish_wood', 'Rovere Naturale'), "finish_iron": data.get('finish_iron', 'Nero Opaco')
+    }
+
+# --- MODELLO COLONNARE (EDITOR TABELLARE) ---
+# Una lista per campo e una posizione per modulo: l'editor della sidebar e' una sola tabella,
+# qualunque sia il numero di moduli. Le quote manuali viaggiano come testo "0, 40, 80.5".
+MODULE_FIELDS = ("w", "h", "d", "r", "manual", "quote")
+MODULE_LIMITS = {"w": (30, 200), "h": (50, 400), "d": (20, 100), "r": (1, MAX_SHELVES)}
+
+def format_heights(heights): return ", ".join(f"{float(z):g}" for z in heights)
+
+def parse_heights(text):
+    # Accetta virgole o punti e virgola come separatori; ValueError se un valore non e' un numero
+    return [float(x) for x in str(text or "").replace(";", ",").split(",") if x.strip()]
+
+def cols_to_table(cols):
+    cols = [normalize_col(c) for c in cols]
+    table = {k: [c[k] for c in cols] for k in ("w", "h", "d", "r", "manual")}
+    table['quote'] = [format_heights(shelf_heights(c['h'], c['r'], True, c['man_heights'])) if c['manual'] else "" for c in cols]
+    return table
+
+def _field(value, key):
+    # Celle vuote (righe aggiunte dall'editor) -> default; numeri riportati nei limiti dell'editor
+    if value is None or value != value: return DEFAULT_COL[key]
+    lo, hi = MODULE_LIMITS[key]; value = min(max(value, lo), hi)
+    return int(value) if key == "r" else value
+
+def table_to_cols(table):
+    # Restituisce (cols, errori): le quote illeggibili di un modulo tornano a quelle automatiche
+    cols = []; errors = []
+    for i in range(min(len(table.get('w', [])), MAX_MODULES)):
+        col = {k: _field(table[k][i], k) for k in MODULE_LIMITS}
+        manual = table['manual'][i]; col['manual'] = bool(manual) and manual == manual
+        try: col['man_heights'] = parse_heights(table['quote'][i]) if col['manual'] else []
+        except ValueError:
+            errors.append(f"Modulo {module_letter(i)}: quote mensole non valide"); col['manual'] = False; col['man_heights'] = []
+        cols.append(col)
+    return cols, errors
+
+def copy_modules(table, index, count=1):
+    # Inserisce 'count' copie del modulo 'index' subito dopo di esso
+    return {k: v[:index + 1] + [v[index]] * int(count) + v[index + 1:] for k, v in table.items()}
+
+def set_range(table, start, end, key, value):
+    # Stesso valore su un intervallo di moduli (estremi inclusi)
+    out = {k: list(v) for k, v in table.items()}
+    for i in range(max(start, 0), min(end, len(out[key]) - 1) + 1): out[key][i] = value
+    return out
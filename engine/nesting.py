@@ -0,0 +1,127 @@
+import math
+import random
+import time
+
+# --- NESTING LAMIERE ---
+# Impaginazione delle piastre laterali (h x d) sui fogli di lamiera per il laser.
+# Tutte le misure in cm come il resto del motore: il foglio standard 3000x1500 mm e' 300 x 150.
+DEFAULT_SHEET = {"lamiera_l": 300.0, "lamiera_h": 150.0, "kerf": 0.2, "margine": 1.0}
+
+def nesting_items(part_types, prefix=""):
+    # Un elemento per ogni copia fisica: la piastra e' disegnata con l'altezza lungo X, come nel DXF
+    items = []
+    for pt in part_types:
+        for lbl in pt['labels']: items.append({"lbl": f"{prefix}{lbl}", "code": pt['code'], "dx": pt['h'], "dy": pt['w'], "holes": pt['holes']})
+    return items
+
+# --- SKYLINE (BOTTOM-LEFT) ---
+class _Sheet:
+    def __init__(self, width, height):
+        self.width = width; self.height = height; self.skyline = [[0.0, 0.0, width]]; self.area = 0.0
+
+    def _fit(self, i, w, h):
+        x = self.skyline[i][0]
+        if x + w > self.width + 1e-9: return None
+        y = 0.0; rem = w; j = i
+        while rem > 1e-9:
+            if j >= len(self.skyline): return None
+            y = max(y, self.skyline[j][1]); rem -= self.skyline[j][2]; j += 1
+        if y + h > self.height + 1e-9: return None
+        return y
+
+    def best_position(self, w, h):
+        best = None
+        for i in range(len(self.skyline)):
+            y = self._fit(i, w, h)
+            if y is not None and (best is None or (y + h, self.skyline[i][0]) < best[0]): best = ((y + h, self.skyline[i][0]), self.skyline[i][0], y)
+        return best
+
+    def place(self, x, y, w, h):
+        new = [x, y + h, w]; out = []
+        for seg in self.skyline:
+            sx, sy, sw = seg; ex = sx + sw
+            if ex <= x + 1e-9 or sx >= x + w - 1e-9: out.append(seg); continue
+            if sx < x: out.append([sx, sy, x - sx])
+            if ex > x + w: out.append([x + w, sy, ex - (x + w)])
+        out.append(new); out.sort(key=lambda s: s[0])
+        merged = [out[0]]
+        for seg in out[1:]:
+            if abs(merged[-1][1] - seg[1]) < 1e-9: merged[-1][2] += seg[2]
+            else: merged.append(seg)
+        self.skyline = merged; self.area += w * h
+
+def _pack(items, order, rot_pref, width, height, kerf):
+    sheets = []; placements = []; oversize = []
+    for n in order:
+        it = items[n]; orients = [(it['dx'] + kerf, it['dy'] + kerf, False), (it['dy'] + kerf, it['dx'] + kerf, True)]
+        if rot_pref[n]: orients.reverse()
+        done = False
+        for s_idx, sh in enumerate(sheets + [_Sheet(width, height)]):
+            best = None
+            for w, h, rot in orients:
+                pos = sh.best_position(w, h)
+                if pos is not None and (best is None or pos[0] < best[0][0]): best = (pos, w, h, rot)
+            if best is None: continue
+            (_, x, y), w, h, rot = best
+            if s_idx == len(sheets): sheets.append(sh)
+            sh.place(x, y, w, h); placements.append((s_idx, n, x, y, rot)); done = True; break
+        if not done: oversize.append(it['lbl'])
+    return sheets, placements, oversize
+
+def _score(sheets): return (len(sheets), -sum(sh.area * sh.area for sh in sheets))
+
+# --- API ---
+def nest_parts(items, sheet_cfg=None, time_budget=0.0, seed=0):
+    cfg = dict(DEFAULT_SHEET); cfg.update(sheet_cfg or {})
+    t0 = time.perf_counter(); kerf = cfg['kerf']
+    width = cfg['lamiera_l'] - 2 * cfg['margine'] + kerf; height = cfg['lamiera_h'] - 2 * cfg['margine'] + kerf
+    n = len(items); no_rot = [False] * n
+    # Ordinamenti iniziali classici: area, lato lungo, altezza lungo Y
+    orders = [sorted(range(n), key=lambda k: -items[k]['dx'] * items[k]['dy']),
+              sorted(range(n), key=lambda k: -max(items[k]['dx'], items[k]['dy'])),
+              sorted(range(n), key=lambda k: (-items[k]['dy'], -items[k]['dx']))]
+    best = None
+    for order in orders:
+        res = _pack(items, order, no_rot, width, height, kerf)
+        if best is None or _score(res[0]) < _score(best[1][0]): best = ((order, no_rot), res)
+    # Miglioramento locale a tempo: scambi d'ordine e preferenze di rotazione, si tiene se non peggiora
+    rng = random.Random(seed); iterations = 0
+    lower_bound = math.ceil(sum(it['dx'] * it['dy'] for it in items) / ((width - kerf) * (height - kerf))) if n else 0
+    while n > 1 and len(best[1][0]) > lower_bound and time.perf_counter() - t0 < time_budget:
+        order, rot = list(best[0][0]), list(best[0][1])
+        a, b = rng.randrange(n), rng.randrange(n)
+        if rng.random() < 0.7: order[a], order[b] = order[b], order[a]
+        else: rot[order[a]] = not rot[order[a]]
+        res = _pack(items, order, rot, width, height, kerf); iterations += 1
+        if len(res[2]) <= len(best[1][2]) and _score(res[0]) <= _score(best[1][0]): best = ((order, rot), res)
+    sheets, placements, oversize = best[1]
+    out = [{"parts": [], "area": 0.0} for _ in sheets]
+    for s_idx, k, x, y, rot in placements:
+        it = items[k]; dx, dy = (it['dy'], it['dx']) if rot else (it['dx'], it['dy'])
+        out[s_idx]['parts'].append({"lbl": it['lbl'], "code": it['code'], "x": x + cfg['margine'], "y": y + cfg['margine'], "dx": dx, "dy": dy, "rot": rot, "holes": placed_holes(it, rot)})
+        out[s_idx]['area'] += it['dx'] * it['dy']
+    sheet_area = cfg['lamiera_l'] * cfg['lamiera_h']
+    for sh in out: sh['utilizzo'] = sh['area'] / sheet_area
+    used = sum(sh['area'] for sh in out)
+    return {"config": cfg, "sheets": out, "oversize": oversize, "fogli": len(out),
+            "utilizzo": used / (sheet_area * len(out)) if out else 0.0, "limite_inferiore": lower_bound, "iterazioni": iterations, "tempo_s": time.perf_counter() - t0}
+
+def placed_holes(it, rot):
+    # Fori nel riferimento del pezzo impaginato (X lungo l'altezza, Y lungo la profondita'); rotazione di 90 gradi
+    holes = [(hy, hx) for hx, hy in it['holes']]
+    if rot: holes = [(it['dy'] - y, x) for x, y in holes]
+    return holes
+
+def nest_projects(projects_part_types, sheet_cfg=None, time_budget=0.0):
+    # projects_part_types: lista di (nome_progetto, part_types) -> un unico nesting su tutti i progetti
+    items = []; multi = len(projects_part_types) > 1
+    for name, part_types in projects_part_types: items += nesting_items(part_types, prefix=f"{name}/" if multi else "")
+    return nest_parts(items, sheet_cfg, time_budget)
+
+def nesting_report(nest):
+    rows = []
+    for i, sh in enumerate(nest['sheets']):
+        row = {"Foglio": i + 1, "Pezzi": len(sh['parts']), "Area Pezzi (m²)": sh['area'] / 10000.0, "Utilizzo %": sh['utilizzo'] * 100.0}
+        if 'tempo_s' in sh: row["Corsa a Vuoto (m)"] = sh['corsa_vuoto'] / 100.0; row["Tempo Macchina (min)"] = sh['tempo_s'] / 60.0
+        rows.append(row)
+    return rows
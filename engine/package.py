@@ -0,0 +1,82 @@
+import atexit
+import io
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from .model import project_hash
+from .pipeline import get_geometry, get_pdf_report, get_stl, get_full_dxf, get_nesting, type_as_part, ordered_part_types
+from .dxf_stream import stream_single_dxf, stream_sheet_dxf, encode_dxf
+
+# --- PACCHETTO PRODUZIONE (ZIP) ---
+# PDF, DXF, fogli, STL e JSON sono indipendenti e CPU-bound: ognuno e' un job del process pool e
+# finisce nell'archivio appena pronto, cosi' il tempo totale e' circa quello dell'artefatto piu' lento.
+_POOL = None; _POOL_WORKERS = 0; _POOL_LOCK = threading.Lock()
+
+def get_process_pool(max_workers=None):
+    # Pool condiviso e riusato tra le richieste; 'spawn' perche' il server Streamlit e' multi-thread
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL_WORKERS = max_workers or min(4, os.cpu_count() or 1)
+            _POOL = ProcessPoolExecutor(max_workers=_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(shutdown_process_pool)
+        return _POOL
+
+def pool_workers():
+    # Processi del pool avviato (0 se non c'e')
+    with _POOL_LOCK: return _POOL_WORKERS if _POOL is not None else 0
+
+def pool_chunks(items, n):
+    # n blocchi contigui (quasi) uguali da distribuire sul pool
+    size = max(1, -(-len(items) // n))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def shutdown_process_pool(wait=False):
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None: _POOL.shutdown(wait=wait, cancel_futures=True); _POOL = None
+
+def project_to_json(project):
+    # Formato dei file salvati dalla sidebar: altezze mensole effettive anche in modalita' automatica
+    cols = [{"w": dc['w'], "h": dc['h'], "d": dc['d'], "r": dc['r'], "manual": dc['man'], "man_heights": dc['mh']} for dc in get_geometry(project)['cols']]
+    data = {k: v for k, v in project.items() if k != 'cols'}; data['cols'] = cols
+    return json.dumps(data, indent=2)
+
+def _stream_text(fn, *args):
+    buf = io.StringIO(); fn(buf, *args); return encode_dxf(buf.getvalue())
+
+def render_job(kind, project, nest=None):
+    # Eseguito nei worker: restituisce [(nome nel pacchetto, bytes)]
+    name = project['project_name']
+    if kind == "pdf": return [(f"{name}_SchedaTecnica.pdf", get_pdf_report(project))]
+    if kind == "dxf_full": return [(f"DXF/{name}_Tutto.dxf", get_full_dxf(project).encode("utf-8"))]
+    if kind == "dxf_types": return [(f"DXF/Pezzi/{name}_{pt['code']}.dxf", _stream_text(stream_single_dxf, type_as_part(pt), name)) for pt in ordered_part_types(project)]
+    if kind == "sheets": return [(f"DXF/Fogli/{name}_Foglio{i+1}.dxf", _stream_text(stream_sheet_dxf, sh, nest['config'], name)) for i, sh in enumerate(nest['sheets'])]
+    if kind == "stl": return [(f"{name}.stl", get_stl(project))]
+    if kind == "json": return [(f"{name}.json", project_to_json(project).encode("utf-8"))]
+    raise ValueError(f"Job sconosciuto: {kind}")
+
+PACKAGE_JOBS = ("pdf", "dxf_full", "dxf_types", "sheets", "stl", "json")
+
+def write_production_package(fp, project, sheet_cfg=None, nest_budget=0.0, parallel=True):
+    nest = get_nesting([project], sheet_cfg or {}, nest_budget)
+    with zipfile.ZipFile(fp, "w", zipfile.ZIP_DEFLATED) as zf:
+        if not parallel or (os.cpu_count() or 1) < 2:
+            for kind in PACKAGE_JOBS:
+                for arcname, data in render_job(kind, project, nest): zf.writestr(arcname, data)
+            return
+        pool = get_process_pool(); futures = [pool.submit(render_job, kind, project, nest if kind == "sheets" else None) for kind in PACKAGE_JOBS]
+        for fut in as_completed(futures):
+            for arcname, data in fut.result(): zf.writestr(arcname, data)
+
+def get_production_package(project, sheet_cfg=None, nest_budget=0.0, cache=None, parallel=True):
+    def build():
+        out = io.BytesIO(); write_production_package(out, project, sheet_cfg, nest_budget, parallel); return out.getvalue()
+    if cache is None: return build()
+    # Il pacchetto contiene la scheda tecnica, datata: la data fa parte della chiave come in export_key
+    return cache.get_or_build(f"package:{project_hash([project, sheet_cfg, nest_budget, date.today().isoformat()])}", build)
@@ -0,0 +1,263 @@
+import os
+from datetime import datetime
+
+from fpdf import FPDF
+
+from .model import SPESSORE_LEGNO, SPESSORE_FERRO, OFFSET_LATERALI, VONTREE_DATA, COPYRIGHT
+
+# --- RISORSE CONDIVISE ---
+# fpdf decodifica il PNG (canale alfa compreso) in ogni documento: qui lo si fa una volta per processo
+# e si consegna a ogni PDF una copia delle informazioni gia' pronte. Arial e' un font base: nulla da caricare.
+# image_info e PDFReport.replay usano l'interno di fpdf 1.7.2 (_parsepng, images, pages, attributi di stato):
+# la versione e' fissata in requirements.txt e tests/test_pdf.py verifica che il PDF resti identico byte per byte
+# a quello senza scorciatoie (REPLAY_DETAILS = False, logo caricato da fpdf).
+_IMAGES = {}
+REPLAY_DETAILS = True
+
+def image_info(path):
+    try: key = (path, os.path.getmtime(path))
+    except OSError: return None
+    if key not in _IMAGES:
+        try: info = FPDF()._parsepng(path)
+        except Exception: info = None
+        _IMAGES[key] = info
+    return _IMAGES[key]
+
+# --- PDF ENGINE ---
+class PDFReport(FPDF):
+    # Stato grafico di fpdf da ripristinare quando si riusa un disegno gia' emesso (vedi replay)
+    GRAPHIC_STATE = ("font_family", "font_style", "font_size_pt", "font_size", "current_font", "unifontsubset", "underline",
+                     "fill_color", "draw_color", "text_color", "color_flag", "line_width", "x", "y", "lasth")
+
+    def __init__(self, project_name, colors, is_commercial=False):
+        super().__init__()
+        self.project_name = project_name
+        self.colors = colors 
+        self.is_commercial = is_commercial
+        
+    def header(self):
+        if os.path.exists("logo.png"):
+            info = image_info("logo.png")
+            if info is not None and "logo.png" not in self.images:
+                self.images["logo.png"] = dict(info, i=len(self.images) + 1)
+                if 'smask' in info and self.pdf_version < '1.4': self.pdf_version = '1.4'
+            try: self.image("logo.png", 10, 8, 35)
+            except: pass
+        if self.is_commercial:
+            self.set_xy(120, 8); self.set_font('Arial', 'B', 10); self.cell(80, 5, VONTREE_DATA["nome"], 0, 1, 'R')
+            self.set_font('Arial', '', 8); self.set_x(120); self.cell(80, 4, VONTREE_DATA["via"], 0, 1, 'R')
+            self.set_x(120); self.cell(80, 4, VONTREE_DATA["citta"], 0, 1, 'R')
+            self.set_x(120); self.cell(80, 4, VONTREE_DATA["piva"], 0, 1, 'R')
+            self.set_y(35); self.set_font('Arial', 'B', 16); self.cell(0, 10, 'PREVENTIVO', 0, 1, 'R')
+            self.set_font('Arial', '', 10); self.cell(0, 5, f"Data: {datetime.now().strftime('%d/%m/%Y')}", 0, 1, 'R')
+        else:
+            self.set_font('Arial', 'B', 12); self.cell(0, 6, 'SCHEDA TECNICA DI PRODUZIONE', 0, 1, 'R')
+            self.set_font('Arial', '', 9); date_str = datetime.now().strftime('%d/%m/%Y')
+            self.cell(0, 6, f"Progetto: {self.project_name} | Data: {date_str}", 0, 1, 'R')
+            self.set_font('Arial', 'I', 8); self.cell(0, 6, f"Finiture: Legno {self.colors.get('legno','')} - Ferro {self.colors.get('ferro','')}", 0, 1, 'R')
+            self.line(10, 30, 200, 30); self.ln(25) 
+
+    def footer(self):
+        self.set_y(-15); self.set_font('Arial', 'I', 8); self.cell(0, 10, f'{COPYRIGHT} - Pagina ' + str(self.page_no()), 0, 0, 'C')
+
+    def draw_dimension_line_vert(self, x, y_start, y_end, text, align='L'):
+        self.line(x, y_start, x, y_end); self.line(x-1, y_start, x+1, y_start); self.line(x-1, y_end, x+1, y_end)
+        mid_y = (y_start + y_end) / 2; self.set_font("Arial", '', 7)
+        if align == 'L': self.set_xy(x + 2, mid_y - 2); self.cell(10, 4, text, 0, 0, 'L')
+        else: self.set_xy(x - 12, mid_y - 2); self.cell(10, 4, text, 0, 0, 'R')
+    
+    def mark(self): return len(self.pages[self.page])
+
+    def snapshot(self, start):
+        # Operatori PDF scritti sulla pagina corrente da 'start' in poi, con lo stato grafico finale
+        return self.pages[self.page][start:], {k: getattr(self, k) for k in self.GRAPHIC_STATE}
+
+    def replay(self, snap):
+        # Riemette un disegno identico senza ricalcolarlo (fpdf 1.7 non ha form XObject):
+        # valido se lo stato grafico all'inizio e' lo stesso della registrazione
+        content, state = snap; self.pages[self.page] += content; self.__dict__.update(state)
+
+    def draw_dimension_line_horz(self, x_start, x_end, y, text):
+        self.set_draw_color(0,0,0); self.line(x_start, y, x_end, y); self.line(x_start, y-1, x_start, y+1); self.line(x_end, y-1, x_end, y+1)
+        self.set_xy(x_start, y - 4); self.set_font("Arial", '', 8); self.cell(x_end - x_start, 4, text, 0, 0, 'C')
+
+# --- DISEGNO PROSPETTO ---
+def draw_frontal_schema(pdf, start_x, start_y, cols_data, scale, draw_quotes=True, label=None):
+    current_x = start_x; tot_width = 0; w_ferro_pdf = 0.3
+    max_h = max([c['h'] for c in cols_data]); floor_y = start_y + (max_h * scale) + 10
+    pdf.line(start_x - 10, floor_y, start_x + (len(cols_data)*70)*scale, floor_y)
+    for col in cols_data:
+        h = col['h'] * scale; w = col['w'] * scale
+        pdf.set_fill_color(0, 0, 0); pdf.rect(current_x, floor_y - h, w_ferro_pdf, h, 'F')
+        
+        hole_centers = col['fori']
+        pdf.set_fill_color(220, 220, 220)
+        for z in col['mh']: mz = z * scale; pdf.rect(current_x + w_ferro_pdf, floor_y - mz - (SPESSORE_LEGNO*scale), w, (SPESSORE_LEGNO*scale), 'F')
+        
+        if draw_quotes:
+            pdf.set_text_color(0,0,0); pdf.set_font("Arial", '', 7)
+            for i in range(len(hole_centers) - 1):
+                h1 = hole_centers[i]; h2 = hole_centers[i+1]
+                dist = h2 - h1
+                if dist > 3.0:
+                    y1 = floor_y - (h1 * scale); y2 = floor_y - (h2 * scale)
+                    mid_y = (y1 + y2) / 2
+                    pdf.set_xy(current_x + w_ferro_pdf, mid_y - 2); pdf.cell(w, 4, f"{dist:.1f}", 0, 0, 'C')
+                    
+        current_x += w + w_ferro_pdf
+        pdf.set_fill_color(0, 0, 0); pdf.rect(current_x, floor_y - h, w_ferro_pdf, h, 'F')
+        pdf.set_xy(current_x - w/2 - w_ferro_pdf, floor_y + 2); pdf.set_font("Arial", 'B', 8); pdf.cell(10, 5, f"Mod.{col['letter']}", 0, 0, 'C')
+        current_x += w_ferro_pdf + 0.2; tot_width += col['w'] + (SPESSORE_FERRO*2)
+    if draw_quotes: pdf.draw_dimension_line_horz(start_x, current_x - 0.2, floor_y + 10, label or f"LARGHEZZA TOT: {tot_width:.1f} cm")
+    return floor_y + 20 
+
+def split_by_length(lengths, limit):
+    # Gruppi consecutivi di indici la cui somma sta in 'limit' (almeno un elemento per gruppo)
+    groups = [[]]; used = 0.0
+    for i, length in enumerate(lengths):
+        if groups[-1] and used + length > limit: groups.append([]); used = 0.0
+        groups[-1].append(i); used += length
+    return groups if groups[0] else []
+
+def draw_frontal_pages(pdf, start_x, cols_data, scale, draw_quotes, new_page):
+    # Pareti piu' larghe della pagina: un tratto di moduli per pagina alla stessa scala.
+    # new_page(k, n) apre la pagina di continuazione k (1-based) di n; la quota totale va sull'ultimo tratto
+    widths = [c['w'] * scale + 0.3 * 2 + 0.2 for c in cols_data]
+    groups = split_by_length(widths, pdf.w - start_x - 10)
+    if len(groups) <= 1: return draw_frontal_schema(pdf, start_x, pdf.get_y(), cols_data, scale, draw_quotes)
+    tot_width = sum(c['w'] + SPESSORE_FERRO * 2 for c in cols_data)
+    for k, idx in enumerate(groups):
+        if k: new_page(k + 1, len(groups))
+        chunk = [cols_data[i] for i in idx]; part = sum(c['w'] + SPESSORE_FERRO * 2 for c in chunk)
+        label = f"MOD. {chunk[0]['letter']}-{chunk[-1]['letter']}: {part:.1f} cm" + (f"  |  LARGHEZZA TOT: {tot_width:.1f} cm" if k == len(groups) - 1 else "")
+        y = draw_frontal_schema(pdf, start_x, pdf.get_y(), chunk, scale, draw_quotes, label)
+    return y
+
+# --- DETTAGLIO MODULO ---
+def draw_module_detail(pdf, col, scale_det=0.45):
+    page_width = 210.0; gap_between_views = 40.0
+    h_front = col['h'] * scale_det; w_front = col['w'] * scale_det; w_side = col['d'] * scale_det
+    total_drawing_width = w_front + gap_between_views + w_side
+    start_x_drawing = (page_width - total_drawing_width) / 2
+    x_front = start_x_drawing; line_x = x_front + w_front + (gap_between_views / 2); x_side = x_front + w_front + gap_between_views
+    base_y = (297 / 2) + (h_front / 2); w_ferro_det = 0.5 
+    # 1. FRONTALE
+    pdf.set_xy(x_front, base_y - h_front - 8); pdf.set_font("Arial", 'B', 9); pdf.cell(w_front, 5, "VISTA FRONTALE", 0, 0, 'C')
+    pdf.set_fill_color(0,0,0); pdf.rect(x_front, base_y - h_front, w_ferro_det, h_front, 'F'); pdf.rect(x_front + w_front - w_ferro_det, base_y - h_front, w_ferro_det, h_front, 'F')
+    if col['mh']:
+        for z in col['mh']: mz = z * scale_det; pdf.set_fill_color(180,180,180); pdf.rect(x_front + w_ferro_det, base_y - mz - (SPESSORE_LEGNO*scale_det), w_front - (2*w_ferro_det), (SPESSORE_LEGNO*scale_det), 'F')
+    pdf.draw_dimension_line_horz(x_front, x_front + w_front, base_y + 5, f"L: {col['w']:.0f}")
+    # 2. QUOTE
+    hole_centers = col['fori']
+    y_first = base_y - (hole_centers[0]*scale_det); y_last = base_y - (hole_centers[-1]*scale_det)
+    pdf.line(line_x, y_first, line_x, y_last)
+    for i in range(len(hole_centers)):
+        hc = hole_centers[i]; yc = base_y - (hc * scale_det); pdf.line(line_x - 1, yc, line_x + 1, yc)
+        if i < len(hole_centers) - 1:
+            h_next = hole_centers[i+1]; dist = h_next - hc; y_next = base_y - (h_next * scale_det); mid = (yc + y_next) / 2
+            pdf.set_xy(line_x + 2, mid - 2); pdf.set_font("Arial", '', 8); pdf.cell(10, 4, f"{dist:.1f}", 0, 0, 'L')
+    mid_tot = (y_first + y_last) / 2; pdf.set_xy(line_x - 25, mid_tot - 2); pdf.cell(23, 4, f"H Tot: {col['h']:.1f}", 0, 0, 'R')
+    # 3. LATERALE
+    pdf.set_xy(x_side, base_y - (col['h']*scale_det) - 8); pdf.set_font("Arial", 'B', 9); pdf.cell(w_side, 5, "VISTA LATERALE", 0, 0, 'C')
+    pdf.set_fill_color(255,255,255); pdf.set_draw_color(0,0,0); pdf.rect(x_side, base_y - (col['h']*scale_det), w_side, (col['h']*scale_det))
+    pdf.set_fill_color(0,0,0)
+    holes_x = [OFFSET_LATERALI, col['d']/2, col['d']-OFFSET_LATERALI]
+    for hc in hole_centers:
+        y_hole = base_y - (hc * scale_det)
+        for hx in holes_x: x_hole = x_side + (hx * scale_det); pdf.ellipse(x_hole-0.8, y_hole-0.8, 1.6, 1.6, 'F')
+    pdf.draw_dimension_line_horz(x_side, x_side + w_side, base_y + 5, f"P: {col['d']:.0f}")
+
+
+def generate_pdf_report(project_name, part_types, wood_data, iron_data, stats, cols_data, colors, progress=None):
+    # progress(frazione, messaggio): facoltativo, usato dal rendering in background (engine/jobs.py)
+    pdf = PDFReport(project_name, colors, is_commercial=False); n_steps = len(cols_data) + 6
+    step = (lambda k, msg: progress(k / n_steps, msg)) if progress else (lambda k, msg: None)
+    def section_page(title, space):
+        pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, title, 0, 1, 'L', fill=True); pdf.ln(space)
+    # PAG 1
+    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_text_color(0, 0, 0); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "PROSPETTO FRONTALE (MUTO)", 0, 1, 'L', fill=True); pdf.ln(10)
+    draw_frontal_pages(pdf, 20, cols_data, 0.35, False, lambda k, n: section_page(f"PROSPETTO FRONTALE (MUTO) - SEGUE {k}/{n}", 10))
+    step(1, "Riepilogo materiali")
+    # PAG 2
+    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "RIEPILOGO MATERIALI", 0, 1, 'L', fill=True); pdf.ln(2); pdf.set_font("Arial", size=10)
+    pdf.cell(45, 8, f"Peso Ferro: {stats['peso_ferro']:.1f} kg", 1); pdf.cell(45, 8, f"Peso Legno: {stats['peso_legno']:.1f} kg", 1); pdf.cell(45, 8, f"Totale: {stats['peso_tot']:.1f} kg", 1); pdf.cell(55, 8, f"Viteria: {stats['viti']} pz", 1, 1); pdf.ln(10)
+    pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "DISTINTA LEGNO", 0, 1, 'L', fill=True); pdf.ln(2); pdf.set_font("Arial", 'B', 9)
+    if wood_data:
+        for row in wood_data: pdf.cell(40, 8, f"{row['Larghezza']:.0f} x {row['Profondità']:.0f}", 1); pdf.cell(40, 8, f"{row['Pezzi']}", 1); pdf.cell(40, 8, f"{row['Metri Totali']:.1f} m", 1, 1)
+    pdf.ln(10); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "DISTINTA FERRO", 0, 1, 'L', fill=True); pdf.ln(2)
+    if iron_data:
+        for row in iron_data: pdf.cell(40, 8, f"{row['Altezza']:.0f} x {row['Profondità']:.0f}", 1); pdf.cell(40, 8, f"{row['Pezzi']}", 1); pdf.ln()
+    step(2, "Prospetto quotato")
+    # PAG 3
+    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "PROSPETTO QUOTATO (INTERASSE FORI)", 0, 1, 'L', fill=True)
+    pdf.set_font("Arial", 'I', 8); pdf.cell(0, 6, "* Le quote interne indicano l'interasse (distanza centro-centro) dei fori.", 0, 1, 'L'); pdf.ln(10)
+    draw_frontal_pages(pdf, 20, cols_data, 0.35, True, lambda k, n: section_page(f"PROSPETTO QUOTATO (INTERASSE FORI) - SEGUE {k}/{n}", 10))
+    step(3, "Pianta")
+    # PAG 4
+    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "PIANTA (VISTA DALL'ALTO)", 0, 1, 'L', fill=True); pdf.ln(20)
+    tot_len_cm = sum([c['w'] + (SPESSORE_FERRO*2) for c in cols_data]); scale_pianta = 0.65; start_x = 70; start_y = pdf.get_y() + 20
+    # Pianta piu' lunga della pagina: continua su altre pagine, quota di tratto e totale sull'ultima
+    groups = split_by_length([(c['w'] + (SPESSORE_FERRO*2)) * scale_pianta for c in cols_data], pdf.h - 25 - start_y)
+    for g, idx in enumerate(groups):
+        if g: section_page(f"PIANTA (VISTA DALL'ALTO) - SEGUE {g + 1}/{len(groups)}", 20); start_y = pdf.get_y() + 20
+        chunk = [cols_data[i] for i in idx]; part_cm = sum([c['w'] + (SPESSORE_FERRO*2) for c in chunk]); current_y = start_y
+        label = f"TOT: {tot_len_cm:.1f}" if len(groups) == 1 else f"{chunk[0]['letter']}-{chunk[-1]['letter']}: {part_cm:.1f}" + (f" | TOT: {tot_len_cm:.1f}" if g == len(groups) - 1 else "")
+        pdf.draw_dimension_line_vert(start_x - 15, start_y, start_y + (part_cm * scale_pianta), label, 'R')
+        for col in chunk:
+            w_mod_scaled = (col['w'] + (SPESSORE_FERRO*2)) * scale_pianta; d_mod_scaled = col['d'] * scale_pianta
+            pdf.set_fill_color(255, 255, 255); pdf.set_draw_color(0, 0, 0); pdf.rect(start_x, current_y, d_mod_scaled, w_mod_scaled)
+            pdf.set_xy(start_x, current_y - 5); pdf.set_font("Arial", '', 8); pdf.cell(d_mod_scaled, 5, f"P: {col['d']:.0f}", 0, 0, 'C')
+            pdf.draw_dimension_line_vert(start_x + d_mod_scaled + 5, current_y, current_y + w_mod_scaled, f"{col['w']:.0f}", 'L'); current_y += w_mod_scaled 
+    # PAG 5+
+    scale_det = 0.45; details = {}
+    for k, col in enumerate(cols_data):
+        step(4 + k, f"Dettaglio modulo {col['letter']}")
+        pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, f"DETTAGLIO MODULO {col['letter']}", 0, 1, 'L', fill=True)
+        pdf.set_font("Arial", '', 10); pdf.cell(0, 8, f"Dimensioni: {col['w']} (L) x {col['h']} (H) x {col['d']} (P) cm | {col['r']} Mensole", 0, 1, 'L'); pdf.ln(5)
+        # Moduli identici: il disegno viene emesso una volta e poi riusato
+        sig = (col['w'], col['h'], col['d'], col['r'], tuple(col['mh']))
+        if REPLAY_DETAILS and sig in details: pdf.replay(details[sig]); continue
+        start = pdf.mark(); draw_module_detail(pdf, col, scale_det); details[sig] = pdf.snapshot(start)
+
+    step(n_steps - 2, "Esecutivi taglio")
+    # Un disegno per tipo di pezzo, con quantita' ed etichette delle copie
+    pdf.add_page(); pdf.set_fill_color(240, 240, 240); pdf.set_font("Arial", 'B', 11); pdf.cell(0, 8, "ESECUTIVI TAGLIO (FERRO)", 0, 1, 'L', fill=True); pdf.ln(10); scale_cut = 0.5; cursor_y = pdf.get_y() + 10
+    for pt in part_types:
+        req_h = (pt['w'] * scale_cut) + 29
+        if cursor_y + req_h > 270: pdf.add_page(); cursor_y = 44
+        start_x = 20; pdf.set_fill_color(255, 255, 255); pdf.rect(start_x, cursor_y, pt['h']*scale_cut, pt['w']*scale_cut)
+        pdf.set_fill_color(0, 0, 0);
+        for hx, hy in pt['holes']: cx = start_x + (hy * scale_cut); cy = cursor_y + (hx * scale_cut); pdf.ellipse(cx-0.5, cy-0.5, 1.0, 1.0, 'F')
+        labels = ", ".join(pt['labels'])
+        if len(labels) > 110: labels = labels[:107] + "..."
+        pdf.set_xy(start_x, cursor_y - 10); pdf.set_font("Arial", 'B', 9); pdf.cell(0, 5, f"{pt['code']}  ×{pt['qty']}  ({pt['h']}x{pt['w']} cm)", 0, 0)
+        pdf.set_xy(start_x, cursor_y - 5); pdf.set_font("Arial", '', 7); pdf.cell(0, 4, labels, 0, 0); cursor_y += req_h
+    step(n_steps - 1, "Compressione")
+    return pdf.output(dest='S').encode('latin-1')
+
+def generate_commercial_pdf(project_data, totals, client_data, payment_info, notes, cols_data):
+    pdf = PDFReport(project_data['project_name'], {}, is_commercial=True)
+    pdf.add_page()
+    pdf.set_xy(10, 50); pdf.set_font("Arial", '', 10); pdf.cell(100, 5, "Spett.le:", 0, 1); pdf.set_font("Arial", 'B', 11); pdf.cell(100, 5, client_data['name'], 0, 1)
+    pdf.set_font("Arial", '', 10); pdf.cell(100, 5, client_data['address'], 0, 1)
+    if client_data.get('piva'): pdf.cell(100, 5, f"P.IVA: {client_data['piva']}", 0, 1)
+    pdf.ln(10); pdf.set_font("Arial", 'B', 12); pdf.cell(0, 10, f"Oggetto: Fornitura Libreria {project_data['project_name']}", 0, 1); pdf.ln(2)
+    pdf.set_font("Arial", '', 10); desc = f"Libreria composta da {project_data['num_colonne']} moduli.\nFiniture: {project_data['finish_wood']} / {project_data['finish_iron']}."; pdf.multi_cell(0, 6, desc); pdf.ln(10)
+    pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, "Prospetto:", 0, 1)
+    def next_page(k, n): pdf.add_page(); pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, f"Prospetto (segue {k}/{n}):", 0, 1)
+    draw_frontal_pages(pdf, 15, cols_data, 0.35, True, next_page)
+    pdf.add_page()
+    pdf.set_fill_color(240, 240, 240); pdf.cell(140, 8, "Descrizione", 1, 0, 'L', True); pdf.cell(40, 8, "Importo", 1, 1, 'R', True)
+    pdf.cell(140, 10, "Struttura su misura (Materiali e Lavorazione)", 1, 0); pdf.cell(40, 10, f"E {totals['price_ex_vat'] - totals['logistics_price']:.2f}", 1, 1, 'R')
+    if totals['logistics_price'] > 0:
+        desc_log = "Spedizione Corriere" if totals['logistics_type'] == "corriere" else "Trasporto e Montaggio in loco"
+        pdf.cell(140, 10, desc_log, 1, 0); pdf.cell(40, 10, f"E {totals['logistics_price']:.2f}", 1, 1, 'R')
+    pdf.ln(5); pdf.set_font("Arial", 'B', 11); pdf.cell(140, 10, "TOTALE IMPONIBILE", 0, 0, 'R'); pdf.cell(40, 10, f"E {totals['price_ex_vat']:.2f}", 1, 1, 'R')
+    pdf.cell(140, 10, "IVA (22%)", 0, 0, 'R'); pdf.cell(40, 10, f"E {totals['vat']:.2f}", 1, 1, 'R')
+    pdf.set_fill_color(50, 50, 50); pdf.set_text_color(255, 255, 255); pdf.cell(140, 12, "TOTALE IVATO", 1, 0, 'R', True); pdf.cell(40, 12, f"E {totals['price_total']:.2f}", 1, 1, 'R', True)
+    pdf.set_text_color(0, 0, 0); pdf.ln(10)
+    pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, "Condizioni Commerciali:", 0, 1); pdf.set_font("Arial", '', 10)
+    pdf.cell(50, 6, "Tempi di Consegna:", 0, 0); pdf.cell(0, 6, f"{totals['days_total']} giorni lavorativi (Data stima: {totals['delivery_date']})", 0, 1)
+    pdf.cell(50, 6, "Pagamento:", 0, 0); pdf.multi_cell(0, 6, payment_info)
+    if notes: pdf.ln(5); pdf.set_font("Arial", 'B', 10); pdf.cell(0, 6, "Note:", 0, 1); pdf.set_font("Arial", '', 10); pdf.multi_cell(0, 6, notes)
+    return pdf.output(dest='S').encode('latin-1')
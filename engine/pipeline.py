@@ -0,0 +1,217 @@
+import io
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from .model import project_hash
+from .geometry import MATERIAL_COLORS, build_module, build_geometry, compute_stats, bom_tables, build_figure, build_cut_preview, build_mesh, wall_arrays
+from .quote import calculate_quote
+from .mesh import get_bin_stl, get_3mf, get_glb
+from .dxf import generate_full_dxf, generate_single_dxf, generate_sheet_dxf
+from .nesting import nest_projects
+from .dxf_stream import stream_full_dxf, stream_single_dxf, stream_sheet_dxf, stream_dxf_zip
+from .cutting import BOARD_KEYS, wood_pieces, optimize_boards, plan_stats
+from .toolpath import part_toolpath, sheet_toolpath
+from .validation import VALIDATION_KEYS, validate_geometry
+from .jobs import job_manager
+from .profiling import profiler
+
+# --- CACHE DEGLI STADI ---
+# Ogni stadio e' memorizzato con la chiave (stadio, hash degli input che lo influenzano): cambiare
+# la finitura non ricalcola la geometria, cambiare il ricarico non ricalcola DXF/STL.
+# I risultati sono condivisi tra le sessioni: chi li riceve non deve modificarli.
+class StageCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize; self._data = OrderedDict(); self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+
+    def get_or_compute(self, stage, key, fn):
+        k = (stage, key)
+        with self._lock:
+            if k in self._data:
+                self.hits += 1; self._data.move_to_end(k); return self._data[k]
+            self.misses += 1
+        value = fn()
+        with self._lock:
+            self._data[k] = value; self._data.move_to_end(k)
+            while len(self._data) > self.maxsize: self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock: self._data.clear(); self.hits = 0; self.misses = 0
+
+    def info(self):
+        with self._lock: return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+stage_cache = StageCache()
+# Geometrie dei singoli moduli e percorsi utensile dei singoli tipi di pezzo: modificando un modulo
+# si ricalcola solo quello, il resto della parete viene ricomposto dai pezzi gia' in cache
+module_cache = StageCache(maxsize=4096)
+
+def geometry_key(project): return project_hash(project['cols'])
+def colors_of(project): return {"legno": project['finish_wood'], "ferro": project['finish_iron']}
+
+# --- ENTRY POINT CACHATI ---
+# Ogni entry point e' uno span del profiler (engine/profiling.py): i tempi per stadio finiscono nel pannello admin
+def get_module(col):
+    return module_cache.get_or_compute("module", project_hash(col), lambda: build_module(col))
+
+@profiler.timed("geometria")
+def get_geometry(project):
+    return stage_cache.get_or_compute("geometry", geometry_key(project), lambda: build_geometry(project['cols'], [get_module(c) for c in project['cols']]))
+
+@profiler.timed("statistiche")
+def get_stats(project):
+    return stage_cache.get_or_compute("stats", geometry_key(project), lambda: compute_stats(get_geometry(project)))
+
+@profiler.timed("distinte")
+def get_bom(project):
+    return stage_cache.get_or_compute("bom", geometry_key(project), lambda: bom_tables(get_geometry(project)))
+
+@profiler.timed("figura 3D")
+def get_figure(project):
+    return stage_cache.get_or_compute("figure", geometry_key(project), lambda: build_figure(wall_arrays(get_geometry(project))))
+
+def parts_key(project):
+    # Hash della lista dei tipi di pezzo: cambia solo se cambiano piastre, fori, quantita' o etichette
+    # (non, ad esempio, con la larghezza di un modulo)
+    return stage_cache.get_or_compute("parts_key", geometry_key(project),
+                                      lambda: project_hash([[pt['code'], pt['h'], pt['w'], pt['holes'], pt['qty'], pt['labels']] for pt in get_geometry(project)['part_types']]))
+
+@profiler.timed("anteprima taglio")
+def get_cut_preview(project):
+    return stage_cache.get_or_compute("cut_preview", parts_key(project), lambda: build_cut_preview(get_geometry(project)['part_types']))
+
+def get_mesh(project):
+    return stage_cache.get_or_compute("mesh", geometry_key(project), lambda: build_mesh(wall_arrays(get_geometry(project))))
+
+@profiler.timed("preventivo")
+def get_quote(project, user_inputs, cfg):
+    key = project_hash([get_stats(project), user_inputs, cfg])
+    return stage_cache.get_or_compute("quote", key, lambda: calculate_quote(get_stats(project), user_inputs, cfg))
+
+@profiler.timed("statistiche preventivo")
+def get_quote_stats(project, cfg):
+    # Statistiche per il preventivo: tavole e tagli reali dal piano di taglio entrano nel costo legno e nei minuti
+    return dict(get_stats(project), **plan_stats(get_wood_plan([project], cfg)))
+
+@profiler.timed("verifiche")
+def get_validation(project, cfg=None):
+    # Verifiche geometriche e strutturali: dipendono dalla geometria e dai soli parametri di carico del listino
+    vcfg = {k: cfg[k] for k in VALIDATION_KEYS if k in (cfg or {})}
+    return stage_cache.get_or_compute("validation", project_hash([geometry_key(project), vcfg]), lambda: validate_geometry(get_geometry(project), vcfg))
+
+def get_part_toolpath(pt):
+    return module_cache.get_or_compute("toolpath", project_hash([pt['h'], pt['w'], pt['holes']]), lambda: part_toolpath(pt))
+
+@profiler.timed("percorsi utensile")
+def get_toolpaths(project):
+    return stage_cache.get_or_compute("toolpath", geometry_key(project), lambda: [get_part_toolpath(pt) for pt in get_geometry(project)['part_types']])
+
+def ordered_part_types(project):
+    # Tipi di pezzo con i fori nell'ordine del percorso ottimizzato: e' l'ordine in cui finiscono nei DXF
+    return [dict(pt, holes=tp['holes']) for pt, tp in zip(get_geometry(project)['part_types'], get_toolpaths(project))]
+
+def _with_toolpaths(nest):
+    for sh in nest['sheets']:
+        tp = sheet_toolpath(sh); sh['parts'] = tp['parts']; sh['corsa_vuoto'] = tp['corsa_vuoto']; sh['tempo_s'] = tp['tempo_s']
+    return nest
+
+@profiler.timed("nesting")
+def get_nesting(projects, sheet_cfg, time_budget=0.0):
+    # Nesting di uno o piu' progetti sugli stessi fogli (i pezzi ripetuti hanno gia' la stessa firma);
+    # pezzi e fori di ogni foglio escono gia' nell'ordine di lavorazione
+    batch = [(p['project_name'], get_geometry(p)['part_types']) for p in projects]
+    return stage_cache.get_or_compute("nesting", project_hash([batch, sheet_cfg, time_budget]), lambda: _with_toolpaths(nest_projects(batch, sheet_cfg, time_budget)))
+
+@profiler.timed("piano taglio legno")
+def get_wood_plan(projects, board_cfg):
+    pieces = []; multi = len(projects) > 1
+    for p in projects: pieces += wood_pieces(get_geometry(p)['wood'], prefix=f"{p['project_name']}/" if multi else "")
+    cfg = {k: board_cfg[k] for k in BOARD_KEYS if k in board_cfg}
+    return stage_cache.get_or_compute("wood_plan", project_hash([[geometry_key(p) for p in projects], cfg]), lambda: optimize_boards(pieces, cfg))
+
+# --- EXPORT ---
+# I file esportati non passano da stage_cache: sono grandi e vengono prodotti solo su richiesta.
+# Con una ByteCache (engine/artifacts.py) il risultato resta disponibile per i download successivi.
+# I PDF stampano la data del giorno: la data entra nella chiave, un PDF di ieri non si riusa oggi.
+def export_key(kind, project, idx=None):
+    if kind in ("stl", "3mf", "glb"): inputs = project['cols']
+    elif kind == "dxf_full": inputs = [project['cols'], project['project_name']]
+    elif kind == "dxf_single": inputs = [get_geometry(project)['part_types'][idx], project['project_name']]
+    elif kind == "pdf_report": inputs = [project['cols'], project['project_name'], colors_of(project), date.today().isoformat()]
+    else: raise ValueError(f"Export sconosciuto: {kind}")
+    return f"{kind}:{project_hash(inputs)}"
+
+def type_as_part(pt): return {"w": pt['w'], "h": pt['h'], "holes": pt['holes'], "lbl": f"{pt['code']} x{pt['qty']}"}
+
+def _export(cache, kind, project, build, idx=None):
+    if cache is None: return build()
+    return cache.get_or_build(export_key(kind, project, idx), build)
+
+@profiler.timed("STL")
+def get_stl(project, cache=None):
+    return _export(cache, "stl", project, lambda: get_bin_stl(get_mesh(project)))
+
+@profiler.timed("3MF")
+def get_3mf_model(project, cache=None):
+    return _export(cache, "3mf", project, lambda: get_3mf(get_mesh(project), MATERIAL_COLORS))
+
+@profiler.timed("GLB")
+def get_glb_model(project, cache=None):
+    return _export(cache, "glb", project, lambda: get_glb(get_mesh(project), MATERIAL_COLORS))
+
+@profiler.timed("DXF completo")
+def get_full_dxf(project, cache=None):
+    return _export(cache, "dxf_full", project, lambda: generate_full_dxf(ordered_part_types(project), project['project_name']))
+
+@profiler.timed("DXF singolo")
+def get_single_dxf(project, idx, cache=None):
+    return _export(cache, "dxf_single", project, lambda: generate_single_dxf(type_as_part(ordered_part_types(project)[idx]), project['project_name']), idx)
+
+@profiler.timed("PDF scheda tecnica")
+def build_pdf_report(project, progress=None):
+    from .pdf import generate_pdf_report  # fpdf si carica al primo PDF, non all'avvio
+    geo = get_geometry(project); distinta_legno, distinta_ferro = get_bom(project)
+    return generate_pdf_report(project['project_name'], geo['part_types'], distinta_legno, distinta_ferro, get_stats(project), geo['cols'], colors_of(project), progress)
+
+def get_pdf_report(project, cache=None):
+    return _export(cache, "pdf_report", project, lambda: build_pdf_report(project))
+
+def submit_pdf_report(project, cache=None):
+    # Scheda tecnica in background: un job per hash di progetto, condiviso tra le sessioni (engine/jobs.py)
+    return job_manager.submit(export_key("pdf_report", project), lambda progress: build_pdf_report(project, progress), cache)
+
+def commercial_key(project, totals, client_data, payment_info, notes):
+    return f"pdf_commercial:{project_hash([project, totals, client_data, payment_info, notes, date.today().isoformat()])}"
+
+@profiler.timed("PDF preventivo")
+def get_commercial_pdf(project, totals, client_data, payment_info, notes, cache=None):
+    from .pdf import generate_commercial_pdf
+    build = lambda: generate_commercial_pdf(project, totals, client_data, payment_info, notes, get_geometry(project)['cols'])
+    if cache is None: return build()
+    return cache.get_or_build(commercial_key(project, totals, client_data, payment_info, notes), build)
+
+def get_sheet_dxf(nest, idx, project_name, cache=None):
+    build = lambda: generate_sheet_dxf(nest['sheets'][idx], nest['config'], project_name)
+    if cache is None: return build()
+    return cache.get_or_build(f"dxf_sheet:{project_hash([nest['sheets'][idx], nest['config'], project_name])}", build)
+
+def dxf_bundle_jobs(projects, nest=None):
+    jobs = []
+    for p in projects:
+        name = p['project_name']; types = ordered_part_types(p)
+        jobs.append((f"{name}/{name}_Tutto.dxf", stream_full_dxf, (types, name)))
+        jobs += [(f"{name}/{name}_{pt['code']}.dxf", stream_single_dxf, (type_as_part(pt), name)) for pt in types]
+    if nest is not None:
+        label = projects[0]['project_name'] if len(projects) == 1 else "Lotto"
+        jobs += [(f"Fogli/{label}_Foglio{i+1}.dxf", stream_sheet_dxf, (sh, nest['config'], label)) for i, sh in enumerate(nest['sheets'])]
+    return jobs
+
+@profiler.timed("DXF zip")
+def get_dxf_bundle(projects, nest=None, cache=None):
+    # ZIP di tutti i DXF di produzione (uno o piu' progetti) scritto in streaming, senza documenti ezdxf in memoria
+    def build():
+        out = io.BytesIO(); stream_dxf_zip(out, dxf_bundle_jobs(projects, nest)); return out.getvalue()
+    if cache is None: return build()
+    return cache.get_or_build(f"dxf_bundle:{project_hash([[(p['cols'], p['project_name']) for p in projects], nest and nest['sheets']])}", build)
@@ -0,0 +1,114 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# --- PROFILAZIONE PER STADIO ---
+# Ogni rerun dello script e' un record con gli span annidati degli stadi (nome, inizio, durata, livello).
+# Il rerun attivo e' per thread (ogni sessione Streamlit esegue lo script nel suo thread); uno span aperto
+# fuori da un rerun (download, job PDF in background) diventa un record a se'.
+# MOBY_PROFILE=cartella -> statistiche cProfile (.prof) di ogni record; MOBY_TIMINGS=file -> un JSON per riga.
+PROFILE_ENV = "MOBY_PROFILE"
+TIMINGS_ENV = "MOBY_TIMINGS"
+
+class Profiler:
+    def __init__(self, keep=100):
+        self._records = deque(maxlen=keep); self._lock = threading.Lock(); self._local = threading.local(); self._seq = 0
+
+    def start(self, label, **info):
+        # Un rerun interrotto da st.stop/st.rerun non arriva a finish: si chiude all'inizio del successivo
+        prev = getattr(self._local, "run", None)
+        if prev is not None: self.finish(prev, stato="interrotto")
+        run = {"label": label, "info": info, "inizio": time.time(), "t0": time.perf_counter(), "spans": [], "livello": 0, "prof": None}
+        if os.environ.get(PROFILE_ENV): run['prof'] = cProfile.Profile(); run['prof'].enable()
+        self._local.run = run
+        return run
+
+    def finish(self, run, stato="completo"):
+        total = time.perf_counter() - run['t0']
+        if getattr(self._local, "run", None) is run: self._local.run = None
+        if run['prof'] is not None: run['prof'].disable()
+        with self._lock:
+            self._seq += 1; seq = self._seq
+        record = {"seq": seq, "label": run['label'], "inizio": datetime.fromtimestamp(run['inizio']).isoformat(timespec="milliseconds"),
+                  "totale_ms": total * 1000.0, "stato": stato, **run['info'],
+                  "spans": [{"nome": n, "inizio_ms": t * 1000.0, "durata_ms": d * 1000.0, "livello": lv} for n, t, d, lv in sorted(run['spans'], key=lambda s: (s[1], s[3]))]}
+        if run['prof'] is not None:
+            out_dir = os.environ.get(PROFILE_ENV); os.makedirs(out_dir, exist_ok=True)
+            run['prof'].dump_stats(os.path.join(out_dir, f"{datetime.now():%Y%m%d_%H%M%S}_{seq:05d}_{run['label'].replace(' ', '_')}.prof"))
+        with self._lock:
+            self._records.append(record)
+            path = os.environ.get(TIMINGS_ENV)
+            if path:
+                with open(path, "a") as f: f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    @contextmanager
+    def span(self, name):
+        run = getattr(self._local, "run", None); own = run is None
+        if own: run = self.start(name)
+        level = run['livello']; run['livello'] += 1; t = time.perf_counter()
+        try: yield
+        finally:
+            run['livello'] = level; run['spans'].append((name, t - run['t0'], time.perf_counter() - t, level))
+            if own: self.finish(run)
+
+    def timed(self, name):
+        # Decoratore: la funzione diventa uno span (anche quando la cache risponde subito)
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name): return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def records(self, n=None):
+        # Dal piu' recente
+        with self._lock: recs = list(self._records)[::-1]
+        return recs[:n] if n else recs
+
+    def clear(self):
+        with self._lock: self._records.clear()
+
+profiler = Profiler()
+span = profiler.span
+
+# --- REPORT ---
+def records_table(records):
+    # Una riga per record con la durata degli stadi di primo livello; "altro" e' il tempo fuori dagli span
+    rows = []
+    for r in records:
+        row = {"N.": r['seq'], "Ora": r['inizio'][11:23], "Tipo": r['label'], "Utente": r.get('utente', ''), "Stato": r['stato'], "Totale (ms)": round(r['totale_ms'], 1)}
+        top = [s for s in r['spans'] if s['livello'] == 0]
+        for s in top: row[s['nome']] = round(row.get(s['nome'], 0.0) + s['durata_ms'], 1)
+        row['altro'] = round(r['totale_ms'] - sum(s['durata_ms'] for s in top), 1)
+        rows.append(row)
+    return rows
+
+def span_summary(records):
+    # Per nome di span: chiamate, tempo totale, medio e massimo su tutti i record
+    acc = {}
+    for r in records:
+        for s in r['spans']:
+            a = acc.setdefault(s['nome'], [0, 0.0, 0.0]); a[0] += 1; a[1] += s['durata_ms']; a[2] = max(a[2], s['durata_ms'])
+    return sorted(({"Stadio": k, "Chiamate": n, "Totale (ms)": round(t, 2), "Medio (ms)": round(t / n, 2), "Max (ms)": round(m, 2)} for k, (n, t, m) in acc.items()),
+                  key=lambda row: -row["Totale (ms)"])
+
+def build_flame_figure(record):
+    # Barre orizzontali per livello di annidamento, sull'asse dei tempi del record (stile flame chart)
+    import plotly.graph_objects as go
+    spans = record['spans']; names = sorted({s['nome'] for s in spans})
+    palette = ["#4C78A8", "#F58518", "#54A24B", "#E45756", "#72B7B2", "#EECA3B", "#B279A2", "#FF9DA6", "#9D755D", "#BAB0AC"]
+    color = {n: palette[i % len(palette)] for i, n in enumerate(names)}
+    fig = go.Figure(go.Bar(
+        base=[s['inizio_ms'] for s in spans], x=[max(s['durata_ms'], 0.05) for s in spans], y=[s['livello'] for s in spans], orientation="h",
+        marker=dict(color=[color[s['nome']] for s in spans], line=dict(color="white", width=1)), text=[s['nome'] for s in spans], textposition="inside", insidetextanchor="start",
+        customdata=[[s['nome'], s['durata_ms']] for s in spans], hovertemplate="%{customdata[0]}: %{customdata[1]:.2f} ms<extra></extra>"))
+    fig.update_layout(xaxis=dict(title="ms dall'inizio del rerun", range=[0, record['totale_ms']]), yaxis=dict(title="Livello", autorange="reversed", dtick=1),
+                      bargap=0.05, height=120 + 40 * (max((s['livello'] for s in spans), default=0) + 1), margin=dict(l=10, r=10, t=10, b=10), showlegend=False)
+    return fig
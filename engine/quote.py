@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import numpy as np
+
+from .model import PESO_SPECIFICO_LEGNO, SPESSORE_LEGNO
+
+# --- LOGICA PREVENTIVATORE ---
+# Versione pura: la configurazione costi arriva come argomento, non da st.session_state.
+def calculate_quote(stats, user_inputs, cfg):
+    cost_ferro = stats['peso_ferro'] * cfg.get('costo_ferro_kg', 0)
+    mq_legno = (stats['peso_legno'] / PESO_SPECIFICO_LEGNO / SPESSORE_LEGNO / 10.0)
+    # Con il piano di taglio (engine/cutting.py) si paga la superficie delle tavole acquistate, non quella netta
+    cost_legno = stats.get('mq_tavole', mq_legno) * cfg.get('costo_legno_mq', 0)
+    cost_mat_tot = cost_ferro + cost_legno
+    days_iron = 0
+    if not user_inputs['stock_iron']: days_iron += cfg.get('gg_ordine_ferro', 1) + cfg.get('gg_arrivo_lastra', 5)
+    days_iron += cfg.get('gg_verniciatura_ferro', 5)
+    days_wood_supply = 0
+    if not user_inputs['stock_wood']: days_wood_supply = cfg.get('gg_ordine_legno', 2) + cfg.get('gg_arrivo_legno', 5)
+    n_tagli = stats.get('tagli_legno', stats['viti']/6)
+    mins_legno = (n_tagli * cfg.get('min_taglio_legno_pezzo', 0)) + (mq_legno * cfg.get('min_colore_legno_metro', 0))
+    hrs_legno = mins_legno / 60.0
+    days_wood_work = hrs_legno / 8.0
+    days_wood = days_wood_supply + days_wood_work + cfg.get('gg_verniciatura_legno', 3)
+    days_production = max(days_iron, days_wood)
+    mins_pre = (user_inputs['num_cols'] * cfg.get('min_preassemblaggio_modulo', 0)) + (stats['viti']/6 * cfg.get('min_preassemblaggio_mensola', 0))
+    mins_fin = user_inputs['num_cols'] * cfg.get('min_assemblaggio_finale_modulo', 0)
+    hrs_prod_tot = hrs_legno + ((mins_pre + mins_fin) / 60.0)
+    cost_labor_prod = hrs_prod_tot * cfg.get('costo_ora_operaio', 0)
+    log_cost_vivo = 0.0; log_days = 0; hrs_packing = cfg.get('ore_imballo_base', 1.0)
+    if user_inputs['logistics_type'] == "corriere":
+        hrs_packing += cfg.get('ore_imballo_extra', 2.0)
+        log_cost_vivo += user_inputs['costo_corriere']
+        log_days += cfg.get('gg_attesa_corriere', 2) + user_inputs['gg_viaggio_corriere']
+    else:
+        tot_man_hrs = (user_inputs['ore_viaggio'] + user_inputs['ore_montaggio']) * user_inputs['num_operai']
+        log_cost_vivo += tot_man_hrs * cfg.get('costo_ora_operaio', 0)
+        log_days += 1
+    cost_packing = (hrs_packing * cfg.get('costo_ora_operaio', 0)) + cfg.get('costo_imballo_materiale', 0)
+    costo_vivo_totale = cost_mat_tot + cost_labor_prod + cost_packing + log_cost_vivo
+    markup_pct = cfg.get('markup_percent', 30.0)
+    prezzo_vendita = costo_vivo_totale * (1 + (markup_pct / 100.0))
+    vat = prezzo_vendita * 0.22
+    del_date = user_inputs['start_date'] + timedelta(days=int(days_production + log_days + 1))
+    ratio_log = 0
+    if costo_vivo_totale > 0: ratio_log = log_cost_vivo / costo_vivo_totale
+    price_log_sale = prezzo_vendita * ratio_log
+    return {
+        "costo_vivo": costo_vivo_totale, "price_ex_vat": prezzo_vendita, "vat": vat, "price_total": prezzo_vendita + vat,
+        "logistics_price": price_log_sale, "logistics_type": user_inputs['logistics_type'], "delivery_date": del_date.strftime("%d/%m/%Y"), "days_total": int(days_production + log_days + 1)
+    }
+
+def calculate_quote_vec(stats, user_inputs, cfg):
+    # Stessa formula di calculate_quote su array NumPy: stats, user_inputs e cfg possono contenere
+    # array con forme compatibili (broadcasting), ad es. un progetto per riga e un listino per colonna.
+    # Restituisce array; la data di consegna si ottiene da start_date + days_total.
+    s = {k: np.asarray(v, dtype=np.float64) for k, v in stats.items()}
+    c = lambda key, default: np.asarray(cfg.get(key, default), dtype=np.float64)
+    u = lambda key, default=0.0: np.asarray(user_inputs.get(key, default))
+    mq_legno = s['peso_legno'] / PESO_SPECIFICO_LEGNO / SPESSORE_LEGNO / 10.0
+    cost_mat_tot = s['peso_ferro'] * c('costo_ferro_kg', 0) + s.get('mq_tavole', mq_legno) * c('costo_legno_mq', 0)
+    days_iron = np.where(u('stock_iron', False), 0.0, c('gg_ordine_ferro', 1) + c('gg_arrivo_lastra', 5)) + c('gg_verniciatura_ferro', 5)
+    days_wood_supply = np.where(u('stock_wood', False), 0.0, c('gg_ordine_legno', 2) + c('gg_arrivo_legno', 5))
+    n_tagli = s.get('tagli_legno', s['viti'] / 6)
+    hrs_legno = ((n_tagli * c('min_taglio_legno_pezzo', 0)) + (mq_legno * c('min_colore_legno_metro', 0))) / 60.0
+    days_production = np.maximum(days_iron, days_wood_supply + hrs_legno / 8.0 + c('gg_verniciatura_legno', 3))
+    num_cols = u('num_cols').astype(np.float64)
+    mins_pre = (num_cols * c('min_preassemblaggio_modulo', 0)) + (s['viti'] / 6 * c('min_preassemblaggio_mensola', 0))
+    mins_fin = num_cols * c('min_assemblaggio_finale_modulo', 0)
+    cost_labor_prod = (hrs_legno + (mins_pre + mins_fin) / 60.0) * c('costo_ora_operaio', 0)
+    corriere = u('logistics_type', "corriere") == "corriere"
+    hrs_packing = c('ore_imballo_base', 1.0) + np.where(corriere, c('ore_imballo_extra', 2.0), 0.0)
+    tot_man_hrs = (u('ore_viaggio').astype(np.float64) + u('ore_montaggio')) * u('num_operai')
+    log_cost_vivo = np.where(corriere, u('costo_corriere').astype(np.float64), tot_man_hrs * c('costo_ora_operaio', 0))
+    log_days = np.where(corriere, c('gg_attesa_corriere', 2) + u('gg_viaggio_corriere'), 1.0)
+    cost_packing = (hrs_packing * c('costo_ora_operaio', 0)) + c('costo_imballo_materiale', 0)
+    costo_vivo_totale = cost_mat_tot + cost_labor_prod + cost_packing + log_cost_vivo
+    prezzo_vendita = costo_vivo_totale * (1 + (c('markup_percent', 30.0) / 100.0))
+    vat = prezzo_vendita * 0.22
+    ratio_log = np.divide(log_cost_vivo, costo_vivo_totale, out=np.zeros(np.broadcast(log_cost_vivo, costo_vivo_totale).shape), where=costo_vivo_totale > 0)
+    return {
+        "costo_vivo": costo_vivo_totale, "price_ex_vat": prezzo_vendita, "vat": vat, "price_total": prezzo_vendita + vat,
+        "logistics_price": prezzo_vendita * ratio_log, "days_total": np.trunc(days_production + log_days + 1).astype(np.int64)
+    }
@@ -0,0 +1,124 @@
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from .model import PESO_SPECIFICO_LEGNO, SPESSORE_LEGNO
+from .pipeline import get_toolpaths, get_geometry
+
+# --- PIANIFICAZIONE PRODUZIONE ---
+# Coda degli ordini confermati sulle capacita' dei reparti (ore al giorno, solo giorni lavorativi).
+# Ogni ordine e' una piccola rete di lavorazioni con le attese del preventivo tra una e l'altra:
+#   laser -> verniciatura ferro (esterna, gg) --\
+#   legno -> colore legno -> asciugatura (gg) ---> assemblaggio -> logistica (gg) -> consegna
+# List scheduling: le lavorazioni pronte escono da una coda di priorita' (priorita', giorno pronto,
+# arrivo) e occupano la prima capacita' libera dei giorni successivi. Giorni contati dalla data di piano.
+RESOURCES = ("laser", "legno", "verniciatura", "assemblaggio")
+RESOURCE_LABELS = {"laser": "Laser", "legno": "Falegnameria", "verniciatura": "Verniciatura", "assemblaggio": "Assemblaggio"}
+ORDERS_FILE = "ordini.json"
+HORIZON = 366
+
+def order_from_quote(project, stats, user_inputs, cfg, order_id, priority=1):
+    # Ore per reparto e attese in giorni con le stesse voci di calculate_quote (engine/quote.py)
+    mq_legno = stats['peso_legno'] / PESO_SPECIFICO_LEGNO / SPESSORE_LEGNO / 10.0
+    n_tagli = stats.get('tagli_legno', stats['viti'] / 6)
+    mins_pre = (user_inputs['num_cols'] * cfg.get('min_preassemblaggio_modulo', 0)) + (stats['viti'] / 6 * cfg.get('min_preassemblaggio_mensola', 0))
+    mins_fin = user_inputs['num_cols'] * cfg.get('min_assemblaggio_finale_modulo', 0)
+    laser_s = sum(tp['tempo_s'] * pt['qty'] for pt, tp in zip(get_geometry(project)['part_types'], get_toolpaths(project)))
+    if user_inputs['logistics_type'] == "corriere": log_days = cfg.get('gg_attesa_corriere', 2) + user_inputs['gg_viaggio_corriere']
+    else: log_days = 1
+    return {
+        "id": order_id, "progetto": project['project_name'], "cliente": project['client_name'], "priorita": int(priority),
+        "confermato": user_inputs['start_date'].isoformat(),
+        "ore": {"laser": laser_s / 3600.0, "legno": n_tagli * cfg.get('min_taglio_legno_pezzo', 0) / 60.0,
+                "verniciatura": mq_legno * cfg.get('min_colore_legno_metro', 0) / 60.0, "assemblaggio": (mins_pre + mins_fin) / 60.0},
+        "attesa": {"ferro": 0 if user_inputs['stock_iron'] else cfg.get('gg_ordine_ferro', 1) + cfg.get('gg_arrivo_lastra', 5),
+                   "legno": 0 if user_inputs['stock_wood'] else cfg.get('gg_ordine_legno', 2) + cfg.get('gg_arrivo_legno', 5),
+                   "vern_ferro": cfg.get('gg_verniciatura_ferro', 5), "vern_legno": cfg.get('gg_verniciatura_legno', 3), "logistica": log_days},
+    }
+
+def capacity_calendar(cfg, start, days=HORIZON):
+    # Ore disponibili per reparto e giorno: zero nel fine settimana (o oltre i giorni lavorativi indicati)
+    weekday = (np.arange(days) + start.weekday()) % 7
+    open_day = weekday < int(cfg.get('giorni_lavorativi_settimana', 5))
+    return {r: np.where(open_day, float(cfg.get(f"ore_giorno_{r}", 8.0)), 0.0) for r in RESOURCES}
+
+def _reserve(free, res, day, hours, grow):
+    # Consuma la capacita' residua del reparto da 'day' in poi; restituisce l'ultimo giorno occupato
+    if hours <= 1e-9: return day
+    while True:
+        cum = np.cumsum(free[res][day:]); k = int(np.searchsorted(cum, hours - 1e-9))
+        if k < len(cum): break
+        grow(res)
+    end = day + k; free[res][day:end] = 0.0; free[res][end] = cum[k] - hours
+    return end
+
+def schedule_orders(orders, cfg, start=None):
+    # orders: lista di order_from_quote (anche letti da ordini.json). Ripianifica tutta la coda.
+    t0 = time.perf_counter(); start = start or date.today()
+    cal = capacity_calendar(cfg, start); free = {r: cal[r].copy() for r in RESOURCES}
+    def grow(res):
+        if cal[res].max() <= 0: raise ValueError(f"Capacita' nulla per il reparto {RESOURCE_LABELS[res]}")
+        free[res] = np.concatenate([free[res], capacity_calendar(cfg, start + timedelta(days=len(free[res])))[res]])
+    heap = []; out = []
+    for seq, o in enumerate(orders):
+        rel = max(0, (date.fromisoformat(o['confermato']) - start).days)
+        out.append({"id": o['id'], "progetto": o['progetto'], "cliente": o.get('cliente', ''), "priorita": o['priorita'], "fine": {}})
+        heapq.heappush(heap, (o['priorita'], rel + o['attesa']['ferro'], seq, "laser"))
+        heapq.heappush(heap, (o['priorita'], rel + o['attesa']['legno'], seq, "legno"))
+    while heap:
+        prio, ready, seq, res = heapq.heappop(heap); o = orders[seq]; done = out[seq]['fine']
+        done[res] = _reserve(free, res, ready, o['ore'][res], grow)
+        if res == "legno": heapq.heappush(heap, (prio, done[res] + 1, seq, "verniciatura"))
+        elif res == "assemblaggio":
+            days = done[res] + 1 + o['attesa']['logistica']
+            out[seq]['giorni'] = days; out[seq]['consegna'] = start + timedelta(days=int(days))
+        elif "laser" in done and "verniciatura" in done:
+            ready = max(done['laser'] + 1 + o['attesa']['vern_ferro'], done['verniciatura'] + 1 + o['attesa']['vern_legno'])
+            heapq.heappush(heap, (prio, ready, seq, "assemblaggio"))
+    used = {r: cal[r] - free[r][:len(cal[r])] for r in RESOURCES}
+    return {"start": start, "ordini": out, "carico": used, "capacita": cal, "tempo_s": time.perf_counter() - t0}
+
+def plan_delivery(queue, order, cfg, start=None):
+    # Data realistica per un nuovo ordine inserito nella coda esistente; se e' gia' confermato (stesso id) conta una volta sola
+    plan = schedule_orders([o for o in queue if o['id'] != order['id']] + [order], cfg, start)
+    return plan['ordini'][-1], plan
+
+def schedule_table(plan):
+    return [{"Ordine": o['id'], "Progetto": o['progetto'], "Cliente": o['cliente'], "Priorità": o['priorita'],
+             **{RESOURCE_LABELS[r]: plan['start'] + timedelta(days=int(o['fine'][r])) for r in RESOURCES}, "Consegna": o['consegna']} for o in plan['ordini']]
+
+def load_table(plan, days=30):
+    # Occupazione dei reparti nelle prossime settimane
+    return [{"Reparto": RESOURCE_LABELS[r], "Ore Impegnate": float(plan['carico'][r][:days].sum()), "Ore Disponibili": float(plan['capacita'][r][:days].sum()),
+             "Saturazione %": float(plan['carico'][r][:days].sum() / plan['capacita'][r][:days].sum() * 100.0) if plan['capacita'][r][:days].sum() else 0.0} for r in RESOURCES]
+
+# --- CODA SU FILE ---
+# Le sessioni Streamlit sono thread dello stesso processo: _ORDERS_LOCK serializza lettura, modifica e scrittura
+# (update_orders), cosi' due conferme contemporanee non si cancellano a vicenda.
+_ORDERS_LOCK = threading.RLock()
+
+def load_orders(path=ORDERS_FILE):
+    if not os.path.exists(path): return []
+    try:
+        with open(path, "r") as f: return json.load(f)
+    except (OSError, ValueError): return []
+
+def save_orders(orders, path=ORDERS_FILE):
+    # Scrittura atomica: un'altra sessione non legge mai un file a meta'
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".ordini-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f: json.dump(orders, f, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp); raise
+
+def update_orders(change, path=ORDERS_FILE):
+    # change: coda attuale -> nuova coda, applicata sul file appena riletto
+    with _ORDERS_LOCK:
+        orders = change(load_orders(path)); save_orders(orders, path); return orders
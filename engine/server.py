@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import contextlib
+import json
+from datetime import date
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Route
+
+from .model import DEFAULT_COSTS, MAX_MODULES, MODULE_LIMITS, SPESSORE_LEGNO, VERSION, module_letter, normalize_project, project_hash
+from .quote import calculate_quote
+from .artifacts import ARTIFACT_DIR, ARTIFACT_ENV, ByteCache, ArtifactStore
+from .jobs import job_manager
+from .pipeline import stage_cache, export_key, commercial_key, get_quote_stats, get_validation, get_commercial_pdf
+from .package import get_process_pool, pool_workers, shutdown_process_pool, render_job
+from .batch import DEFAULT_BATCH_INPUTS
+
+# --- API HTTP LOCALE ---
+# Preventivi ed export senza l'interfaccia Streamlit, per il sito e per l'ufficio tecnico. Il corpo di ogni POST e'
+# il JSON di un progetto salvato, oppure {"progetto": ..., "listino": {...}, "dati": {...}, "cliente": {...}, "pagamento": "", "note": ""}:
+# listino e dati sovrascrivono solo le chiavi che contengono (come load_costs_config e DEFAULT_BATCH_INPUTS).
+#   POST /preventivo        statistiche, preventivo (formula, senza la coda di produzione) e verifiche, in JSON
+#   POST /stl, POST /dxf    modello STL binario e DXF completo, renderizzati nel process pool
+#   POST /pdf/scheda        job della scheda tecnica; POST /pdf/preventivo job del preventivo cliente
+#   GET  /lavori/{id}       stato del job; GET /lavori/{id}/file il PDF quando e' pronto
+#   GET  /stato             contatori di cache, coalescenza, job e pool
+# Richieste identiche in volo nello stesso momento condividono un solo calcolo (Coalescer); gli export finiti restano
+# in una ByteCache del server, appoggiata all'ArtifactStore su disco condiviso con Moby.py (sopravvive ai riavvii).
+# I PDF passano dal job_manager: stesso progetto -> stesso job, anche tra client diversi.
+# Uso: python -m engine.server [--host 127.0.0.1] [--port 8502] [--workers 4] [--cache-mb 256] [--store-mb 1024]
+EXPORT_TYPES = {"stl": ("model/stl", "stl"), "dxf_full": ("application/dxf", "dxf"), "pdf_report": ("application/pdf", "pdf"), "pdf_commercial": ("application/pdf", "pdf")}
+
+class Coalescer:
+    # Una sola esecuzione per chiave tra le richieste in volo; usato solo dal thread dell'event loop, quindi senza lock
+    def __init__(self):
+        self._inflight = {}; self.calls = 0; self.shared = 0
+
+    async def run(self, key, factory):
+        self.calls += 1; task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory()); self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else: self.shared += 1
+        # shield: un client che chiude la connessione non cancella il calcolo degli altri
+        return await asyncio.shield(task)
+
+    def info(self): return {"richieste": self.calls, "condivise": self.shared, "in_volo": len(self._inflight)}
+
+coalescer = Coalescer()
+artifacts = ByteCache(256 * 1024 * 1024, store=ArtifactStore())
+
+def render_export(kind, project, extra=None):
+    # Eseguito nei worker: bytes dell'export (extra = totali, cliente, pagamento, note per il preventivo)
+    if kind == "pdf_commercial": return get_commercial_pdf(project, *extra)
+    return render_job({"pdf_report": "pdf"}.get(kind, kind), project)[0][1]
+
+async def pooled_export(key, kind, project, extra=None):
+    # Lettura e scrittura dell'archivio su disco (file di piu' MB, pulizia della cartella) nel threadpool, non sull'event loop
+    data = await run_in_threadpool(artifacts.get, key)
+    if data is not None: return data
+    async def build():
+        data = await asyncio.get_running_loop().run_in_executor(get_process_pool(), render_export, kind, project, extra)
+        return await run_in_threadpool(artifacts.put, key, data)
+    return await coalescer.run(key, build)
+
+# --- RICHIESTE ---
+class BadRequest(ValueError): pass
+
+def _dumps(obj): return json.dumps(obj, ensure_ascii=False, default=lambda v: v.item() if hasattr(v, "item") else v.tolist() if hasattr(v, "tolist") else str(v))
+
+def json_response(obj, status=200): return Response(_dumps(obj), status, media_type="application/json")
+
+async def read_request(request):
+    try: body = await request.json()
+    except ValueError: raise BadRequest("Corpo della richiesta non valido: serve un JSON")
+    if not isinstance(body, dict): raise BadRequest("Il corpo deve essere un oggetto JSON")
+    raw = body.get('progetto', body)
+    if not isinstance(raw, dict) or not isinstance(raw.get('cols', []), list): raise BadRequest("Progetto non valido")
+    if not raw.get('cols'): raise BadRequest("Il progetto non ha moduli")
+    if len(raw['cols']) > MAX_MODULES: raise BadRequest(f"Massimo {MAX_MODULES} moduli per progetto")
+    if not all(isinstance(c, dict) for c in raw['cols']): raise BadRequest("Progetto non valido: ogni modulo deve essere un oggetto JSON")
+    try: project = normalize_project(raw)
+    except (TypeError, ValueError) as e: raise BadRequest(f"Progetto non valido: {e}")
+    # Stessi limiti dell'editor dei moduli: valori fuori scala non arrivano a geometria ed export
+    for i, col in enumerate(project['cols']):
+        for k, (lo, hi) in MODULE_LIMITS.items():
+            if not isinstance(col[k], (int, float)) or not lo <= col[k] <= hi: raise BadRequest(f"Modulo {module_letter(i)}: {k} deve essere tra {lo} e {hi}")
+        # Quote manuali nel montante, come la verifica fuori_altezza (engine/validation.py)
+        top = col['h'] - SPESSORE_LEGNO
+        if col['manual'] and not all(0 <= z <= top for z in col['man_heights']): raise BadRequest(f"Modulo {module_letter(i)}: le quote delle mensole devono essere tra 0 e {top:g} cm")
+    if not all(isinstance(body.get(k, {}), dict) for k in ("listino", "dati", "cliente")): raise BadRequest("listino, dati e cliente devono essere oggetti JSON")
+    cfg = dict(DEFAULT_COSTS, **body.get('listino', {}))
+    inputs = dict(DEFAULT_BATCH_INPUTS, **body.get('dati', {})); inputs['num_cols'] = project['num_colonne']
+    try: inputs['start_date'] = date.fromisoformat(inputs['start_date']) if isinstance(inputs.get('start_date'), str) else date.today()
+    except ValueError: raise BadRequest("start_date deve essere una data ISO (AAAA-MM-GG)")
+    return body, project, cfg, inputs
+
+def handler(fn):
+    # Errori di input -> 400 con il messaggio, come gli st.error dell'interfaccia; il resto -> 500
+    async def endpoint(request):
+        try: return await fn(request)
+        except BadRequest as e: return json_response({"errore": str(e)}, 400)
+        except Exception as e: return json_response({"errore": f"{type(e).__name__}: {e}"}, 500)
+    return endpoint
+
+def quote_of(project, cfg, inputs):
+    stats = get_quote_stats(project, cfg); checks = get_validation(project, cfg)
+    return {"statistiche": stats, "preventivo": calculate_quote(stats, inputs, cfg),
+            "verifiche": {"errori": checks['errori'], "avvisi": checks['avvisi'], "violazioni": checks['violazioni']}}
+
+async def coalesced_quote(project, cfg, inputs):
+    return await coalescer.run(f"quote:{project_hash([project, cfg, inputs])}", lambda: run_in_threadpool(quote_of, project, cfg, inputs))
+
+@handler
+async def quote_endpoint(request):
+    _, project, cfg, inputs = await read_request(request)
+    return json_response(await coalesced_quote(project, cfg, inputs))
+
+def export_endpoint(kind):
+    media, ext = EXPORT_TYPES[kind]
+    @handler
+    async def endpoint(request):
+        _, project, _, _ = await read_request(request)
+        data = await pooled_export(export_key(kind, project), kind, project)
+        name = project['project_name'].encode("ascii", "ignore").decode().replace('"', "") or "progetto"
+        return Response(data, media_type=media, headers={"Content-Disposition": f'attachment; filename="{name}.{ext}"'})
+    return endpoint
+
+def job_view(job):
+    view = {k: job[k] for k in ("key", "stato", "progress", "messaggio", "errore", "durata")}
+    return dict(view, url=f"/lavori/{job['key']}", file=f"/lavori/{job['key']}/file" if job['stato'] == "pronto" else None)
+
+def pdf_endpoint(kind):
+    @handler
+    async def endpoint(request):
+        body, project, cfg, inputs = await read_request(request)
+        extra = None
+        if kind == "pdf_commercial":
+            # Stessi argomenti di get_commercial_pdf nel tab preventivo; la consegna e' quella della formula
+            totals = (await coalesced_quote(project, cfg, inputs))['preventivo']
+            client = dict({"name": project['client_name'], "address": project['client_address'], "piva": ""}, **body.get('cliente', {}))
+            extra = (totals, client, body.get('pagamento', "Rimessa diretta"), body.get('note', ""))
+            key = commercial_key(project, *extra)
+        else: key = export_key(kind, project)
+        # Il job gira in un thread del job_manager e aspetta il worker: l'event loop resta libero per il polling.
+        # submit cerca il PDF anche nell'archivio su disco: anche lui nel threadpool
+        job = await run_in_threadpool(job_manager.submit, key, lambda progress: get_process_pool().submit(render_export, kind, project, extra).result(), artifacts)
+        return json_response(job_view(job), 200 if job['stato'] == "pronto" else 202)
+    return endpoint
+
+@handler
+async def job_endpoint(request):
+    job = job_manager.get(request.path_params['key'])
+    if job is None: return json_response({"errore": "Job sconosciuto o scaduto"}, 404)
+    return json_response(job_view(job))
+
+@handler
+async def job_file_endpoint(request):
+    key = request.path_params['key']; job = job_manager.get(key)
+    if job is None: return json_response({"errore": "Job sconosciuto o scaduto"}, 404)
+    if job['stato'] != "pronto": return json_response(job_view(job), 409)
+    return Response(job['result'], media_type=EXPORT_TYPES[key.split(":")[0]][0])
+
+@handler
+async def status_endpoint(request):
+    # Solo lettura: un GET di monitoraggio non avvia il pool (0 worker se non c'e')
+    return json_response({"versione": VERSION, "worker": pool_workers(), "coalescenza": coalescer.info(), "artefatti": artifacts.info(),
+                          "disco": artifacts.store.info() if artifacts.store is not None else None, "stadi": stage_cache.info(), "lavori": job_manager.info()})
+
+routes = [
+    Route("/preventivo", quote_endpoint, methods=["POST"]),
+    Route("/stl", export_endpoint("stl"), methods=["POST"]),
+    Route("/dxf", export_endpoint("dxf_full"), methods=["POST"]),
+    Route("/pdf/scheda", pdf_endpoint("pdf_report"), methods=["POST"]),
+    Route("/pdf/preventivo", pdf_endpoint("pdf_commercial"), methods=["POST"]),
+    Route("/lavori/{key}", job_endpoint),
+    Route("/lavori/{key}/file", job_file_endpoint),
+    Route("/stato", status_endpoint),
+]
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Pool avviato con il server (i worker importano il motore prima della prima richiesta), chiuso con lui
+    get_process_pool().submit(render_export, "json", normalize_project({"cols": [{}]}))
+    yield
+    shutdown_process_pool(wait=True)
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+def main(argv=None):
+    import uvicorn
+    ap = argparse.ArgumentParser(description="API HTTP locale per preventivi ed export")
+    ap.add_argument("--host", default="127.0.0.1"); ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--workers", type=int, default=None, help="processi per gli export (default: min(4, CPU))")
+    ap.add_argument("--cache-mb", type=float, default=256.0, help="memoria per gli export gia' prodotti (0 = nessuna cache)")
+    ap.add_argument("--store-mb", type=float, default=1024.0, help=f"archivio su disco degli export (cartella {ARTIFACT_DIR} o ${ARTIFACT_ENV}; 0 = spento)")
+    args = ap.parse_args(argv)
+    artifacts.max_bytes = int(args.cache_mb * 1024 * 1024)
+    if args.store_mb > 0: artifacts.store.max_bytes = int(args.store_mb * 1024 * 1024)
+    else: artifacts.store = None
+    get_process_pool(args.workers)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from .model import normalize_project
+from .quote import calculate_quote_vec
+from .pipeline import get_quote_stats
+
+# --- ANALISI WHAT-IF ---
+# Il preventivo valutato su una griglia di uno o due parametri in un solo passaggio vettoriale.
+# I parametri di listino e di logistica entrano come array nella formula; le dimensioni dei moduli
+# cambiano la geometria, quindi le statistiche si calcolano (in cache) una volta per valore.
+# Parametro -> (etichetta, tipo, minimo proposto, massimo proposto)
+SWEEP_PARAMS = {
+    "markup_percent": ("Ricarico %", "cfg", 0.0, 100.0), "costo_ferro_kg": ("Ferro (€/kg)", "cfg", 0.0, 10.0),
+    "costo_legno_mq": ("Legno (€/mq)", "cfg", 0.0, 100.0), "costo_ora_operaio": ("Operaio (€/h)", "cfg", 0.0, 80.0),
+    "ore_viaggio": ("Ore Viaggio (A/R)", "input", 0.0, 20.0), "ore_montaggio": ("Ore Montaggio", "input", 0.0, 50.0),
+    "costo_corriere": ("Costo Spedizione €", "input", 0.0, 2000.0), "gg_viaggio_corriere": ("GG Viaggio", "input", 1.0, 15.0),
+    "w": ("Larghezza Moduli (cm)", "dim", 40.0, 150.0), "h": ("Altezza Moduli (cm)", "dim", 60.0, 300.0),
+    "d": ("Profondità Moduli (cm)", "dim", 20.0, 60.0), "r": ("Ripiani per Modulo", "dim", 2.0, 10.0),
+}
+SWEEP_METRICS = {"price_total": "Prezzo Ivato €", "price_ex_vat": "Imponibile €", "costo_vivo": "Costo Vivo €", "margine": "Margine €", "days_total": "Giorni Consegna"}
+
+def sweep_values(param, lo, hi, steps):
+    # Le dimensioni vanno a passo intero (cm, numero ripiani): niente geometrie duplicate
+    values = np.linspace(lo, hi, max(int(steps), 1))
+    return np.unique(np.round(values)) if SWEEP_PARAMS[param][1] == "dim" else values
+
+def with_dimension(project, key, value):
+    # Stessa misura su tutti i moduli; cambiando altezza o ripiani le quote manuali non valgono piu'
+    value = int(value) if key == "r" else float(value)
+    cols = [dict(c, **{key: value}) for c in project['cols']]
+    if key in ("h", "r"): cols = [dict(c, manual=False) for c in cols]
+    return normalize_project(dict(project, cols=cols))
+
+def quote_sweep(project, cfg, user_inputs, axes):
+    # axes: [(parametro, valori)] con uno o due elementi; ogni risultato ha forma (len(valori_1), len(valori_2))
+    names = [a[0] for a in axes]; vals = [np.asarray(a[1], dtype=np.float64) for a in axes]
+    shape = tuple(len(v) for v in vals); nd = len(shape)
+    def along(k): s = [1] * nd; s[k] = shape[k]; return vals[k].reshape(s)
+    cfg_v = dict(cfg); inputs = dict(user_inputs); inputs['num_cols'] = project['num_colonne']
+    dims = []
+    for k, name in enumerate(names):
+        kind = SWEEP_PARAMS[name][1]
+        if kind == "cfg": cfg_v[name] = along(k)
+        elif kind == "input": inputs[name] = along(k)
+        else: dims.append(k)
+    # Statistiche solo sulla sotto-griglia dimensionale, poi broadcasting sugli altri assi
+    dim_shape = tuple(shape[k] if k in dims else 1 for k in range(nd)); stats = {}
+    for idx in np.ndindex(*dim_shape):
+        p = project
+        for k in dims: p = with_dimension(p, names[k], vals[k][idx[k]])
+        for key, x in get_quote_stats(p, cfg).items(): stats.setdefault(key, np.empty(dim_shape))[idx] = x
+    res = {k: np.broadcast_to(v, shape) for k, v in calculate_quote_vec(stats, inputs, cfg_v).items()}
+    res['margine'] = res['price_ex_vat'] - res['costo_vivo']
+    if 'start_date' in user_inputs: res['delivery_date'] = np.datetime64(user_inputs['start_date'], "D") + res['days_total'].astype("timedelta64[D]")
+    return dict(res, params=names, values=vals)
+
+def build_sweep_figure(sweep, metric="price_total"):
+    import plotly.graph_objects as go
+    z = sweep[metric]; labels = [SWEEP_PARAMS[p][0] for p in sweep['params']]
+    dates = sweep.get('delivery_date')
+    if len(sweep['params']) == 1:
+        fig = go.Figure(go.Scatter(x=sweep['values'][0], y=z, mode="lines+markers", customdata=None if dates is None else dates.astype(str),
+                                   hovertemplate=f"{labels[0]}: %{{x:.2f}}<br>{SWEEP_METRICS[metric]}: %{{y:.2f}}" + ("<br>Consegna: %{customdata}" if dates is not None else "") + "<extra></extra>"))
+        fig.update_layout(xaxis_title=labels[0], yaxis_title=SWEEP_METRICS[metric], height=450, margin=dict(l=10, r=10, t=10, b=10))
+        return fig
+    fig = go.Figure(go.Surface(x=sweep['values'][1], y=sweep['values'][0], z=z, colorscale="Viridis", customdata=None if dates is None else dates.astype(str),
+                               hovertemplate=f"{labels[1]}: %{{x:.2f}}<br>{labels[0]}: %{{y:.2f}}<br>{SWEEP_METRICS[metric]}: %{{z:.2f}}" + ("<br>Consegna: %{customdata}" if dates is not None else "") + "<extra></extra>"))
+    fig.update_layout(scene=dict(xaxis_title=labels[1], yaxis_title=labels[0], zaxis_title=SWEEP_METRICS[metric]), height=600, margin=dict(l=0, r=0, t=0, b=0))
+    return fig
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+# --- PERCORSO UTENSILE ---
+# Ordine di foratura/taglio che riduce gli spostamenti a vuoto della testa: nearest neighbour come
+# soluzione iniziale, poi 2-opt sul percorso aperto. Misure in cm, velocita' in cm/s.
+DEFAULT_MACHINE = {"vel_rapido": 500.0, "vel_taglio": 5.0, "sec_foro": 1.5, "sec_pezzo": 10.0}
+
+def path_length(points, order, start=(0.0, 0.0)):
+    if not len(order): return 0.0
+    pts = np.asarray(points, dtype=np.float64)[order]
+    return float(np.hypot(*(pts[0] - start)) + np.hypot(*np.diff(pts, axis=0).T).sum())
+
+def nearest_neighbour(points, start=(0.0, 0.0)):
+    pts = np.asarray(points, dtype=np.float64); n = len(pts)
+    if n == 0: return []
+    left = np.ones(n, dtype=bool); cur = np.asarray(start, dtype=np.float64); order = []
+    for _ in range(n):
+        d = np.hypot(pts[:, 0] - cur[0], pts[:, 1] - cur[1]); d[~left] = np.inf
+        k = int(np.argmin(d)); order.append(k); left[k] = False; cur = pts[k]
+    return order
+
+def two_opt(points, order, start=(0.0, 0.0), max_passes=20):
+    # Inversione dei segmenti finche' migliora; il punto di partenza (origine macchina) resta fisso
+    if len(order) < 3: return list(order)
+    pts = np.vstack([np.asarray(start, dtype=np.float64)[None, :], np.asarray(points, dtype=np.float64)[order]])
+    route = np.arange(len(pts)); n = len(pts)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a = pts[route[i - 1]]; b = pts[route[i]]
+            c = pts[route[i + 1:]]; d = pts[route[np.minimum(np.arange(i + 2, n + 1), n - 1)]]
+            # guadagno di ogni inversione route[i..j] (j > i); l'ultimo segmento non ha successore
+            old = np.hypot(*(a - b)) + np.hypot(*(c - d).T); old[-1] = np.hypot(*(a - b))
+            new = np.hypot(*(a - c).T) + np.hypot(*(b - d).T); new[-1] = np.hypot(*(a - c[-1]))
+            gain = old - new; j = int(np.argmax(gain))
+            if gain[j] > 1e-9: route[i:i + j + 2] = route[i:i + j + 2][::-1].copy(); improved = True
+        if not improved: break
+    return [order[k - 1] for k in route[1:]]
+
+def optimize_order(points, start=(0.0, 0.0)):
+    order = two_opt(points, nearest_neighbour(points, start), start)
+    return order, path_length(points, order, start)
+
+# --- PEZZI & FOGLI ---
+def part_toolpath(part, machine=None):
+    # Fori della piastra nel riferimento del DXF (X lungo l'altezza, Y lungo la profondita')
+    m = dict(DEFAULT_MACHINE); m.update(machine or {})
+    pts = [(hy, hx) for hx, hy in part['holes']]
+    base = path_length(pts, list(range(len(pts))))
+    order, length = optimize_order(pts)
+    perimeter = 2 * (part['h'] + part['w'])
+    secs = length / m['vel_rapido'] + len(pts) * m['sec_foro'] + perimeter / m['vel_taglio'] + m['sec_pezzo']
+    return {"ordine": order, "holes": [part['holes'][k] for k in order], "corsa_vuoto": length, "corsa_vuoto_iniziale": base, "tempo_s": secs}
+
+def ordered_part(part, machine=None):
+    # Copia del pezzo con i fori nell'ordine ottimizzato: i writer DXF li emettono in quella sequenza
+    tp = part_toolpath(part, machine); out = dict(part); out['holes'] = tp['holes']; return out
+
+def sheet_toolpath(sheet, machine=None):
+    # Ordine dei pezzi sul foglio (dal centro di ciascuno) e fori di ogni pezzo ottimizzati localmente
+    m = dict(DEFAULT_MACHINE); m.update(machine or {})
+    centers = [(pl['x'] + pl['dx'] / 2, pl['y'] + pl['dy'] / 2) for pl in sheet['parts']]
+    order, _ = optimize_order(centers)
+    parts = []; travel = 0.0; cur = (0.0, 0.0); holes_total = 0; cut_len = 0.0
+    for k in order:
+        pl = sheet['parts'][k]; pts = [(pl['x'] + x, pl['y'] + y) for x, y in pl['holes']]
+        h_order, _ = optimize_order(pts, cur) if pts else ([], 0.0)
+        seq = [pts[i] for i in h_order] + [(pl['x'], pl['y'])]
+        travel += math.hypot(seq[0][0] - cur[0], seq[0][1] - cur[1]) + sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(seq, seq[1:]))
+        cur = (pl['x'], pl['y']); holes_total += len(pts); cut_len += 2 * (pl['dx'] + pl['dy'])
+        parts.append(dict(pl, holes=[pl['holes'][i] for i in h_order]))
+    secs = travel / m['vel_rapido'] + holes_total * m['sec_foro'] + cut_len / m['vel_taglio'] + len(parts) * m['sec_pezzo']
+    return {"parts": parts, "corsa_vuoto": travel, "tempo_s": secs}
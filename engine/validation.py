@@ -0,0 +1,73 @@
+import numpy as np
+
+from .model import SPESSORE_LEGNO, DIAMETRO_FORO, PESO_SPECIFICO_LEGNO, DEFAULT_COSTS, module_letter
+
+# --- VERIFICHE GEOMETRICHE E STRUTTURALI ---
+# Tutte le mensole e tutti i fori del progetto in array piatti (modulo, mensola) come in wall_arrays: ogni verifica
+# e' un confronto vettoriale, in Python si creano solo le righe delle violazioni trovate.
+# Fori: distanze minime di EN 1993-1-8 (bordo >= 1.2 d0, interasse lungo il montante >= 2.2 d0, lungo la
+# profondita' >= 2.4 d0). Mensole: trave appoggiata sulla luce w, sezione d x spessore, carico uniforme
+# (listino: carico_mensola_kg_m2) piu' peso proprio; la freccia elastica va confrontata con luce / freccia_limite.
+# Con la foratura attuale (engine/geometry.py: OFFSET_LATERALI dai lati, d/2, meta' spessore dal piano) i fori non
+# violano mai bordo e interasse se le mensole non si sovrappongono: quelle verifiche proteggono foratture future.
+VALIDATION_KEYS = ("carico_mensola_kg_m2", "modulo_elastico_legno", "freccia_limite")
+DEFAULT_VALIDATION = {k: DEFAULT_COSTS[k] for k in VALIDATION_KEYS}
+MIN_BORDO = 1.2 * DIAMETRO_FORO
+MIN_INTERASSE_H = 2.2 * DIAMETRO_FORO
+MIN_INTERASSE_P = 2.4 * DIAMETRO_FORO
+# Fori di mensole adiacenti distano quanto i piani: la distanza minima tra i piani copre anche l'interasse verticale
+MIN_DISTANZA_PIANI = max(SPESSORE_LEGNO, MIN_INTERASSE_H)
+EPS = 1e-6
+VALIDATION_TYPES = {"fuori_altezza": "Mensola fuori dal montante", "sovrapposizione": "Mensole sovrapposte", "interasse_fori": "Fori troppo vicini",
+                    "distanza_bordo": "Foro troppo vicino al bordo", "freccia": "Freccia mensola eccessiva"}
+
+def shelf_deflection(w, d, cfg=None):
+    # Freccia in mezzeria (mm) e limite (mm) per mensole di luce w e profondita' d (cm, anche array)
+    cfg = dict(DEFAULT_VALIDATION, **{k: v for k, v in (cfg or {}).items() if k in VALIDATION_KEYS})
+    L = np.asarray(w, dtype=np.float64) * 10.0; b = np.asarray(d, dtype=np.float64) * 10.0; t = SPESSORE_LEGNO * 10.0
+    # Carico lineare in N/mm: utile (kg/m2 sulla profondita') + peso proprio (g/cm3 sulla sezione)
+    q = cfg['carico_mensola_kg_m2'] * 9.81 * (b / 1000.0) / 1000.0 + PESO_SPECIFICO_LEGNO * 1e-6 * 9.81 * b * t
+    inertia = b * t ** 3 / 12.0
+    return 5.0 * q * L ** 4 / (384.0 * cfg['modulo_elastico_legno'] * inertia), L / cfg['freccia_limite']
+
+def _rows(kind, grave, mod, shelf, value, limit, fmt):
+    return [{"modulo": module_letter(int(m)), "mensola": int(s) + 1 if s >= 0 else None, "tipo": kind, "gravita": grave, "valore": round(float(v), 2),
+             "limite": round(float(lim), 2), "messaggio": fmt.format(v=v, lim=lim)} for m, s, v, lim in zip(mod, shelf, value, limit)]
+
+def validate_geometry(geo, cfg=None):
+    modules = geo['modules']; n = len(modules)
+    counts = np.array([m['r'] for m in modules], dtype=np.int64)
+    h = np.array([m['h'] for m in modules], dtype=np.float64); w = np.array([m['w'] for m in modules], dtype=np.float64)
+    d = np.array([m['d'] for m in modules], dtype=np.float64)
+    # Mensole: quota, modulo e numero della mensola nel modulo (ordine di inserimento)
+    z = np.concatenate([m['z'] for m in modules]) if n else np.empty(0); mod = np.repeat(np.arange(n), counts)
+    shelf = np.arange(len(z)) - np.repeat(np.cumsum(counts) - counts, counts)
+    out = []
+    top = h[mod] - SPESSORE_LEGNO; outside = (z < -EPS) | (z > top + EPS); bad = outside
+    out += _rows("fuori_altezza", "errore", mod[bad], shelf[bad], z[bad], np.where(z[bad] < 0, 0.0, top[bad]), "Quota {v:.1f} cm fuori da 0 - {lim:.1f} cm")
+    # Coppie di mensole adiacenti (per quota) nello stesso modulo: distanza tra i piani, che e' anche l'interasse dei fori
+    order = np.lexsort((z, mod)); zs = z[order]; ms = mod[order]; gap = np.diff(zs); same = ms[1:] == ms[:-1]
+    bad = same & (gap < MIN_DISTANZA_PIANI - EPS); upper = order[1:]
+    out += _rows("sovrapposizione", "errore", ms[1:][bad], shelf[upper][bad], gap[bad], np.full(bad.sum(), MIN_DISTANZA_PIANI),
+                 "Distanza tra i piani {v:.1f} cm < {lim:.1f} cm (spessore del piano e interasse dei fori)")
+    # Fori delle piastre (profondita', quota), una riga per mensola: distanza dai bordi (le mensole gia' fuori
+    # dal montante non si ripetono) e interasse lungo la profondita'. Minimi con la foratura attuale: bordo
+    # min(OFFSET_LATERALI, SPESSORE_LEGNO / 2), interasse d / 2 - OFFSET_LATERALI (tests/test_validation.py)
+    holes = np.array([hole for m in modules for hole in m['holes']], dtype=np.float64).reshape(-1, 2)
+    per_shelf = len(holes) // max(len(z), 1) if len(z) else 0
+    if per_shelf:
+        hm = np.repeat(mod, per_shelf)
+        edge = np.minimum.reduce([holes[:, 0], d[hm] - holes[:, 0], holes[:, 1], h[hm] - holes[:, 1]]).reshape(-1, per_shelf).min(axis=1)
+        bad = (edge < MIN_BORDO - EPS) & ~outside
+        out += _rows("distanza_bordo", "errore", mod[bad], shelf[bad], edge[bad], np.full(bad.sum(), MIN_BORDO), "Distanza dal bordo {v:.2f} cm < {lim:.2f} cm")
+        across = np.diff(np.sort(holes[:, 0].reshape(-1, per_shelf), axis=1), axis=1).min(axis=1) if per_shelf > 1 else np.full(len(z), np.inf)
+        bad = across < MIN_INTERASSE_P - EPS
+        out += _rows("interasse_fori", "errore", mod[bad], shelf[bad], across[bad], np.full(bad.sum(), MIN_INTERASSE_P), "Interasse fori in profondita' {v:.2f} cm < {lim:.2f} cm")
+    # Freccia: una per modulo (tutte le mensole del modulo hanno la stessa luce e sezione)
+    sag, sag_lim = shelf_deflection(w, d, cfg); bad = (sag > sag_lim + EPS) & (counts > 0)
+    out += _rows("freccia", "avviso", np.flatnonzero(bad), np.full(bad.sum(), -1), sag[bad], sag_lim[bad], "Freccia {v:.1f} mm > limite {lim:.1f} mm")
+    return {"violazioni": out, "errori": sum(v['gravita'] == "errore" for v in out), "avvisi": sum(v['gravita'] == "avviso" for v in out),
+            "freccia_mm": sag, "freccia_limite_mm": sag_lim}
+
+def validation_table(result):
+    return [{"Modulo": v['modulo'], "Mensola": str(v['mensola'] or "-"), "Verifica": VALIDATION_TYPES[v['tipo']], "Gravità": v['gravita'], "Dettaglio": v['messaggio']} for v in result['violazioni']]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# I test importano il pacchetto engine dalla radice del repository, qualunque sia la cartella di lancio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
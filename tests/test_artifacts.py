@@ -0,0 +1,34 @@
+import os
+
+import engine.artifacts as artifacts
+from engine import ArtifactStore
+
+def counting(store):
+    calls = []; scan = store._scan
+    def counted(): calls.append(1); return scan()
+    store._scan = counted
+    return calls
+
+def folder_bytes(path): return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+def test_put_rescans_only_past_the_limit_or_every_n_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "RESCAN_WRITES", 10)
+    store = ArtifactStore(str(tmp_path), max_bytes=100 * 1000); scans = counting(store)
+    for i in range(25): store.put(f"k{i}", b"x" * 1000)
+    # La prima scrittura legge la cartella (dimensione ignota), poi una lettura ogni 10 scritture
+    assert len(scans) == 3 and store.evicted == 0
+    assert all(store.get(f"k{i}") == b"x" * 1000 for i in range(25))
+
+def test_eviction_keeps_the_folder_within_max_bytes(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=20 * 1000)
+    for i in range(60): store.put(f"k{i}", "y" * 1000); assert folder_bytes(tmp_path) <= store.max_bytes
+    assert store.evicted > 0 and store.get("k59") == "y" * 1000 and store.get("k0") is None
+
+def test_info_is_cached_for_a_few_seconds(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path)); store.put("a", b"1234")
+    scans = counting(store)
+    for _ in range(5): info = store.info()
+    assert len(scans) == 0 and info['entries'] == 1 and info['bytes'] == 5 and info['bytes_written'] == 5
+    monkeypatch.setattr(artifacts, "INFO_TTL_S", -1.0)
+    store.info(); assert len(scans) == 1
+    store.clear(); assert store.info()['entries'] == 0
@@ -0,0 +1,80 @@
+import io
+import zipfile
+from collections import Counter
+
+import ezdxf
+import pytest
+from ezdxf.lldxf.encoding import decode_dxf_unicode
+
+from engine import (normalize_project, build_geometry, nesting_items, nest_parts, generate_full_dxf, generate_sheet_dxf, generate_single_dxf,
+                    stream_full_dxf, stream_sheet_dxf, stream_single_dxf, stream_dxf_zip)
+from engine.pipeline import type_as_part
+from engine.dxf_stream import encode_dxf
+
+# Lo streaming R12 (engine/dxf_stream.py) deve dare le stesse entita' dei documenti ezdxf una volta esplosi i blocchi:
+# tipo, layer, coordinate e testi. Il lato streaming passa dai byte consegnati (cp1252 con \U+XXXX, CRLF).
+NAMES = ["Bench", "Città Perché €", "Tōkyō 東京 Ωmega"]
+
+def read(data):
+    # str dai documenti ezdxf, byte (cp1252, CRLF) dallo streaming
+    return ezdxf.read(io.StringIO(data) if isinstance(data, str) else io.TextIOWrapper(io.BytesIO(data), encoding="cp1252"))
+
+def entity_signature(data):
+    doc = read(data); sig = Counter()
+    for e in doc.modelspace():
+        for v in (e.virtual_entities() if e.dxftype() == "INSERT" else [e]):
+            t = v.dxftype(); layer = v.dxf.layer
+            if t in ("LWPOLYLINE", "POLYLINE"):
+                pts = v.get_points("xy") if t == "LWPOLYLINE" else [tuple(p)[:2] for p in v.points()]
+                sig[("POLY", layer, tuple((round(x, 4), round(y, 4)) for x, y in pts))] += 1
+            elif t == "CIRCLE": sig[(t, layer, round(v.dxf.center.x, 4), round(v.dxf.center.y, 4), round(v.dxf.radius, 4))] += 1
+            elif t == "TEXT": sig[(t, layer, decode_dxf_unicode(v.dxf.text), round(v.dxf.insert.x, 4), round(v.dxf.insert.y, 4), round(v.dxf.height, 4), round(v.dxf.rotation, 4))] += 1
+            else: sig[(t, layer)] += 1
+    return sig
+
+def delivered(fn, *args):
+    buf = io.StringIO(); fn(buf, *args); data = encode_dxf(buf.getvalue())
+    assert b"\r\n" in data and b"\n" not in data.replace(b"\r\n", b"")
+    return data
+
+@pytest.fixture(scope="module")
+def project():
+    p = normalize_project({"cols": [{"w": w, "h": h, "d": d, "r": r} for w, h, d, r in
+                                    [(60, 200, 30, 4), (90, 280, 45, 6), (120, 400, 25, 12), (60, 120, 30, 2), (90, 400, 45, 20)] * 4]})
+    geo = build_geometry(p['cols']); nest = nest_parts(nesting_items(geo['part_types']))
+    assert nest['fogli'] >= 2
+    return geo, nest
+
+@pytest.mark.parametrize("name", NAMES)
+def test_single_dxf_matches_ezdxf(project, name):
+    geo, _ = project
+    for pt in geo['part_types']:
+        part = type_as_part(pt); ref = entity_signature(generate_single_dxf(part, name))
+        assert ref and entity_signature(delivered(stream_single_dxf, part, name)) == ref
+
+@pytest.mark.parametrize("name", NAMES)
+def test_full_dxf_matches_ezdxf(project, name):
+    geo, _ = project
+    ref = entity_signature(generate_full_dxf(geo['part_types'], name))
+    assert sum(ref.values()) > len(geo['part_types']) and entity_signature(delivered(stream_full_dxf, geo['part_types'], name)) == ref
+
+@pytest.mark.parametrize("name", NAMES)
+def test_every_sheet_matches_ezdxf(project, name):
+    _, nest = project
+    for sheet in nest['sheets']:
+        ref = entity_signature(generate_sheet_dxf(sheet, nest['config'], name))
+        assert entity_signature(delivered(stream_sheet_dxf, sheet, nest['config'], name)) == ref
+
+def test_zip_members_match_ezdxf(project):
+    _, nest = project; name = NAMES[-1]; out = io.BytesIO()
+    stream_dxf_zip(out, [(f"{i}.dxf", stream_sheet_dxf, (sh, nest['config'], name)) for i, sh in enumerate(nest['sheets'])])
+    with zipfile.ZipFile(out) as zf:
+        assert zf.namelist() == [f"{i}.dxf" for i in range(nest['fogli'])]
+        for i, sh in enumerate(nest['sheets']):
+            data = zf.read(f"{i}.dxf")
+            assert b"\\U+6771" in data and entity_signature(data) == entity_signature(generate_sheet_dxf(sh, nest['config'], name))
+
+def test_characters_outside_the_basic_plane_are_replaced(project):
+    geo, _ = project; part = type_as_part(geo['part_types'][0])
+    texts = [e.dxf.text for e in read(delivered(stream_single_dxf, part, "Mensola 🙂")).modelspace() if e.dxftype() == "TEXT"]
+    assert any(t.endswith("Mensola ?") for t in texts)
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from engine import DEFAULT_BOARDS, DEFAULT_SHEET, nest_parts, nesting_items, optimize_boards, normalize_project, get_geometry
+
+def random_items(seed, n):
+    rng = random.Random(seed)
+    return [{"lbl": str(i), "code": f"P{i % 5}", "dx": rng.choice([50.0, 120.0, 200.0, 280.0]), "dy": rng.choice([20.0, 25.0, 30.0, 45.0]), "holes": [(3.0, 5.0)]} for i in range(n)]
+
+def assert_valid_nesting(items, nest):
+    cfg = nest['config']; m = cfg['margine']; kerf = cfg['kerf']; eps = 1e-6
+    placed = [p for sh in nest['sheets'] for p in sh['parts']]
+    assert sorted([p['lbl'] for p in placed] + nest['oversize']) == sorted(it['lbl'] for it in items)
+    by_lbl = {it['lbl']: it for it in items}
+    for sh in nest['sheets']:
+        for p in sh['parts']:
+            it = by_lbl[p['lbl']]
+            assert sorted((p['dx'], p['dy'])) == sorted((it['dx'], it['dy']))
+            assert p['x'] >= m - eps and p['y'] >= m - eps
+            assert p['x'] + p['dx'] <= cfg['lamiera_l'] - m + eps and p['y'] + p['dy'] <= cfg['lamiera_h'] - m + eps
+            assert all(0 <= hx <= p['dx'] + eps and 0 <= hy <= p['dy'] + eps for hx, hy in p['holes'])
+        parts = sh['parts']
+        for i, a in enumerate(parts):
+            for b in parts[i + 1:]:
+                # Tra due pezzi resta almeno il kerf in X o in Y
+                apart = a['x'] + a['dx'] + kerf <= b['x'] + eps or b['x'] + b['dx'] + kerf <= a['x'] + eps or \
+                        a['y'] + a['dy'] + kerf <= b['y'] + eps or b['y'] + b['dy'] + kerf <= a['y'] + eps
+                assert apart, (a['lbl'], b['lbl'])
+
+@pytest.mark.parametrize("seed,budget", [(0, 0.0), (1, 0.0), (2, 0.05), (3, 0.05)])
+def test_nesting_layouts_are_valid(seed, budget):
+    items = random_items(seed, 40); nest = nest_parts(items, DEFAULT_SHEET, budget)
+    assert_valid_nesting(items, nest)
+    assert nest['fogli'] >= nest['limite_inferiore'] and not nest['oversize']
+
+def test_nesting_reports_oversize_parts():
+    items = random_items(0, 5) + [{"lbl": "grande", "code": "X", "dx": 400.0, "dy": 200.0, "holes": []}]
+    nest = nest_parts(items); assert nest['oversize'] == ["grande"]
+    assert_valid_nesting(items, nest)
+
+def test_nesting_of_project_plates():
+    p = normalize_project({"cols": [{"w": 60, "h": h, "d": d, "r": 4} for h in (120, 200, 280) for d in (25, 45)]})
+    part_types = get_geometry(p)['part_types']; items = nesting_items(part_types); nest = nest_parts(items)
+    assert len(items) == sum(pt['qty'] for pt in part_types)
+    assert_valid_nesting(items, nest)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cutting_plan_is_valid(seed):
+    rng = random.Random(seed)
+    pieces = [{"lbl": str(i), "w": rng.choice([30.0, 60.0, 90.0, 120.0, 200.0, 450.0]), "d": rng.choice([20.0, 30.0, 45.0, 101.0])} for i in range(80)]
+    plan = optimize_boards(pieces, DEFAULT_BOARDS); cfg = plan['config']; kerf = cfg['kerf_legno']
+    labels = [lbl for t in plan['tavole'] for lbl in t['etichette']]
+    assert sorted(labels + plan['fuori_misura']) == sorted(pc['lbl'] for pc in pieces) and len(set(labels)) == len(labels)
+    assert set(plan['fuori_misura']) == {pc['lbl'] for pc in pieces if pc['w'] > max(cfg['tavole_lunghezze']) or pc['d'] > max(cfg['tavole_larghezze'])}
+    for t in plan['tavole']:
+        assert t['lunghezza'] in cfg['tavole_lunghezze'] and t['larghezza'] in cfg['tavole_larghezze']
+        assert t['profondita'] <= t['larghezza'] and sum(t['pezzi']) + kerf * (len(t['pezzi']) - 1) <= t['lunghezza'] + 1e-6
+        # Tavola piu' stretta e piu' corta possibile
+        assert all(w < t['profondita'] for w in cfg['tavole_larghezze'] if w < t['larghezza'])
+        assert all(x < sum(t['pezzi']) + kerf * (len(t['pezzi']) - 1) - 1e-6 for x in cfg['tavole_lunghezze'] if x < t['lunghezza'])
+        assert 0.0 <= t['scarto'] < 1.0
+    assert plan['n_tavole'] == len(plan['tavole']) and plan['tagli'] == sum(t['tagli'] for t in plan['tavole'])
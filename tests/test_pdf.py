@@ -0,0 +1,39 @@
+import os
+from datetime import datetime
+
+import fpdf.fpdf
+import pytest
+
+import engine.pdf
+from engine import normalize_project
+from engine.pipeline import build_pdf_report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOW = datetime(2025, 1, 6, 9, 30, 0)
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None): return NOW
+
+@pytest.fixture
+def report(monkeypatch):
+    # Data di creazione e data nell'intestazione fisse: due PDF dello stesso progetto devono coincidere
+    monkeypatch.chdir(ROOT); monkeypatch.setattr(fpdf.fpdf, "datetime", FrozenDatetime); monkeypatch.setattr(engine.pdf, "datetime", FrozenDatetime)
+    cols = [{"w": 90, "h": 200, "d": 30, "r": 5}, {"w": 60, "h": 120, "d": 25, "r": 3}] * 3 + [{"w": 120, "h": 280, "d": 45, "r": 8}]
+    project = normalize_project({"project_name": "Replay", "cols": cols})
+    return lambda: build_pdf_report(project)
+
+def test_fpdf_version_is_the_pinned_one():
+    assert fpdf.FPDF_VERSION == "1.7.2"
+
+def test_detail_replay_is_byte_identical(report, monkeypatch):
+    fast = report()
+    monkeypatch.setattr(engine.pdf, "REPLAY_DETAILS", False)
+    assert report() == fast
+
+def test_cached_logo_is_byte_identical(report, monkeypatch):
+    assert os.path.exists(os.path.join(ROOT, "logo.png"))
+    fast = report()
+    # Senza informazioni pronte l'intestazione lascia a fpdf la lettura del PNG
+    monkeypatch.setattr(engine.pdf, "image_info", lambda path: None)
+    assert report() == fast
@@ -0,0 +1,56 @@
+import pytest
+
+from engine import (DEFAULT_COSTS, PESO_SPECIFICO_FERRO, PESO_SPECIFICO_LEGNO, StageCache, normalize_project, export_key, parts_key, get_geometry,
+                    get_quote_stats, get_validation, get_wood_plan, compute_stats)
+from engine.pipeline import geometry_key
+
+def project(**changes):
+    base = {"project_name": "Test", "cols": [{"w": 60, "h": 200, "d": 30, "r": 4}, {"w": 90, "h": 200, "d": 30, "r": 5}]}
+    base.update(changes); return normalize_project(base)
+
+def with_col(p, i, **changes):
+    cols = [dict(c) for c in p['cols']]; cols[i].update(changes); return normalize_project(dict(p, cols=cols))
+
+def test_stage_cache_computes_once_per_key():
+    cache = StageCache(maxsize=2); calls = []
+    fn = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_compute("s", "a", fn) == 1 and cache.get_or_compute("s", "a", fn) == 1
+    assert cache.get_or_compute("s", "b", fn) == 2 and cache.get_or_compute("t", "a", fn) == 3
+    assert cache.info() == {"entries": 2, "hits": 1, "misses": 3}
+    assert cache.get_or_compute("s", "a", fn) == 4  # scartata per LRU
+
+def test_geometry_key_follows_modules_only():
+    p = project()
+    assert geometry_key(p) == geometry_key(dict(p, finish_wood="Noce", project_name="Altro"))
+    assert geometry_key(p) != geometry_key(with_col(p, 0, w=61))
+    assert geometry_key(p) != geometry_key(with_col(p, 1, manual=True, man_heights=[0, 30, 60, 90, 120]))
+
+def test_parts_key_ignores_module_width():
+    p = project()
+    assert parts_key(p) == parts_key(with_col(p, 0, w=120))
+    assert parts_key(p) != parts_key(with_col(p, 0, h=210))
+    assert parts_key(p) != parts_key(with_col(p, 1, r=6))
+
+def test_export_keys_follow_their_inputs():
+    p = project()
+    assert export_key("stl", p) == export_key("stl", dict(p, project_name="Altro", finish_iron="Bianco"))
+    assert export_key("dxf_full", p) != export_key("dxf_full", dict(p, project_name="Altro"))
+    assert export_key("pdf_report", p) != export_key("pdf_report", dict(p, finish_wood="Noce"))
+    assert export_key("stl", p) != export_key("stl", with_col(p, 0, d=35))
+    assert export_key("dxf_single", p, 0) != export_key("dxf_single", p, 1)
+
+def test_cached_stages_follow_their_config():
+    p = project(); cfg = dict(DEFAULT_COSTS)
+    assert get_geometry(p) is get_geometry(project())
+    short = dict(cfg, tavole_lunghezze=[100.0, 150.0])
+    assert get_wood_plan([p], cfg) is get_wood_plan([p], dict(cfg, markup_percent=99.0))
+    assert get_wood_plan([p], cfg) is not get_wood_plan([p], short)
+    assert get_quote_stats(p, cfg)['tavole_legno'] < get_quote_stats(p, short)['tavole_legno']
+    assert get_validation(p, cfg)['avvisi'] == 0 and get_validation(p, dict(cfg, carico_mensola_kg_m2=5000.0))['avvisi'] > 0
+
+def test_stats_match_the_pieces():
+    # Due piastre e r mensole per modulo, sommate pezzo per pezzo
+    geo = get_geometry(project()); ferro = [m['vol_ferro'] for m in geo['modules'] for _ in range(2)]; legno = [m['vol_legno'] for m in geo['modules'] for _ in range(m['r'])]
+    stats = compute_stats(geo)
+    assert stats['peso_ferro'] == pytest.approx(sum(ferro) * PESO_SPECIFICO_FERRO / 1000.0)
+    assert stats['peso_legno'] == pytest.approx(sum(legno) * PESO_SPECIFICO_LEGNO / 1000.0) and stats['viti'] == 6 * len(legno)
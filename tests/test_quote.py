@@ -0,0 +1,38 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from engine import DEFAULT_COSTS, calculate_quote, calculate_quote_vec
+
+def random_case(rng):
+    stats = {"peso_ferro": rng.uniform(0, 500), "peso_legno": rng.uniform(0, 300), "viti": 6 * rng.randint(1, 400)}
+    if rng.random() < 0.7: stats.update(tavole_legno=rng.randint(1, 40), tagli_legno=rng.randint(1, 400), mq_tavole=rng.uniform(0.1, 30))
+    inputs = {"stock_iron": rng.random() < 0.5, "stock_wood": rng.random() < 0.5, "logistics_type": rng.choice(["corriere", "montaggio"]),
+              "costo_corriere": rng.uniform(0, 400), "gg_viaggio_corriere": rng.randint(0, 7), "ore_viaggio": rng.uniform(0, 8),
+              "ore_montaggio": rng.uniform(0, 16), "num_operai": rng.randint(1, 4), "num_cols": rng.randint(1, 200), "start_date": date(2025, 1, 7)}
+    cfg = dict(DEFAULT_COSTS)
+    for k, v in cfg.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool): cfg[k] = type(v)(rng.uniform(0, 60)) if isinstance(v, float) else rng.randint(0, 10)
+    return stats, inputs, cfg
+
+@pytest.mark.parametrize("seed", range(300))
+def test_vectorized_quote_matches_scalar(seed):
+    stats, inputs, cfg = random_case(random.Random(seed))
+    ref = calculate_quote(stats, inputs, cfg); vec = calculate_quote_vec(stats, inputs, cfg)
+    for k in ("costo_vivo", "price_ex_vat", "vat", "price_total", "logistics_price"): assert float(vec[k]) == pytest.approx(ref[k], rel=1e-9, abs=1e-9)
+    assert int(vec['days_total']) == ref['days_total']
+    assert (inputs['start_date'] + timedelta(days=int(vec['days_total']))).strftime("%d/%m/%Y") == ref['delivery_date']
+
+def test_vectorized_quote_broadcasts_projects_by_price_lists():
+    rng = random.Random(1); cases = [random_case(rng) for _ in range(5)]; cfgs = [random_case(rng)[2] for _ in range(3)]
+    inputs = dict(cases[0][1], num_cols=np.array([[c[1]['num_cols']] for c in cases]))
+    stats = {k: np.array([[c[0][k]] for c in cases]) for k in ("peso_ferro", "peso_legno", "viti")}
+    cfg = {k: np.array([c[k] for c in cfgs]) for k in DEFAULT_COSTS if not isinstance(DEFAULT_COSTS[k], list)}
+    vec = calculate_quote_vec(stats, inputs, cfg)
+    assert vec['price_total'].shape == (5, 3)
+    for i, (s, inp, _) in enumerate(cases):
+        for j, c in enumerate(cfgs):
+            ref = calculate_quote({k: s[k] for k in stats}, dict(inputs, num_cols=inp['num_cols']), c)
+            assert vec['price_total'][i, j] == pytest.approx(ref['price_total'], rel=1e-9)
@@ -0,0 +1,68 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pytest
+
+from engine import DEFAULT_COSTS, RESOURCES, schedule_orders, plan_delivery, load_orders, update_orders
+
+START = date(2025, 1, 6)  # lunedi'
+
+def order(oid, hours=8.0, priority=1, confirmed=START, wait=2):
+    return {"id": oid, "progetto": oid, "cliente": "", "priorita": priority, "confermato": confirmed.isoformat(),
+            "ore": {r: hours for r in RESOURCES}, "attesa": {"ferro": wait, "legno": wait, "vern_ferro": 1, "vern_legno": 1, "logistica": 2}}
+
+def test_load_never_exceeds_capacity_and_weekends_stay_free():
+    plan = schedule_orders([order(f"O{i}", hours=13.0) for i in range(12)], DEFAULT_COSTS, START)
+    for r in RESOURCES:
+        assert np.all(plan['carico'][r] <= plan['capacita'][r] + 1e-9)
+        weekend = [d for d in range(len(plan['capacita'][r])) if (START.weekday() + d) % 7 >= 5]
+        assert np.all(plan['carico'][r][weekend] == 0.0)
+    # Tutte le ore richieste sono state pianificate nel calendario
+    for r in RESOURCES: assert plan['carico'][r].sum() == pytest.approx(12 * 13.0)
+
+def test_confirmed_order_is_planned_once():
+    queue = [order(f"O{i}", hours=20.0) for i in range(3)]
+    new, plan = plan_delivery(queue, order("N"), DEFAULT_COSTS, START)
+    # Dopo "Conferma Ordine" il rerun trova lo stesso ordine nella coda: stessa consegna, stesso carico
+    again, replan = plan_delivery(queue + [order("N")], order("N"), DEFAULT_COSTS, START)
+    assert [o['id'] for o in replan['ordini']] == ["O0", "O1", "O2", "N"]
+    assert again['consegna'] == new['consegna']
+    for r in RESOURCES: assert replan['carico'][r].sum() == pytest.approx(plan['carico'][r].sum())
+
+def test_queue_and_capacity_move_the_delivery():
+    queue = [order(f"O{i}", hours=20.0) for i in range(5)]
+    alone, _ = plan_delivery([], order("N"), DEFAULT_COSTS, START)
+    queued, _ = plan_delivery(queue, order("N"), DEFAULT_COSTS, START)
+    slow, _ = plan_delivery(queue, order("N"), dict(DEFAULT_COSTS, ore_giorno_assemblaggio=4.0), START)
+    assert alone['consegna'] < queued['consegna'] <= slow['consegna']
+    assert queued['consegna'] < slow['consegna']
+
+def test_priority_jumps_the_queue():
+    queue = [order(f"O{i}", hours=20.0) for i in range(5)]
+    normal, _ = plan_delivery(queue, order("N"), DEFAULT_COSTS, START)
+    urgent, plan = plan_delivery(queue, order("N", priority=0), DEFAULT_COSTS, START)
+    assert urgent['consegna'] < normal['consegna']
+    assert urgent['consegna'] <= min(o['consegna'] for o in plan['ordini'])
+
+def test_waits_and_working_days():
+    done, _ = plan_delivery([], order("N", hours=4.0, wait=10), DEFAULT_COSTS, START)
+    assert done['fine']['laser'] >= 10 and done['fine']['legno'] >= 10
+    six, _ = plan_delivery([], order("N", hours=4.0, wait=10), dict(DEFAULT_COSTS, giorni_lavorativi_settimana=6), START)
+    assert six['consegna'] <= done['consegna']
+
+def test_orders_beyond_the_horizon_extend_the_calendar():
+    done, plan = plan_delivery([], order("N", hours=8.0 * 400), DEFAULT_COSTS, START)
+    assert done['giorni'] > 366 and plan['carico']['laser'].sum() == pytest.approx(8.0 * 366 * 5 / 7, rel=0.01)
+
+def test_zero_capacity_is_an_error():
+    with pytest.raises(ValueError): schedule_orders([order("N")], dict(DEFAULT_COSTS, ore_giorno_laser=0.0), START)
+
+def test_concurrent_updates_keep_every_order(tmp_path):
+    path = str(tmp_path / "ordini.json")
+    threads = [threading.Thread(target=update_orders, args=(lambda q, i=i: q + [order(f"O{i}")], path)) for i in range(16)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert sorted(o['id'] for o in load_orders(path)) == sorted(f"O{i}" for i in range(16))
+    update_orders(lambda q: [o for o in q if o['id'] != "O3"], path)
+    assert len(load_orders(path)) == 15 and [p.name for p in tmp_path.iterdir()] == ["ordini.json"]
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import engine.server as server
+from engine import ByteCache, get_process_pool, pool_workers, shutdown_process_pool
+from engine.jobs import JobManager
+
+PROJECT = {"project_name": "Api", "cols": [{"w": 60, "h": 200, "d": 30, "r": 4}]}
+
+async def call(method, path, body=None):
+    # Richiesta ASGI diretta all'app Starlette (senza lifespan: niente process pool)
+    raw = body if isinstance(body, bytes) else b"" if body is None else json.dumps(body).encode("utf-8")
+    messages = [{"type": "http.request", "body": raw, "more_body": False}]; sent = []
+    async def receive(): return messages.pop(0) if messages else {"type": "http.disconnect"}
+    async def send(message): sent.append(message)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+             "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 8502)}
+    await server.app(scope, receive, send)
+    return sent[0]['status'], b"".join(m.get('body', b"") for m in sent[1:])
+
+def request(method, path, body=None): return asyncio.run(call(method, path, body))
+
+@pytest.fixture
+def api(monkeypatch):
+    # Export finti in un pool di thread: contano le esecuzioni e, se serve, aspettano 'release'
+    state = {"calls": [], "release": threading.Event(), "delay": 0.0}; state['release'].set()
+    def render(kind, project, extra=None):
+        state['calls'].append(kind); time.sleep(state['delay']); state['release'].wait(10)
+        return f"{kind}:{project['project_name']}".encode()
+    pool = ThreadPoolExecutor(4)
+    monkeypatch.setattr(server, "render_export", render); monkeypatch.setattr(server, "get_process_pool", lambda max_workers=None: pool)
+    monkeypatch.setattr(server, "artifacts", ByteCache(1024 * 1024)); monkeypatch.setattr(server, "coalescer", server.Coalescer())
+    monkeypatch.setattr(server, "job_manager", JobManager())
+    yield state
+    state['release'].set(); pool.shutdown(wait=True)
+
+@pytest.mark.parametrize("body, message", [
+    (b"non json", "serve un JSON"),
+    ({"cols": []}, "non ha moduli"),
+    ({"cols": [1]}, "ogni modulo deve essere un oggetto"),
+    ({"cols": [{"w": 5000}]}, "w deve essere tra"),
+    ({"cols": [{"mh": "abc"}]}, "Progetto non valido"),
+    ({"cols": [{"man": True, "mh": [9999, -50]}]}, "quote delle mensole"),
+    ({"cols": [{}], "listino": []}, "devono essere oggetti JSON"),
+])
+def test_bad_input_is_a_400(api, body, message):
+    for path in ("/preventivo", "/stl", "/dxf", "/pdf/scheda"):
+        status, data = request("POST", path, body)
+        assert status == 400 and message in json.loads(data)['errore']
+    assert api['calls'] == []
+
+def test_manual_heights_inside_the_upright_are_accepted(api):
+    status, data = request("POST", "/stl", {"cols": [{"h": 200, "r": 2, "man": True, "mh": [0, 196]}]})
+    assert status == 200 and data == b"stl:Progetto"
+
+def test_identical_requests_in_flight_share_one_build(api):
+    api['delay'] = 0.3
+    async def both(): return await asyncio.gather(call("POST", "/stl", PROJECT), call("POST", "/stl", PROJECT))
+    results = asyncio.run(both())
+    assert results == [(200, b"stl:Api")] * 2 and api['calls'] == ["stl"]
+    assert server.coalescer.info()['condivise'] == 1
+    # Finito il calcolo, la stessa richiesta esce dalla cache senza un nuovo export
+    assert request("POST", "/stl", PROJECT) == (200, b"stl:Api") and api['calls'] == ["stl"]
+
+def test_pdf_job_flow(api):
+    api['release'].clear()
+    status, data = request("POST", "/pdf/scheda", PROJECT); job = json.loads(data)
+    assert status == 202 and job['stato'] in ("in coda", "in corso") and job['file'] is None
+    assert request("GET", job['url'] + "/file")[0] == 409
+    # Stesso progetto da un altro client: stesso job
+    assert json.loads(request("POST", "/pdf/scheda", PROJECT)[1])['key'] == job['key']
+    api['release'].set()
+    for _ in range(200):
+        job = json.loads(request("GET", job['url'])[1])
+        if job['stato'] == "pronto": break
+        time.sleep(0.01)
+    assert job['stato'] == "pronto" and request("GET", job['file']) == (200, b"pdf_report:Api")
+    assert api['calls'] == ["pdf_report"]
+    assert request("GET", "/lavori/sconosciuto")[0] == 404 and request("GET", "/lavori/sconosciuto/file")[0] == 404
+
+def test_status_reports_the_pool_without_starting_it():
+    shutdown_process_pool(wait=True)
+    status, data = request("GET", "/stato")
+    assert status == 200 and json.loads(data)['worker'] == 0 and pool_workers() == 0
+    try:
+        get_process_pool(3)
+        assert json.loads(request("GET", "/stato")[1])['worker'] == 3 and get_process_pool(5) is get_process_pool()
+    finally: shutdown_process_pool(wait=True)
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("ezdxf", "fpdf", "pandas")
+# Processo pulito: Streamlit importato prima, contano solo i moduli che Moby.py aggiunge mostrando il login
+CHILD = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+heavy = {heavy!r}
+base = set(sys.modules)
+at = AppTest.from_file("Moby.py", default_timeout=120); at.run()
+new = set(sys.modules) - base
+print(json.dumps({{"importati": [h for h in heavy if any(m == h or m.startswith(h + ".") for m in new)],
+                  "login": [b.label for b in at.button], "errori": [str(e.value) for e in at.exception]}}))
+"""
+
+def test_login_page_skips_heavy_libraries():
+    out = subprocess.run([sys.executable, "-c", CHILD.format(heavy=HEAVY)], cwd=ROOT, capture_output=True, text=True, check=True, timeout=300)
+    run = json.loads(out.stdout.strip().splitlines()[-1])
+    assert run['errori'] == []
+    assert "Entra" in run['login']
+    assert run['importati'] == []
@@ -0,0 +1,30 @@
+import pytest
+
+import engine.validation as validation
+from engine import SPESSORE_LEGNO, OFFSET_LATERALI, DIAMETRO_FORO, MODULE_LIMITS, normalize_project, get_geometry, validate_geometry
+
+def geometry(**col): return get_geometry(normalize_project({"cols": [dict({"w": 60, "h": 200, "d": 30, "r": 4}, **col)]}))
+
+def kinds(geo): return [v['tipo'] for v in validate_geometry(geo)['violazioni']]
+
+def test_overlapping_shelves_are_one_violation():
+    # Piani a 2 cm: una sola riga (la distanza tra i piani copre anche l'interasse verticale dei fori)
+    result = validate_geometry(geometry(r=3, manual=True, man_heights=[0, 50, 52]))
+    assert [(v['tipo'], v['mensola']) for v in result['violazioni']] == [("sovrapposizione", 3)]
+    assert validation.MIN_DISTANZA_PIANI == max(SPESSORE_LEGNO, validation.MIN_INTERASSE_H)
+
+@pytest.mark.parametrize("d", [MODULE_LIMITS['d'][0], MODULE_LIMITS['d'][1]])
+def test_current_hole_layout_respects_the_limits(d):
+    # Limiti reali della foratura: bordo min(OFFSET_LATERALI, SPESSORE_LEGNO / 2), interasse d / 2 - OFFSET_LATERALI
+    h = MODULE_LIMITS['h'][0]
+    assert min(OFFSET_LATERALI, SPESSORE_LEGNO / 2.0) >= validation.MIN_BORDO
+    assert d / 2.0 - OFFSET_LATERALI >= validation.MIN_INTERASSE_P
+    # Mensole al piede e in testa, piani a contatto: nessuna violazione sui fori
+    assert kinds(geometry(h=h, d=d, r=3, manual=True, man_heights=[0, SPESSORE_LEGNO, h - SPESSORE_LEGNO])) == []
+
+def test_hole_checks_fire_on_a_tighter_layout():
+    # Le verifiche su bordo e profondita' valgono per forature diverse da quella attuale
+    geo = geometry(r=1, manual=True, man_heights=[100]); module = dict(geo['modules'][0])
+    module['holes'] = [(DIAMETRO_FORO / 2.0, 102.0), (DIAMETRO_FORO * 1.5, 102.0), (module['d'] - OFFSET_LATERALI, 102.0)]
+    result = validate_geometry(dict(geo, modules=[module]))
+    assert sorted((v['tipo'], v['limite']) for v in result['violazioni']) == [("distanza_bordo", round(validation.MIN_BORDO, 2)), ("interasse_fori", round(validation.MIN_INTERASSE_P, 2))]